@@ -21,6 +21,11 @@ cd ..
 pyinstaller ^
     -F ^
     -w main.py ^
+    --hidden-import Kompas6API5 ^
+    --hidden-import KompasAPI7 ^
+    --hidden-import LDefin2D ^
+    --hidden-import LDefin3D ^
+    --hidden-import MiscellaneousHelpers ^
     --add-data "img/*;./img" ^
     --add-data "icon/*;./icon" ^
     --workpath ./ ^
@@ -1,33 +1,92 @@
-from PyQt5 import QtCore, QtGui, QtWidgets
-from sys import exit
+import time
+STARTUP_START_TIME = time.perf_counter()
 
-import src.gui as gui
-import src.round_dimensions as round_dimensions
+# допустимое время от запуска до показа главного окна, с
+STARTUP_TIME_BUDGET = 1.5
 
-from src.resources import *
+import sys
 
-from src import config
+import src.startup_profile as startup_profile
+if startup_profile.is_enabled_by_arguments() or startup_profile.is_enabled_by_environment():
+    startup_profile.enable(STARTUP_START_TIME, startup_profile.is_cprofile_requested())
+
+with startup_profile.phase("import PyQt5"):
+    from PyQt5 import QtCore, QtGui, QtWidgets
+
+with startup_profile.phase("import modules"):
+    import src.gui as gui
+    import src.round_dimensions as round_dimensions
+    import src.com_tracing as com_tracing
+    from src.backend import get_backend
+
+    from src.resources import *
+
+    from src import config
 
 set_bundle_dir_by_main_file(__file__)
 
+if com_tracing.is_enabled_by_environment():
+    com_tracing.enable()
 
 
-app = QtWidgets.QApplication([])
-app.setWindowIcon(QtGui.QIcon(get_resource_path("icon/icon.ico")))
-app.setApplicationName(config.PROGRAM_NAME)
 
+with startup_profile.phase("QApplication"):
+    app = QtWidgets.QApplication([])
+    app.setWindowIcon(QtGui.QIcon(get_resource_path("icon/icon.ico")))
+    app.setApplicationName(config.PROGRAM_NAME)
 
-if not round_dimensions.is_kompas_running():
+
+with startup_profile.phase("is_kompas_running"):
+    is_kompas_running = round_dimensions.is_kompas_running()
+
+if not is_kompas_running:
     QtWidgets.QMessageBox.critical(
         None,
         "Компас-3D не запущен",
         "Не найдено запущенное приложение Компас-3D.\nПрограмма будет закрыта.",
         QtWidgets.QMessageBox.StandardButton.Ok,
     )
-    exit(1)
+    sys.exit(1)
+
+print(get_backend().connection_info())
 
-w = gui.MainWindow()
-w.show()
+with startup_profile.phase("config load"):
+    config.options.get_config_reader()
+
+
+def first_painted(paint_time: float) -> None:
+    profiler = startup_profile.get_profiler()
+    if not profiler is None:
+        print(f"First paint: {(paint_time - STARTUP_START_TIME) * 1000:.0f} ms; {w.icon_cache}")
+        profiler.mark("first paint", paint_time)
+        load_times = sys.modules["src.HEAD"].module_load_times if "src.HEAD" in sys.modules else {}
+        print(profiler.summary())
+        try:
+            print(f"Startup profile saved: {profiler.save(config.get_config_folder(), load_times)}")
+        except Exception as e:
+            print(f"Startup profile is not saved: {e.__class__.__name__}: {str(e)}")
+
+
+with startup_profile.phase("MainWindow()"):
+    w = gui.MainWindow()
+w.first_painted.connect(first_painted)
+with startup_profile.phase("show"):
+    w.show()
+with startup_profile.phase("subscribe_selection_changes"):
+    w.subscribe_selection_changes()
+
+if not startup_profile.get_profiler() is None:
+    startup_time = time.perf_counter() - STARTUP_START_TIME
+    print(f"Startup: {startup_time * 1000:.0f} ms (budget {STARTUP_TIME_BUDGET * 1000:.0f} ms)" \
+        + (" - OVER BUDGET" if startup_time > STARTUP_TIME_BUDGET else ""))
+    if "src.HEAD" in sys.modules:
+        for name, load_time in sys.modules["src.HEAD"].module_load_times.items():
+            print(f"    import {name}: {load_time * 1000:.0f} ms")
 w.restore_geometry_from_config()
 
 app.exec()
+
+# трассировка включается переменной окружения; сводка выводится за весь сеанс
+tracer = com_tracing.get_tracer()
+if not tracer is None:
+    print(tracer.summary())
@@ -1,21 +1,59 @@
-import Kompas6API5 as KAPI5
-import KompasAPI7 as KAPI7
-from win32com.client import Dispatch
-import LDefin2D
-import LDefin3D
-import MiscellaneousHelpers as MH
+from __future__ import annotations
 
+from win32com.client import Dispatch
 import pythoncom
 
 
+import importlib
 import os
+import threading
+import time
+
+
+class LazyModule:
+    """
+        Модуль, импортируемый при первом обращении к любому его атрибуту.
+
+        Сгенерированные модули API Компаса очень большие, поэтому они
+        загружаются только тогда, когда действительно нужны.
+    """
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            t0 = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            module_load_times[self._name] = time.perf_counter() - t0
+        return self._module
+
+    def is_loaded(self) -> bool:
+        return not self._module is None
+
+    def __getattr__(self, attr: str):
+        value = getattr(self._load(), attr)
+        setattr(self, attr, value)
+        return value
+
+    def __repr__(self) -> str:
+        return f"<LazyModule '{self._name}'{' (loaded)' if self.is_loaded() else ''}>"
+
+
+# имя модуля -> время импорта, с
+module_load_times: dict[str, float] = {}
+
+KAPI5 = LazyModule("Kompas6API5")
+KAPI7 = LazyModule("KompasAPI7")
+LDefin2D = LazyModule("LDefin2D")
+LDefin3D = LazyModule("LDefin3D")
+MH = LazyModule("MiscellaneousHelpers")
 
 
 def is_kompas_running() -> bool:
     try:
         pythoncom.connect('KOMPAS.Application.5')
-        iKompasObject5, iKompasObject7 = get_kompas_objects()
-        app = get_app7(iKompasObject7)
+        app = session.get_app7()
         if not app.Visible:
             app.Visible = True
         return True
@@ -30,16 +68,20 @@ def ensure_folder(filepath: str) -> None:
 
 
 
-def get_kompas_objects() -> tuple[KAPI5.KompasObject, KAPI7.IKompasAPIObject]:
+def get_kompas_object5() -> KAPI5.KompasObject:
     pythoncom.CoInitialize()
-
     iKompasObject5 = Dispatch('KOMPAS.Application.5')
-    iKompasObject5 = KAPI5.KompasObject(iKompasObject5._oleobj_.QueryInterface(KAPI5.KompasObject.CLSID, pythoncom.IID_IDispatch))
+    return KAPI5.KompasObject(iKompasObject5._oleobj_.QueryInterface(KAPI5.KompasObject.CLSID, pythoncom.IID_IDispatch))
 
+
+def get_kompas_object7() -> KAPI7.IKompasAPIObject:
+    pythoncom.CoInitialize()
     iKompasObject7 = Dispatch('KOMPAS.Application.7')
-    iKompasObject7 = KAPI7.IKompasAPIObject(iKompasObject7._oleobj_.QueryInterface(KAPI7.IKompasAPIObject.CLSID, pythoncom.IID_IDispatch))
+    return KAPI7.IKompasAPIObject(iKompasObject7._oleobj_.QueryInterface(KAPI7.IKompasAPIObject.CLSID, pythoncom.IID_IDispatch))
 
-    return (iKompasObject5, iKompasObject7)
+
+def get_kompas_objects() -> tuple[KAPI5.KompasObject, KAPI7.IKompasAPIObject]:
+    return (get_kompas_object5(), get_kompas_object7())
 
 
 def get_app7(iKompasObject7: KAPI7.IKompasAPIObject) -> KAPI7.IApplication:
@@ -47,6 +89,81 @@ def get_app7(iKompasObject7: KAPI7.IKompasAPIObject) -> KAPI7.IApplication:
     return app
 
 
+class KompasSession:
+    """
+        Долгоживущее подключение к Компасу.
+
+        Интерфейсы приложения и обёртка активного документа кэшируются
+        (отдельно для каждого потока, так как COM-объекты привязаны к
+        апартаменту потока). При каждом использовании подключение проверяется
+        одним вызовом, и если Компас был перезапущен, оно прозрачно
+        устанавливается заново. Объект API 5 (и модуль `Kompas6API5`)
+        запрашивается только при первом обращении к нему.
+    """
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self.connect_count: int = 0
+        self.last_connect_time: float = 0.0
+        self.total_connect_time: float = 0.0
+
+    def _connect(self) -> tuple[KAPI7.IKompasAPIObject, KAPI7.IApplication]:
+        t0 = time.perf_counter()
+        iKompasObject7 = get_kompas_object7()
+        app: KAPI7.IApplication = get_app7(iKompasObject7)
+        self.last_connect_time = time.perf_counter() - t0
+        self.total_connect_time += self.last_connect_time
+        self.connect_count += 1
+
+        self._local.objects = (iKompasObject7, app)
+        self._local.object5 = None
+        self._local.doc2d = None
+        self._local.doc2d_reference = None
+        return self._local.objects
+
+    def _get_objects(self) -> tuple[KAPI7.IKompasAPIObject, KAPI7.IApplication]:
+        objects = getattr(self._local, "objects", None)
+        if not objects is None:
+            try:
+                objects[1].Visible
+                return objects
+            except Exception as e:
+                pass
+        return self._connect()
+
+    def get_kompas_objects(self) -> tuple[KAPI5.KompasObject, KAPI7.IKompasAPIObject]:
+        iKompasObject7, app = self._get_objects()
+        if self._local.object5 is None:
+            self._local.object5 = get_kompas_object5()
+        return (self._local.object5, iKompasObject7)
+
+    def get_app7(self) -> KAPI7.IApplication:
+        return self._get_objects()[1]
+
+    def get_active_doc2d(self) -> KAPI7.IKompasDocument2D:
+        app: KAPI7.IApplication = self.get_app7()
+        doc: KAPI7.IKompasDocument = app.ActiveDocument
+        if doc is None:
+            raise Exception("Не обнаружен открытый документ.")
+
+        reference: int = doc.Reference
+        if reference == getattr(self._local, "doc2d_reference", None):
+            return self._local.doc2d
+
+        doc2d: KAPI7.IKompasDocument2D = KAPI7.IKompasDocument2D(doc)
+        if get_document_type(doc2d) != DocumentTypeEnum.type_2D:
+            raise Exception("Текущий документ не является 2D-документом")
+        self._local.doc2d = doc2d
+        self._local.doc2d_reference = reference
+        return doc2d
+
+    def __str__(self) -> str:
+        return f"Kompas session: {self.connect_count} connections, " \
+            f"last {self.last_connect_time * 1000:.1f} ms, total {self.total_connect_time * 1000:.1f} ms"
+
+
+session = KompasSession()
+
+
 class DocumentTypeEnum(int):
     ksDocumentUnknown = 0  # Неизвестный тип
     ksDocumentDrawing = 1  # Чертеж
@@ -64,16 +181,17 @@ class DocumentTypeEnum(int):
 
 
 def get_document_type(doc: KAPI7.IKompasDocument) -> int:
-    if doc.DocumentType == DocumentTypeEnum.ksDocumentPart \
-            or doc.DocumentType == DocumentTypeEnum.ksDocumentAssembly \
-            or doc.DocumentType == DocumentTypeEnum.ksDocumentTechnologyAssembly:
+    document_type = doc.DocumentType
+    if document_type == DocumentTypeEnum.ksDocumentPart \
+            or document_type == DocumentTypeEnum.ksDocumentAssembly \
+            or document_type == DocumentTypeEnum.ksDocumentTechnologyAssembly:
         return DocumentTypeEnum.type_3D
-    elif doc.DocumentType == DocumentTypeEnum.ksDocumentDrawing \
-            or doc.DocumentType == DocumentTypeEnum.ksDocumentFragment:
+    elif document_type == DocumentTypeEnum.ksDocumentDrawing \
+            or document_type == DocumentTypeEnum.ksDocumentFragment:
         return DocumentTypeEnum.type_2D
-    elif doc.DocumentType == DocumentTypeEnum.ksDocumentTextual:
+    elif document_type == DocumentTypeEnum.ksDocumentTextual:
         return DocumentTypeEnum.type_2D_text
-    elif doc.DocumentType == DocumentTypeEnum.ksDocumentSpecification:
+    elif document_type == DocumentTypeEnum.ksDocumentSpecification:
         return DocumentTypeEnum.type_2D_spc
     else:
         return DocumentTypeEnum.ksDocumentUnknown
@@ -173,17 +291,10 @@ def open_part_K5(filepath: str = "") -> tuple[KAPI5.ksDocument3D, KAPI5.ksPart]:
 
 def open_doc2d(filepath: str = "") -> KAPI7.IKompasDocument2D:
     """ Если `filepath == ""`, то возвращается `app.ActiveDocument`. """
-    iKompasObject5, iKompasObject7 = get_kompas_objects()
-    app: KAPI7.IApplication = get_app7(iKompasObject7)
-
     if filepath == "":
-        if app.ActiveDocument is None:
-            raise Exception("Не обнаружен открытый документ.")
-        active_doc: KAPI7.IKompasDocument2D = KAPI7.IKompasDocument2D(app.ActiveDocument)
-        if get_document_type(active_doc) != DocumentTypeEnum.type_2D:
-            raise Exception("Текущий документ не является 2D-документом")
-        return active_doc
+        return session.get_active_doc2d()
 
+    app: KAPI7.IApplication = session.get_app7()
     docs: KAPI7.IDocuments = app.Documents
     doc: KAPI7.IKompasDocument = docs.Open(filepath, True, False)
 
@@ -0,0 +1,141 @@
+from __future__ import annotations
+import typing
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+class KompasBackend:
+    """
+        Интерфейс доступа к объектной модели Компаса (API 7).
+
+        Всё, что зависит от конкретной реализации (COM и сгенерированные модули
+        `KompasAPI7`, `pythoncom` или хранящаяся в памяти модель), выполняется
+        через методы бэкенда. Возвращаемые объекты имеют те же свойства и методы,
+        что и интерфейсы API 7 (`NominalValue`, `SelectionManager`, `Update()`...).
+    """
+    def is_running(self) -> bool:
+        raise NotImplementedError()
+
+    def open_doc2d(self, filepath: str = "") -> KAPI7.IKompasDocument2D:
+        """ Если `filepath == ""`, то возвращается активный документ. """
+        raise NotImplementedError()
+
+    def create_application(self) -> KAPI7.IApplication:
+        """
+            Запускает отдельный невидимый экземпляр Компаса для пакетной обработки.
+            Если вместо него получен уже запущенный экземпляр, вызывает исключение.
+        """
+        raise NotImplementedError()
+
+    def quit_application(self, app: KAPI7.IApplication) -> None:
+        """ Закрывает экземпляр, запущенный `create_application`; уже запущенные экземпляры не закрываются. """
+        raise NotImplementedError()
+
+    def is_document_open(self, app: KAPI7.IApplication, filepath: str) -> bool:
+        """ Проверяет, открыт ли файл `filepath` в экземпляре `app`. """
+        raise NotImplementedError()
+
+    def open_document(self, app: KAPI7.IApplication, filepath: str) -> KAPI7.IKompasDocument2D:
+        """ Открывает 2D-документ без окна в экземпляре `app`. """
+        raise NotImplementedError()
+
+    def save_document(self, doc: KAPI7.IKompasDocument2D) -> None:
+        raise NotImplementedError()
+
+    def close_document(self, doc: KAPI7.IKompasDocument2D) -> None:
+        """ Закрывает документ, не сохраняя изменения. """
+        raise NotImplementedError()
+
+    def open_documents_references(self) -> set[int]:
+        """ Возвращает `Reference` документов, открытых в Компасе, или `None`, если их нельзя получить. """
+        return None
+
+    def selection_manager(self, doc: KAPI7.IKompasDocument2D) -> KAPI7.ISelectionManager:
+        raise NotImplementedError()
+
+    def selected_objects(self, doc: KAPI7.IKompasDocument2D) -> list[KAPI7.IKompasAPIObject]:
+        """ Возвращает выделенные объекты документа всегда в виде списка. """
+        selected = self.selection_manager(doc).SelectedObjects
+        if selected is None:
+            return []
+        if isinstance(selected, tuple):
+            return list(selected)
+        return [selected]
+
+    def drawing_object_type(self, obj: KAPI7.IKompasAPIObject) -> int:
+        """ Возвращает код типа объекта (`ksDrawingObjectTypeEnum`). """
+        raise NotImplementedError()
+
+    def dimension_kind(self, obj: KAPI7.IKompasAPIObject) -> int:
+        """ Определяет вид размера (`DimensionKind`) без использования кода типа. Вызывается для объектов с неизвестными кодами. """
+        raise NotImplementedError()
+
+    def dimension_text(self, d: KAPI7.IDrawingObject) -> KAPI7.IDimensionText:
+        raise NotImplementedError()
+
+    def dimension_params(self, d: KAPI7.IDrawingObject) -> KAPI7.IDimensionParams:
+        raise NotImplementedError()
+
+    def dimension_interfaces(self, d: KAPI7.IDrawingObject) -> tuple[KAPI7.IDimensionText, KAPI7.IDimensionParams]:
+        """ Оба интерфейса размера за одно обращение к бэкенду. """
+        return (self.dimension_text(d), self.dimension_params(d))
+
+    def symbols_container(self, v: KAPI7.IView) -> KAPI7.ISymbols2DContainer:
+        raise NotImplementedError()
+
+    def set_task_access(self, is_enabled: bool) -> None:
+        """ Разрешает или запрещает пользователю работу с Компасом (и перерисовку окна). """
+        raise NotImplementedError()
+
+    def refresh_document_window(self, doc: KAPI7.IKompasDocument2D) -> int:
+        """ Перерисовывает окно документа. Возвращает количество вызовов API. """
+        raise NotImplementedError()
+
+    def connection_info(self) -> str:
+        """ Статистика подключения к API (количество подключений и их длительность). """
+        return ""
+
+    def subscribe_selection_changes(self, callback: typing.Callable[[], None]) -> object:
+        """
+            Подписывает `callback()` на изменения выделения в активном документе
+            (в том числе при смене активного документа). Возвращает подписку
+            с методом `close()` или `None`, если события недоступны.
+        """
+        return None
+
+    def initialize_thread(self) -> None:
+        """ Подготавливает текущий поток к работе с API (`CoInitialize`). """
+        pass
+
+    def uninitialize_thread(self) -> None:
+        pass
+
+    def marshal_document(self, doc: KAPI7.IKompasDocument2D) -> object:
+        """ Упаковывает интерфейс документа для передачи в другой поток. """
+        raise NotImplementedError()
+
+    def unmarshal_document(self, marshalled: object) -> KAPI7.IKompasDocument2D:
+        """ Распаковывает интерфейс документа в текущем потоке. """
+        raise NotImplementedError()
+
+    def release_marshalled_document(self, marshalled: object) -> None:
+        """ Освобождает упакованный интерфейс, который не будет распакован. """
+        raise NotImplementedError()
+
+
+_backend: KompasBackend = None
+
+
+def get_backend() -> KompasBackend:
+    """ Возвращает текущий бэкенд. По умолчанию - COM-бэкенд, работающий с запущенным Компасом. """
+    global _backend
+    if _backend is None:
+        from src.com_backend import ComBackend
+        _backend = ComBackend()
+    return _backend
+
+
+def set_backend(backend: KompasBackend) -> None:
+    global _backend
+    _backend = backend
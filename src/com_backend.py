@@ -0,0 +1,337 @@
+from __future__ import annotations
+from src.HEAD import *
+from win32com.client import DispatchEx
+import win32api
+import win32con
+import win32process
+import win32com.server.util
+from win32com.server.policy import EventHandlerPolicy
+
+from src.backend import KompasBackend
+from src.dimension_kinds import DimensionKind, UNKNOWN_TYPE_CODE
+import src.dispatch_accessors as dispatch_accessors
+
+
+_dimension_class_kinds: tuple = None
+
+
+def get_dimension_class_kinds() -> tuple[tuple[type, int], ...]:
+    """ Возвращает пары (класс интерфейса размера, вид размера). Модуль `KompasAPI7` загружается при первом вызове. """
+    global _dimension_class_kinds
+    if _dimension_class_kinds is None:
+        _dimension_class_kinds = (
+            (KAPI7.IAngleDimension, DimensionKind.Angle),
+            (KAPI7.IBreakAngleDimension, DimensionKind.BreakAngle),
+            (KAPI7.IArcDimension, DimensionKind.Arc),
+            (KAPI7.IBreakLineDimension, DimensionKind.BreakLine),
+            (KAPI7.IBreakRadialDimension, DimensionKind.BreakRadial),
+            (KAPI7.IDiametralDimension, DimensionKind.Diametral),
+            (KAPI7.IHeightDimension, DimensionKind.Height),
+            (KAPI7.ILineDimension, DimensionKind.Line),
+            (KAPI7.IRadialDimension, DimensionKind.Radial),
+        )
+    return _dimension_class_kinds
+
+
+# класс обёртки -> код типа объекта; у обёрток конкретных интерфейсов размеров
+# код определяется классом, поэтому DrawingObjectType считывается один раз на
+# класс, а не на объект. Общие обёртки (`IDrawingObject`, `IKompasAPIObject`,
+# динамические) могут содержать объекты разных типов и не запоминаются
+_class_type_codes: dict[type, int] = {}
+
+
+# имена исполняемых файлов Компаса (в нижнем регистре)
+KOMPAS_PROCESS_NAMES = ("kompas.exe",)
+
+
+def get_kompas_process_ids() -> set[int]:
+    """ Возвращает идентификаторы запущенных процессов Компаса. """
+    pids: set[int] = set()
+    for pid in win32process.EnumProcesses():
+        try:
+            handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION | win32con.PROCESS_VM_READ, False, pid)
+        except Exception as e:
+            continue
+        try:
+            name = os.path.basename(win32process.GetModuleFileNameEx(handle, 0)).lower()
+        except Exception as e:
+            continue
+        finally:
+            win32api.CloseHandle(handle)
+        if name in KOMPAS_PROCESS_NAMES:
+            pids.add(pid)
+    return pids
+
+
+# имя интерфейса событий API 5 -> (IID, {DISPID: имя события})
+_event_interfaces: dict[str, tuple[object, dict[int, str]]] = {}
+
+
+def get_event_interface(name: str) -> tuple[object, dict[int, str]]:
+    """ Находит интерфейс событий `name` в библиотеке типов API 5. Возвращает его IID и имена событий по DISPID. """
+    if not name in _event_interfaces:
+        tlb = pythoncom.LoadRegTypeLib(KAPI5.CLSID, KAPI5.MajorVersion, KAPI5.MinorVersion, KAPI5.LCID)
+        for i in range(tlb.GetTypeInfoCount()):
+            if tlb.GetDocumentation(i)[0] != name:
+                continue
+            ti = tlb.GetTypeInfo(i)
+            attr = ti.GetTypeAttr()
+            names: dict[int, str] = {}
+            for k in range(attr.cFuncs):
+                memid = ti.GetFuncDesc(k).memid
+                names[memid] = ti.GetNames(memid)[0]
+            _event_interfaces[name] = (attr.iid, names)
+            break
+        else:
+            raise Exception(f"Event interface '{name}' is not found in the API 5 type library")
+    return _event_interfaces[name]
+
+
+class EventSink:
+    """
+        Приёмник событий интерфейса API 5: каждое событие вызывает
+        `callback(имя события, *аргументы)`. Обработчики событий Компаса
+        возвращают `True`, разрешая действие.
+    """
+    _public_methods_ = []
+
+    def __init__(self, names: dict[int, str], callback) -> None:
+        self._callback = callback
+        self._dispid_to_func_ = {}
+        for dispid, name in names.items():
+            self._dispid_to_func_[dispid] = "On" + name
+            setattr(self, "On" + name, lambda *args, name=name: self._on_event(name, *args))
+
+    def _on_event(self, name: str, *args) -> bool:
+        try:
+            self._callback(name, *args)
+        except Exception as e:
+            print(f"Event {name} handler failed: {e.__class__.__name__}: {str(e)}")
+        return True
+
+
+class EventConnection:
+    """ Подключение `EventSink` к объекту-источнику событий через `IConnectionPoint`. """
+    def __init__(self, source, interface_name: str, callback) -> None:
+        iid, names = get_event_interface(interface_name)
+        container = source._oleobj_.QueryInterface(pythoncom.IID_IConnectionPointContainer)
+        self._point = container.FindConnectionPoint(iid)
+        self._cookie = self._point.Advise(win32com.server.util.wrap(EventSink(names, callback), usePolicy=EventHandlerPolicy))
+
+    def close(self) -> None:
+        if not self._point is None:
+            self._point.Unadvise(self._cookie)
+            self._point = None
+
+
+class SelectionSubscription:
+    """
+        Подписка на события менеджера выделения (`ksSelectionMngNotify`)
+        активного документа. При смене активного документа (`ksKompasObjectNotify`)
+        и при закрытии активного документа (`ksDocumentFileNotify`) подписка
+        переносится на новый активный документ.
+
+        События приходят в поток, создавший подписку, пока в нём работает цикл
+        сообщений (главный поток окна).
+    """
+    # события приложения и активного документа, после которых активным становится другой документ
+    # (или активного документа больше нет)
+    DOCUMENT_EVENTS = ("ChangeActiveDocument", "CreateDocument", "OpenDocument", "CloseDocument")
+
+    def __init__(self, callback) -> None:
+        self._callback = callback
+        self._selection_connection: EventConnection = None
+        self._document_connection: EventConnection = None
+        self._kompas5 = session.get_kompas_objects()[0]
+        self._application_connection = EventConnection(self._kompas5, "ksKompasObjectNotify", self._on_document_event)
+        self._subscribe_active_document()
+
+    def _unsubscribe_document(self) -> None:
+        for connection in (self._selection_connection, self._document_connection):
+            if not connection is None:
+                connection.close()
+        self._selection_connection = None
+        self._document_connection = None
+
+    def _subscribe_active_document(self) -> None:
+        self._unsubscribe_document()
+        doc5 = self._kompas5.ActiveDocument2D()
+        if doc5 is None:
+            return
+        self._selection_connection = EventConnection(doc5.GetSelectionMng(), "ksSelectionMngNotify", self._on_selection_event)
+        self._document_connection = EventConnection(doc5, "ksDocumentFileNotify", self._on_document_event)
+
+    def _on_document_event(self, name: str, *args) -> None:
+        if name in self.DOCUMENT_EVENTS:
+            self._subscribe_active_document()
+            self._callback()
+
+    def _on_selection_event(self, name: str, *args) -> None:
+        self._callback()
+
+    def close(self) -> None:
+        self._unsubscribe_document()
+        self._application_connection.close()
+
+
+class ComBackend(KompasBackend):
+    """
+        Работа с запущенным Компасом через COM.
+
+        При `use_dispatch_accessors` интерфейсы `IDimensionText` и
+        `IDimensionParams` возвращаются как `FastDispatch` (см. `dispatch_accessors`).
+    """
+    def __init__(self, use_dispatch_accessors: bool = True) -> None:
+        self.use_dispatch_accessors = use_dispatch_accessors
+        # id(app) -> приложение, запущенное `create_application` в отдельном процессе
+        self._started_applications: dict[int, KAPI7.IApplication] = {}
+        self._applications_lock = threading.Lock()
+
+    def is_running(self) -> bool:
+        return is_kompas_running()
+
+    def open_doc2d(self, filepath: str = "") -> KAPI7.IKompasDocument2D:
+        return open_doc2d(filepath)
+
+    def create_application(self) -> KAPI7.IApplication:
+        # DispatchEx создаёт новый объект сервера; будет ли это отдельный процесс
+        # Компаса, зависит от того, как сервер зарегистрирован в системе.
+        # Экземпляр считается запущенным нами, только если появился ровно один
+        # новый процесс Компаса и окно невидимо. Уже запущенный (например,
+        # пользователем) экземпляр для обработки не используется: в нём могут
+        # быть открыты те же документы с несохранёнными изменениями.
+        # Запуск выполняется под блокировкой, чтобы процессы разных потоков
+        # не смешивались.
+        with self._applications_lock:
+            pids_before = get_kompas_process_ids()
+            iKompasObject7 = DispatchEx('KOMPAS.Application.7')
+            iKompasObject7 = KAPI7.IKompasAPIObject(iKompasObject7._oleobj_.QueryInterface(KAPI7.IKompasAPIObject.CLSID, pythoncom.IID_IDispatch))
+            app: KAPI7.IApplication = get_app7(iKompasObject7)
+            new_pids = get_kompas_process_ids() - pids_before
+            is_started = len(new_pids) == 1 and not app.Visible
+            if is_started:
+                self._started_applications[id(app)] = app
+
+        if not is_started:
+            raise Exception("Не удалось запустить отдельный экземпляр Компаса: получен уже запущенный экземпляр")
+        app.HideMessage = 1  # ksHideMessageYes
+        return app
+
+    def quit_application(self, app: KAPI7.IApplication) -> None:
+        """ Закрывает экземпляр, только если он запущен `create_application` в отдельном процессе. """
+        with self._applications_lock:
+            is_started = self._started_applications.pop(id(app), None) is app
+        if is_started:
+            app.Quit()
+
+    def is_document_open(self, app: KAPI7.IApplication, filepath: str) -> bool:
+        path = os.path.normcase(os.path.abspath(filepath))
+        docs: KAPI7.IDocuments = app.Documents
+        for i in range(docs.Count):
+            doc_path: str = docs.Item(i).PathName
+            if doc_path != "" and os.path.normcase(os.path.abspath(doc_path)) == path:
+                return True
+        return False
+
+    def open_document(self, app: KAPI7.IApplication, filepath: str) -> KAPI7.IKompasDocument2D:
+        docs: KAPI7.IDocuments = app.Documents
+        doc: KAPI7.IKompasDocument = docs.Open(filepath, False, False)
+        if doc is None:
+            raise Exception(f"Cannot open document '{filepath}'")
+        doc2d: KAPI7.IKompasDocument2D = KAPI7.IKompasDocument2D(doc)
+        if get_document_type(doc2d) != DocumentTypeEnum.type_2D:
+            doc2d.Close(0)  # kdDoNotSaveChanges
+            raise Exception(f"Document '{filepath}' is not a 2D document")
+        return doc2d
+
+    def save_document(self, doc: KAPI7.IKompasDocument2D) -> None:
+        doc.Save()
+
+    def close_document(self, doc: KAPI7.IKompasDocument2D) -> None:
+        doc.Close(0)  # kdDoNotSaveChanges
+
+    def open_documents_references(self) -> set[int]:
+        docs: KAPI7.IDocuments = session.get_app7().Documents
+        return set(docs.Item(i).Reference for i in range(docs.Count))
+
+    def selection_manager(self, doc: KAPI7.IKompasDocument2D) -> KAPI7.ISelectionManager:
+        active_doc = KAPI7.IKompasDocument2D1(doc)
+        return active_doc.SelectionManager
+
+    def drawing_object_type(self, obj: KAPI7.IKompasAPIObject) -> int:
+        cls = type(obj)
+        code = _class_type_codes.get(cls)
+        if code is None:
+            try:
+                code = obj.DrawingObjectType
+            except AttributeError:
+                try:
+                    code = KAPI7.IDrawingObject(obj).DrawingObjectType
+                except Exception as e:
+                    code = UNKNOWN_TYPE_CODE
+            if code != UNKNOWN_TYPE_CODE and any(cls is dimension_class for dimension_class, kind in get_dimension_class_kinds()):
+                _class_type_codes[cls] = code
+        return code
+
+    def dimension_kind(self, obj: KAPI7.IKompasAPIObject) -> int:
+        for cls, kind in get_dimension_class_kinds():
+            if isinstance(obj, cls):
+                return kind
+        return DimensionKind.NotDimension
+
+    def dimension_text(self, d: KAPI7.IDrawingObject) -> KAPI7.IDimensionText:
+        if self.use_dispatch_accessors:
+            return dispatch_accessors.query_interface(d, KAPI7.IDimensionText, KAPI7)
+        return KAPI7.IDimensionText(d)
+
+    def dimension_params(self, d: KAPI7.IDrawingObject) -> KAPI7.IDimensionParams:
+        if self.use_dispatch_accessors:
+            return dispatch_accessors.query_interface(d, KAPI7.IDimensionParams, KAPI7)
+        return KAPI7.IDimensionParams(d)
+
+    def dimension_interfaces(self, d: KAPI7.IDrawingObject) -> tuple[KAPI7.IDimensionText, KAPI7.IDimensionParams]:
+        if self.use_dispatch_accessors:
+            return dispatch_accessors.query_interfaces(d, (KAPI7.IDimensionText, KAPI7.IDimensionParams), KAPI7)
+        return (KAPI7.IDimensionText(d), KAPI7.IDimensionParams(d))
+
+    def symbols_container(self, v: KAPI7.IView) -> KAPI7.ISymbols2DContainer:
+        return KAPI7.ISymbols2DContainer(v)
+
+    def set_task_access(self, is_enabled: bool) -> None:
+        iKompasObject5, iKompasObject7 = session.get_kompas_objects()
+        iKompasObject5.ksEnableTaskAccess(int(is_enabled))
+
+    def refresh_document_window(self, doc: KAPI7.IKompasDocument2D) -> int:
+        frames: KAPI7.IDocumentFrames = doc.DocumentFrames
+        if frames.Count == 0:
+            return 2
+        frame: KAPI7.IDocumentFrame = frames.Item(0)
+        frame.RefreshWindow()
+        return 4
+
+    def connection_info(self) -> str:
+        return str(session)
+
+    def subscribe_selection_changes(self, callback) -> SelectionSubscription:
+        try:
+            return SelectionSubscription(callback)
+        except Exception as e:
+            print(f"Selection events are not available: {e.__class__.__name__}: {str(e)}")
+            return None
+
+    def initialize_thread(self) -> None:
+        pythoncom.CoInitialize()
+
+    def uninitialize_thread(self) -> None:
+        pythoncom.CoUninitialize()
+
+    def marshal_document(self, doc: KAPI7.IKompasDocument2D) -> object:
+        return pythoncom.CoMarshalInterThreadInterfaceInStream(pythoncom.IID_IDispatch, doc._oleobj_)
+
+    def unmarshal_document(self, marshalled: object) -> KAPI7.IKompasDocument2D:
+        oleobj = pythoncom.CoGetInterfaceAndReleaseStream(marshalled, pythoncom.IID_IDispatch)
+        return KAPI7.IKompasDocument2D(oleobj)
+
+    def release_marshalled_document(self, marshalled: object) -> None:
+        # распаковка в вызывающем потоке освобождает и поток, и упакованные данные
+        pythoncom.CoGetInterfaceAndReleaseStream(marshalled, pythoncom.IID_IDispatch)
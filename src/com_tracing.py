@@ -0,0 +1,184 @@
+"""
+    Трассировка обращений к API Компаса.
+
+    При включении (`enable()`, или переменная окружения `ROMASHKI_TRACE_COM=1`
+    при запуске программы) текущий бэкенд оборачивается в `TracingBackend`,
+    а все возвращаемые им объекты - в `TracingProxy`. Каждое чтение и запись
+    свойства и каждый вызов метода записываются с именем интерфейса, членом,
+    местом вызова и затраченным временем.
+"""
+
+import inspect
+import os
+import sys
+import threading
+import time
+
+import src.backend as backend_module
+from src.backend import KompasBackend
+from src.dispatch_accessors import get_interface_name
+
+
+TRACE_ENV_VARIABLE = "ROMASHKI_TRACE_COM"
+
+PRIMITIVE_TYPES = (int, float, str, bool, bytes)
+
+
+class ComTracer:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            # (интерфейс, член, вид обращения) -> [количество, время]
+            self.members: dict[tuple[str, str, str], list] = {}
+            # место вызова -> [количество, время]
+            self.call_sites: dict[str, list] = {}
+            self.dimension_ids: set[int] = set()
+            self.calls_count: int = 0
+            self.total_time: float = 0.0
+
+    def record(self, interface: str, member: str, kind: str, elapsed_time: float, call_site: str) -> None:
+        with self._lock:
+            self.calls_count += 1
+            self.total_time += elapsed_time
+            stat = self.members.setdefault((interface, member, kind), [0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed_time
+            stat = self.call_sites.setdefault(call_site, [0, 0.0])
+            stat[0] += 1
+            stat[1] += elapsed_time
+
+    def add_dimension(self, d: object) -> None:
+        with self._lock:
+            self.dimension_ids.add(id(d))
+
+    def summary(self, top_count: int = 10) -> str:
+        with self._lock:
+            dims_count = len(self.dimension_ids)
+            lines = [
+                f"COM trace: {self.calls_count} calls, {self.total_time * 1000:.1f} ms in COM, " \
+                    f"{dims_count} dimensions" \
+                    + (f", {self.calls_count / dims_count:.2f} calls per dimension" if dims_count > 0 else ""),
+                f"Top {top_count} members by time:",
+            ]
+            members = sorted(self.members.items(), key=lambda item: item[1][1], reverse=True)
+            for (interface, member, kind), (count, elapsed_time) in members[:top_count]:
+                lines.append(f"  {elapsed_time * 1000:9.2f} ms {count:8}  {kind:4} {interface}.{member}")
+            lines.append(f"Top {top_count} call sites by time:")
+            call_sites = sorted(self.call_sites.items(), key=lambda item: item[1][1], reverse=True)
+            for call_site, (count, elapsed_time) in call_sites[:top_count]:
+                lines.append(f"  {elapsed_time * 1000:9.2f} ms {count:8}  {call_site}")
+        return "\n".join(lines)
+
+
+def get_call_site(depth: int) -> str:
+    frame = sys._getframe(depth + 1)
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+
+def wrap(value, tracer: ComTracer):
+    if value is None or isinstance(value, PRIMITIVE_TYPES) or isinstance(value, TracingProxy):
+        return value
+    if isinstance(value, (tuple, list)):
+        return type(value)(wrap(el, tracer) for el in value)
+    return TracingProxy(value, tracer)
+
+
+def unwrap(value):
+    if isinstance(value, TracingProxy):
+        return object.__getattribute__(value, "_obj")
+    if isinstance(value, (tuple, list)):
+        return type(value)(unwrap(el) for el in value)
+    return value
+
+
+class TracingProxy:
+    """ Прозрачная обёртка объекта API, записывающая все обращения к нему. """
+    __slots__ = ("_obj", "_tracer")
+
+    def __init__(self, obj: object, tracer: ComTracer) -> None:
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_tracer", tracer)
+
+    def __getattr__(self, name: str):
+        obj = object.__getattribute__(self, "_obj")
+        if name.startswith("_"):
+            return getattr(obj, name)
+
+        tracer: ComTracer = object.__getattribute__(self, "_tracer")
+        interface = get_interface_name(obj)
+        t0 = time.perf_counter()
+        value = getattr(obj, name)
+        elapsed_time = time.perf_counter() - t0
+
+        if inspect.ismethod(value) or inspect.isbuiltin(value) or inspect.isfunction(value):
+            method = value
+
+            def traced_method(*args, **kwargs):
+                t0 = time.perf_counter()
+                result = method(*unwrap(args), **{k: unwrap(v) for k, v in kwargs.items()})
+                tracer.record(interface, name, "call", time.perf_counter() - t0, get_call_site(1))
+                return wrap(result, tracer)
+            return traced_method
+
+        tracer.record(interface, name, "get", elapsed_time, get_call_site(1))
+        return wrap(value, tracer)
+
+    def __setattr__(self, name: str, value) -> None:
+        obj = object.__getattribute__(self, "_obj")
+        tracer: ComTracer = object.__getattribute__(self, "_tracer")
+        t0 = time.perf_counter()
+        setattr(obj, name, unwrap(value))
+        tracer.record(get_interface_name(obj), name, "set", time.perf_counter() - t0, get_call_site(1))
+
+    def __repr__(self) -> str:
+        return f"<TracingProxy {object.__getattribute__(self, '_obj')!r}>"
+
+
+class TracingBackend(KompasBackend):
+    """ Бэкенд-обёртка: записывает вызовы методов бэкенда и оборачивает возвращаемые объекты. """
+    def __init__(self, inner: KompasBackend, tracer: ComTracer) -> None:
+        self._inner = inner
+        self._tracer = tracer
+
+    def __getattribute__(self, name: str):
+        if name.startswith("_"):
+            return object.__getattribute__(self, name)
+
+        inner: KompasBackend = object.__getattribute__(self, "_inner")
+        tracer: ComTracer = object.__getattribute__(self, "_tracer")
+        attr = getattr(inner, name)
+        if not callable(attr):
+            return attr
+
+        def traced(*args, **kwargs):
+            args = unwrap(args)
+            if name in ("dimension_text", "dimension_params", "dimension_interfaces"):
+                tracer.add_dimension(args[0])
+            t0 = time.perf_counter()
+            result = attr(*args, **{k: unwrap(v) for k, v in kwargs.items()})
+            tracer.record(get_interface_name(inner), name, "call", time.perf_counter() - t0, get_call_site(1))
+            return wrap(result, tracer)
+        return traced
+
+
+_tracer: ComTracer = None
+
+
+def get_tracer() -> ComTracer:
+    """ Возвращает трассировщик, если трассировка включена, иначе `None`. """
+    return _tracer
+
+
+def enable() -> ComTracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = ComTracer()
+        backend_module.set_backend(TracingBackend(backend_module.get_backend(), _tracer))
+    return _tracer
+
+
+def is_enabled_by_environment() -> bool:
+    return os.getenv(TRACE_ENV_VARIABLE, "") not in ("", "0")
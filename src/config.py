@@ -1,55 +1,144 @@
+"""
+    Настройки программы.
+
+    Файл настроек читается при первом обращении к `options` (или к `save`,
+    `request_save`, `flush`), а не при импорте модуля. Значения проверяются
+    по таблице `SCHEMA`: неверное или отсутствующее значение заменяется
+    значением по умолчанию.
+"""
+
+import functools
+import typing
+
 from src import config_reader
 
 
 PROGRAM_NAME = "RomashkiDimensions"
-APP_CONFIG_FOLDER = config_reader.get_user_config_folder(PROGRAM_NAME)
 
 
+@functools.lru_cache(maxsize=1)
+def get_config_folder() -> str:
+    return config_reader.get_user_config_folder(PROGRAM_NAME)
+
+
+### CONFIG SCHEMA
+
+def is_bool(value) -> bool:
+    return isinstance(value, bool)
+
+
+def is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_window_geometry(value) -> bool:
+    return isinstance(value, list) and len(value) == 4 and all(is_int(el) and el > 0 for el in value)
+
+
+class Option:
+    def __init__(self, default, validator: typing.Callable[[typing.Any], bool]) -> None:
+        self.default = default
+        self.validator = validator
+
+    def get_default(self):
+        # списки копируются, чтобы изменения настроек не меняли значение по умолчанию
+        return self.default.copy() if isinstance(self.default, list) else self.default
+
+
+# имя настройки -> значение по умолчанию и проверка значения
+SCHEMA: dict[str, Option] = {
+    "window_stays_on_top": Option(True, is_bool),
+    "icon_size": Option(24, is_int),
+    "is_angle_DMS": Option(True, is_bool),
+    "remember_window_geometry": Option(False, is_bool),
+    "window_geometry": Option([0, 0, 0, 0], is_window_geometry),
+}
+
+
+def get_default_config() -> dict:
+    return {name: option.get_default() for name, option in SCHEMA.items()}
+
+
+def validate(cfg: dict) -> list[str]:
+    """ Заменяет неверные значения `cfg` значениями по умолчанию. Возвращает имена заменённых настроек. """
+    replaced: list[str] = []
+    for name, option in SCHEMA.items():
+        if not name in cfg or not option.validator(cfg[name]):
+            cfg[name] = option.get_default()
+            replaced.append(name)
+    return replaced
+
+
+### CONFIG LOADING
+
+class Options:
+    """
+        Настройки программы. Доступны как атрибуты (`options.icon_size`)
+        и по имени (`options["icon_size"]`); файл читается при первом обращении.
+    """
+    window_stays_on_top: bool
+    icon_size: int
+    is_angle_DMS: bool
+    remember_window_geometry: bool
+    window_geometry: list[int]
+
+    def __init__(self) -> None:
+        object.__setattr__(self, "_cr", None)
+
+    def get_config_reader(self) -> config_reader.ConfigReader:
+        if self._cr is None:
+            cr = config_reader.ConfigReader.load_or_create_default_config_in_configfolder(
+                get_config_folder(),
+                get_default_config()
+            )
+            cr._verbose_saving = True
+            validate(cr._cfg)
+            object.__setattr__(self, "_cr", cr)
+        return self._cr
+
+    def is_loaded(self) -> bool:
+        return not self._cr is None
+
+    def __getitem__(self, name: str):
+        return self.get_config_reader()._cfg[name]
+
+    def __setitem__(self, name: str, value) -> None:
+        if not name in SCHEMA:
+            raise Exception(f"Unknown config option '{name}'")
+        # значение проверяется при следующем чтении файла (например, положение
+        # окна может быть отрицательным и тогда не восстанавливается)
+        self.get_config_reader()._cfg[name] = value
+
+    def __getattr__(self, name: str):
+        if not name in SCHEMA:
+            raise AttributeError(name)
+        return self[name]
 
-cr = config_reader.ConfigReader.load_or_create_default_config_in_configfolder(
-    APP_CONFIG_FOLDER,
-    {
-        # see default options below in CONFIG CHECK section
-    }
-)
-cr._verbose_saving = True
+    def __setattr__(self, name: str, value) -> None:
+        self[name] = value
 
-save = cr.save
-options = cr._cfg
+    def __repr__(self) -> str:
+        if not self.is_loaded():
+            return "Options(<not loaded>)"
+        return f"Options({self._cr._cfg!r})"
 
-print(options)
 
+options = Options()
 
-### CONFIG CHECK
 
-def check():
-    try:
-        assert isinstance(cr._cfg["window_stays_on_top"], bool)
-    except:
-        cr._cfg["window_stays_on_top"] = True
+def save() -> bool:
+    return options.get_config_reader().save()
 
-    try:
-        assert isinstance(cr._cfg["icon_size"], int)
-    except:
-        cr._cfg["icon_size"] = 24
 
-    try:
-        assert isinstance(cr._cfg["is_angle_DMS"], bool)
-    except:
-        cr._cfg["is_angle_DMS"] = True
+def request_save() -> None:
+    options.get_config_reader().request_save()
 
-    try:
-        assert isinstance(cr._cfg["remember_window_geometry"], bool)
-    except:
-        cr._cfg["remember_window_geometry"] = False
 
-    try:
-        assert isinstance(cr._cfg["window_geometry"], list)
-        assert len(cr._cfg["window_geometry"]) == 4
-        for el in cr._cfg["window_geometry"]:
-            assert isinstance(el, int) and el > 0
-    except:
-        cr._cfg["window_geometry"] = [0, 0, 0, 0]
+def flush() -> bool:
+    return options.get_config_reader().flush()
 
-check()
 
+def get_saving_stats() -> str:
+    if not options.is_loaded():
+        return "Config: not loaded"
+    return options.get_config_reader().get_saving_stats()
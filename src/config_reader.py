@@ -65,6 +65,15 @@ class ConfigReader():
         self._cfg: dict = self._default_config.copy()
         self._verbose_saving = False
 
+        # содержимое файла на момент последней записи или чтения
+        self._saved_text: str = None
+        self._is_save_requested: bool = False
+
+        self.save_requests_count: int = 0
+        self.flushes_count: int = 0
+        self.writes_count: int = 0
+        self.unchanged_saves_count: int = 0
+
     @staticmethod
     def load_or_create_default_config_in_configfolder(config_foler_path: str, default_config: dict = {}) -> 'ConfigReader':
         app_config_file = os.path.join(config_foler_path, "cfg.json")
@@ -97,20 +106,55 @@ class ConfigReader():
         self._cfg = cr._cfg.copy()
         self._default_config = cr._default_config.copy()
 
-    def save(self, config: dict = None) -> None:
+    def save(self, config: dict = None) -> bool:
+        """
+            Записывает конфигурацию, если её содержимое изменилось с последней
+            записи. Запись атомарная: во временный файл и затем переименование.
+            Возвращает `True`, если файл был записан.
+        """
         if self._filepath == "":
             raise Exception('Config filename is not specified')
 
-        ensure_file(self._filepath)
-        with open(self._filepath, "w", encoding="utf-8") as f:
-            json.dump(
-                self._cfg if config is None else config,
-                f,
-                ensure_ascii=False,
-                indent=2
-            )
+        self._is_save_requested = False
+        text = json.dumps(
+            self._cfg if config is None else config,
+            ensure_ascii=False,
+            indent=2
+        )
+        if text == self._saved_text:
+            self.unchanged_saves_count += 1
+            return False
+
+        ensure_folder(os.path.dirname(self._filepath))
+        temp_filepath = self._filepath + ".tmp"
+        with open(temp_filepath, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filepath, self._filepath)
+
+        self._saved_text = text
+        self.writes_count += 1
         if self._verbose_saving:
             print("Config saved.")
+        return True
+
+    def request_save(self) -> None:
+        """ Отмечает, что конфигурацию нужно сохранить; запись выполнится при `flush()`. """
+        self.save_requests_count += 1
+        self._is_save_requested = True
+
+    def flush(self) -> bool:
+        """ Сохраняет конфигурацию, если после последнего сохранения был вызван `request_save()`. """
+        if not self._is_save_requested:
+            return False
+        self.flushes_count += 1
+        return self.save()
+
+    def get_saving_stats(self) -> str:
+        coalesced = self.save_requests_count - self.flushes_count
+        return f"Config: {self.save_requests_count} save requests, {coalesced} coalesced, " \
+            f"{self.writes_count} writes, {self.unchanged_saves_count} skipped as unchanged"
 
     def save_default(self) -> None:
         self.save(self._default_config)
@@ -120,7 +164,9 @@ class ConfigReader():
             self.save_default()
         try:
             with open(self._filepath, "r", encoding="utf-8") as f:
-                self._cfg.update(json.load(f))
+                loaded = json.load(f)
+            self._cfg.update(loaded)
+            self._saved_text = json.dumps(loaded, ensure_ascii=False, indent=2)
         except Exception as e:
             print(e.__class__.__name__, ": ", str(e), sep="")
             print("Using the default config.")
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import threading
+import time
+import typing
+
+from src.backend import get_backend
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+class BatchStats:
+    """ Результат применения пакета изменений размеров. """
+    def __init__(self) -> None:
+        self.dimensions_count: int = 0
+        self.writes_count: int = 0
+        self.avoided_writes_count: int = 0
+        self.com_calls_count: int = 0
+        self.elapsed_time: float = 0.0
+        self.is_cancelled: bool = False
+
+    def __str__(self) -> str:
+        return f"Batch: {self.dimensions_count} dimensions, " \
+            f"{self.writes_count} writes ({self.avoided_writes_count} avoided), " \
+            f"{self.com_calls_count} COM calls, " \
+            f"{self.elapsed_time * 1000:.1f} ms" \
+            + (" - CANCELLED" if self.is_cancelled else "")
+
+
+# количество размеров, после записи которых сообщается о ходе выполнения и проверяется отмена
+DEFAULT_CHUNK_SIZE = 50
+
+
+class BatchProgress:
+    """
+        Ход выполнения длительной операции над размерами.
+
+        Операция обрабатывает размеры частями по `chunk_size` и после каждой
+        части вызывает `report`. Если после этого `is_cancelled()` возвращает
+        `True`, операция прекращается; уже обработанные размеры остаются
+        изменёнными полностью.
+    """
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.chunk_size = chunk_size
+        self._cancel_event = threading.Event()
+
+    def report(self, done_count: int, total_count: int) -> None:
+        pass
+
+    def cancel(self) -> None:
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+
+_thread_state = threading.local()
+
+
+def get_progress() -> BatchProgress:
+    """ Возвращает ход выполнения операции, запущенной в текущем потоке (или `None`). """
+    return getattr(_thread_state, "progress", None)
+
+
+def set_progress(progress: BatchProgress) -> None:
+    _thread_state.progress = progress
+
+
+def is_cancelled() -> bool:
+    """ Проверяет, отменена ли операция, запущенная в текущем потоке. """
+    progress = get_progress()
+    return not progress is None and progress.is_cancelled()
+
+
+def iterate_chunks(items: list, progress: BatchProgress = None, chunk_size: int = None):
+    """
+        Делит `items` на части по `chunk_size` (по умолчанию `progress.chunk_size`),
+        сообщая о ходе выполнения после каждой части. Прекращается при отмене.
+    """
+    if progress is None:
+        progress = get_progress()
+    if progress is None:
+        if len(items) > 0:
+            yield items
+        return
+    if chunk_size is None:
+        chunk_size = progress.chunk_size
+    total_count = len(items)
+    for start in range(0, total_count, chunk_size):
+        if progress.is_cancelled():
+            return
+        yield items[start:start + chunk_size]
+        progress.report(min(start + chunk_size, total_count), total_count)
+
+
+class DimensionBatch:
+    """
+        Накапливает записи свойств размеров и применяет их за один проход.
+
+        На время применения доступ пользователя к Компасу блокируется
+        (перерисовка окна не запускается на каждом `Update()`), а по
+        окончании окно документа перерисовывается один раз. Для документов,
+        открытых без окна (`is_interactive = False`), это не требуется.
+
+        Если в потоке задан ход выполнения (`set_progress`), размеры
+        записываются частями, и между частями применение можно отменить.
+    """
+    def __init__(self, doc: KAPI7.IKompasDocument2D, is_interactive: bool = True) -> None:
+        self._doc = doc
+        self._is_interactive = is_interactive
+        self._pending: list[tuple[KAPI7.IDrawingObject, list[tuple[object, str, object]]]] = []
+
+    def add(self, d: KAPI7.IDrawingObject, *writes: tuple[object, str, object]) -> None:
+        """
+            Ставит в очередь записи `(target, attribute, value)` для размера `d`.
+            Атрибут может быть составным (`"NominalText.Str"`), тогда
+            промежуточные объекты получаются только в момент записи.
+            Размер будет обновлен (`d.Update()`) ровно один раз при `commit()`.
+        """
+        if len(writes) == 0:
+            return
+        if len(self._pending) > 0 and self._pending[-1][0] is d:
+            self._pending[-1][1].extend(writes)
+        else:
+            self._pending.append((d, list(writes)))
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def commit(self) -> BatchStats:
+        stats = BatchStats()
+        t0 = time.perf_counter()
+
+        if len(self._pending) > 0:
+            backend = get_backend()
+            if self._is_interactive:
+                backend.set_task_access(False)
+                stats.com_calls_count += 1
+            try:
+                for chunk in iterate_chunks(self._pending):
+                    for d, writes in chunk:
+                        for target, attr, value in writes:
+                            *path, attr = attr.split(".")
+                            for name in path:
+                                target = getattr(target, name)
+                            setattr(target, attr, value)
+                            stats.com_calls_count += len(path) + 1
+                        d.Update()
+                        stats.dimensions_count += 1
+                        stats.writes_count += len(writes)
+                        stats.com_calls_count += 1
+                stats.is_cancelled = stats.dimensions_count < len(self._pending)
+            finally:
+                if self._is_interactive:
+                    backend.set_task_access(True)
+                    stats.com_calls_count += 1
+                    stats.com_calls_count += backend.refresh_document_window(self._doc)
+
+        self._pending.clear()
+        stats.elapsed_time = time.perf_counter() - t0
+        return stats
@@ -0,0 +1,175 @@
+from __future__ import annotations
+from array import array
+import time
+import typing
+
+from src.backend import get_backend
+from src.dimension_batch import iterate_chunks
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+
+# (коллекция в ISymbols2DContainer, метод получения элемента коллекции)
+DIMENSION_COLLECTIONS = (
+    ("LineDimensions", "LineDimension"),
+    ("RadialDimensions", "RadialDimension"),
+    ("AngleDimensions", "AngleDimension"),
+    ("ArcDimensions", "ArcDimension"),
+    ("BreakLineDimensions", "BreakLineDimension"),
+    ("BreakRadialDimensions", "BreakRadialDimension"),
+    ("DiametralDimensions", "DiametralDimension"),
+    ("HeightDimensions", "HeightDimension"),
+)
+
+
+def get_views(doc: KAPI7.IKompasDocument2D) -> KAPI7.IViews:
+    vlm: KAPI7.IViewsAndLayersManager = doc.ViewsAndLayersManager
+    return vlm.Views
+
+
+def get_view_collections(v: KAPI7.IView) -> list:
+    """ Возвращает коллекции размеров вида в порядке `DIMENSION_COLLECTIONS`. """
+    sc: KAPI7.ISymbols2DContainer = get_backend().symbols_container(v)
+    return [getattr(sc, collection_name) for collection_name, item_name in DIMENSION_COLLECTIONS]
+
+
+def iterate_collections_dimensions(collections: list):
+    """ Перебирает пары `(тип размера, размер)`, где тип - индекс в `DIMENSION_COLLECTIONS`. """
+    for type_, collection in enumerate(collections):
+        get_item = getattr(collection, DIMENSION_COLLECTIONS[type_][1])
+        for j in range(collection.Count):
+            yield (type_, get_item(j))
+
+
+def iterate_view_dimensions(v: KAPI7.IView):
+    yield from iterate_collections_dimensions(get_view_collections(v))
+
+
+class ViewRecord:
+    """ Размеры одного вида, хранящиеся по столбцам. """
+    def __init__(self, signature: tuple[int, ...]) -> None:
+        self.signature: tuple[int, ...] = signature
+        self.dims: list[KAPI7.IDrawingObject] = []
+        self.types = array("b")
+        self.autos = array("B")
+
+
+class DimensionIndex:
+    """
+        Индекс всех размеров документа: вид, тип и флаг автоопределения
+        значения каждого размера. Это кэш объектов размеров, а не их свойств:
+        номинальные значения и тексты операции считывают сами.
+
+        При обновлении (`refresh()`) каждый вид сверяется по сигнатуре -
+        количеству размеров в каждой коллекции вида. Если она изменилась, вид
+        пересканируется. Если нет, сохранённые объекты размеров используются
+        только как подсказка: флаг автоопределения каждого из них считывается
+        заново, так как его могли изменить вручную в Компасе (или отменить
+        изменение). Если объект уже недействителен
+        (размер удалён, а на его место добавлен другой), вид пересканируется.
+
+        Виды обновляются по одному (`iterate_chunks`), и между ними обновление
+        можно отменить; необновлённые виды будут сверены при следующем обновлении.
+    """
+    def __init__(self) -> None:
+        self._views: list[ViewRecord] = []
+        self.last_refresh_time: float = 0.0
+        self.last_rescanned_views_count: int = 0
+
+    def invalidate(self) -> None:
+        self._views.clear()
+
+    def refresh(self, doc: KAPI7.IKompasDocument2D) -> int:
+        """ Обновляет индекс и возвращает количество пересканированных видов. """
+        t0 = time.perf_counter()
+        rescanned = 0
+        backend = get_backend()
+
+        vs: KAPI7.IViews = get_views(doc)
+        views_count = vs.Count
+        del self._views[views_count:]
+
+        for chunk in iterate_chunks(range(views_count), chunk_size=1):
+            for i in chunk:
+                v: KAPI7.IView = vs.View(i)
+                collections = get_view_collections(v)
+                signature = tuple(collection.Count for collection in collections)
+
+                if i < len(self._views) and self._views[i].signature == signature \
+                        and self._reread(self._views[i]):
+                    continue
+
+                record = ViewRecord(signature)
+                for type_, d in iterate_collections_dimensions(collections):
+                    dt: KAPI7.IDimensionText = backend.dimension_text(d)
+                    record.dims.append(d)
+                    record.types.append(type_)
+                    record.autos.append(int(bool(dt.AutoNominalValue)))
+
+                if i < len(self._views):
+                    self._views[i] = record
+                else:
+                    self._views.append(record)
+                rescanned += 1
+
+        self.last_rescanned_views_count = rescanned
+        self.last_refresh_time = time.perf_counter() - t0
+        return rescanned
+
+    def _reread(self, record: ViewRecord) -> bool:
+        """ Считывает заново флаг автоопределения сохранённых размеров вида. Возвращает `False`, если какой-то размер недействителен. """
+        backend = get_backend()
+        try:
+            for j, d in enumerate(record.dims):
+                dt: KAPI7.IDimensionText = backend.dimension_text(d)
+                record.autos[j] = int(bool(dt.AutoNominalValue))
+        except Exception as e:
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return sum(len(record.dims) for record in self._views)
+
+    def iterate(self):
+        """ Перебирает кортежи `(индекс вида, тип, автоопределение, размер)`. """
+        for view_i, record in enumerate(self._views):
+            for j in range(len(record.dims)):
+                yield (view_i, record.types[j], bool(record.autos[j]), record.dims[j])
+
+    def get_manual_dimensions(self) -> list[KAPI7.IDrawingObject]:
+        """ Возвращает размеры со снятым флажком "Автоопределение значения размера". """
+        dims: list[KAPI7.IDrawingObject] = []
+        for record in self._views:
+            for j in range(len(record.dims)):
+                if not record.autos[j]:
+                    dims.append(record.dims[j])
+        return dims
+
+
+_indices: dict[int, DimensionIndex] = {}
+
+
+def get_document_index(doc: KAPI7.IKompasDocument2D) -> DimensionIndex:
+    """ Возвращает индекс размеров документа, создавая его при первом обращении. """
+    key: int = doc.Reference
+    if not key in _indices:
+        prune_document_indices()
+        _indices[key] = DimensionIndex()
+    return _indices[key]
+
+
+def prune_document_indices() -> None:
+    """ Удаляет индексы закрытых документов. """
+    references = get_backend().open_documents_references()
+    if references is None:
+        return
+    for key in [key for key in _indices if not key in references]:
+        del _indices[key]
+
+
+def invalidate_document_index(doc: KAPI7.IKompasDocument2D) -> None:
+    key: int = doc.Reference
+    if key in _indices:
+        _indices[key].invalidate()
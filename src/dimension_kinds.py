@@ -0,0 +1,145 @@
+"""
+    Классификация объектов чертежа по целочисленному коду типа.
+
+    Код типа (`IDrawingObject.DrawingObjectType`, `ksDrawingObjectTypeEnum`)
+    считывается один раз на объект, после чего вид размера берётся из
+    таблицы. Объекты, не являющиеся размерами, отбрасываются одним поиском
+    в словаре. Код, которого нет в таблице, классифицируется по интерфейсу
+    один раз.
+"""
+
+from __future__ import annotations
+import typing
+
+from src.backend import get_backend
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+class DimensionKind(int):
+    NotDimension = 0  # не размер
+    Line = 1  # линейный
+    Angle = 2  # угловой
+    Radial = 3  # радиальный
+    Diametral = 4  # диаметральный
+    Arc = 5  # размер дуги
+    Height = 6  # размер высоты
+    BreakLine = 7  # линейный с обрывом
+    BreakAngle = 8  # угловой с обрывом
+    BreakRadial = 9  # радиальный с изломом
+
+
+ANGLE_KINDS = frozenset((DimensionKind.Angle, DimensionKind.BreakAngle))
+
+
+# код, возвращаемый бэкендом, если код типа объекта не удалось считать
+UNKNOWN_TYPE_CODE = 0
+
+# известные коды ksDrawingObjectTypeEnum -> вид размера; объекты с остальными
+# кодами (например, размер высоты) классифицируются по интерфейсу при первой
+# встрече (см. `TypeCodeTable.classify`)
+KNOWN_TYPE_CODES: dict[int, int] = {
+    1: DimensionKind.NotDimension,  # ksDrLineSeg
+    2: DimensionKind.NotDimension,  # ksDrCircle
+    3: DimensionKind.NotDimension,  # ksDrArc
+    4: DimensionKind.NotDimension,  # ksDrDrawText
+    5: DimensionKind.NotDimension,  # ksDrPoint
+    7: DimensionKind.NotDimension,  # ksDrHatch
+    8: DimensionKind.NotDimension,  # ksDrBezier
+    9: DimensionKind.Line,  # ksDrLDimension
+    10: DimensionKind.Angle,  # ksDrADimension
+    13: DimensionKind.Diametral,  # ksDrDDimension
+    14: DimensionKind.Radial,  # ksDrRDimension
+    15: DimensionKind.BreakRadial,  # ksDrRBreakDimension
+    16: DimensionKind.NotDimension,  # ksDrRough
+    17: DimensionKind.NotDimension,  # ksDrBase
+    18: DimensionKind.NotDimension,  # ksDrWPointer
+    19: DimensionKind.NotDimension,  # ksDrCut
+    20: DimensionKind.NotDimension,  # ksDrLeader
+    21: DimensionKind.NotDimension,  # ksDrPosLeader
+    22: DimensionKind.NotDimension,  # ksDrBrandLeader
+    23: DimensionKind.NotDimension,  # ksDrMarkerLeader
+    24: DimensionKind.NotDimension,  # ksDrChangeLeader
+    25: DimensionKind.NotDimension,  # ksDrTolerance
+    26: DimensionKind.NotDimension,  # ksDrTable
+    27: DimensionKind.NotDimension,  # ksDrContour
+    28: DimensionKind.NotDimension,  # ksDrMacro
+    29: DimensionKind.NotDimension,  # ksDrLine
+    31: DimensionKind.NotDimension,  # ksDrFragment
+    32: DimensionKind.NotDimension,  # ksDrPolyline
+    33: DimensionKind.NotDimension,  # ksDrEllipse
+    34: DimensionKind.NotDimension,  # ksDrNurbs
+    35: DimensionKind.NotDimension,  # ksDrEllipseArc
+    36: DimensionKind.NotDimension,  # ksDrRectangle
+    37: DimensionKind.NotDimension,  # ksDrRegularPolygon
+    38: DimensionKind.NotDimension,  # ksDrEquid
+    39: DimensionKind.BreakLine,  # ksDrLBreakDimension
+    40: DimensionKind.BreakAngle,  # ksDrABreakDimension
+    41: DimensionKind.NotDimension,  # ksDrOrdinatedDimension (не поддерживается)
+    42: DimensionKind.NotDimension,  # ksDrColorFill
+    43: DimensionKind.NotDimension,  # ksDrCentreMarker
+    44: DimensionKind.Arc,  # ksDrArcDimension
+    45: DimensionKind.NotDimension,  # ksDrRaster
+}
+
+
+class TypeCodeTable:
+    """
+        Таблица "код типа объекта -> вид размера".
+
+        Код, которого нет в таблице, классифицируется бэкендом по интерфейсу
+        (`KompasBackend.dimension_kind`) один раз, и результат запоминается.
+        Исключение - `UNKNOWN_TYPE_CODE` (код не удалось считать): под ним
+        могут оказаться объекты разных видов, поэтому такие объекты
+        классифицируются по интерфейсу при каждом обращении.
+    """
+    def __init__(self) -> None:
+        self.kinds: dict[int, int] = dict(KNOWN_TYPE_CODES)
+        self.learned_codes_count: int = 0
+        self.unknown_code_objects_count: int = 0
+
+    def classify(self, obj: KAPI7.IKompasAPIObject) -> int:
+        backend = get_backend()
+        code: int = backend.drawing_object_type(obj)
+        kind = self.kinds.get(code)
+        if kind is None:
+            kind = backend.dimension_kind(obj)
+            if code == UNKNOWN_TYPE_CODE:
+                self.unknown_code_objects_count += 1
+            else:
+                self.kinds[code] = kind
+                self.learned_codes_count += 1
+        return kind
+
+
+_table: TypeCodeTable = None
+
+
+def get_type_code_table() -> TypeCodeTable:
+    global _table
+    if _table is None:
+        _table = TypeCodeTable()
+    return _table
+
+
+def classify(obj: KAPI7.IKompasAPIObject) -> int:
+    """ Возвращает вид размера объекта (`DimensionKind.NotDimension`, если это не размер). """
+    return get_type_code_table().classify(obj)
+
+
+def split_dimensions(objs: typing.Iterable[KAPI7.IKompasAPIObject]) -> tuple[list[KAPI7.IDrawingObject], list[int]]:
+    """ Отбирает из `objs` размеры. Возвращает (размеры, их виды). """
+    table = get_type_code_table()
+    dims: list[KAPI7.IDrawingObject] = []
+    kinds: list[int] = []
+    for obj in objs:
+        kind = table.classify(obj)
+        if kind != DimensionKind.NotDimension:
+            dims.append(obj)
+            kinds.append(kind)
+    return (dims, kinds)
+
+
+def is_angle_kind(kind: int) -> bool:
+    return kind in ANGLE_KINDS
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import typing
+
+from src.dimension_batch import DimensionBatch, BatchStats
+from src.dimension_snapshot import DimensionSnapshot
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+class DimensionPlan:
+    """
+        План изменений набора размеров, построенный по снимку без обращения
+        к Компасу.
+
+        Каждая запись `(target, attribute, old, new)` попадает в план только
+        если новое значение отличается от текущего (или запись обязательна,
+        `force=True`), остальные учитываются в `avoided_writes_count`.
+    """
+    def __init__(self, snapshot: DimensionSnapshot) -> None:
+        self.snapshot: DimensionSnapshot = snapshot
+        self.changes: list[tuple[int, list[tuple[object, str, object, object]]]] = []
+        self.writes_count: int = 0
+        self.avoided_writes_count: int = 0
+
+    def add(self, i: int, target: object, attribute: str, old: object, new: object, force: bool = False) -> None:
+        """ Добавляет в план запись свойства `attribute` у `target` для `i`-того размера снимка. """
+        if not force and old == new:
+            self.avoided_writes_count += 1
+            return
+        self.writes_count += 1
+        if len(self.changes) > 0 and self.changes[-1][0] == i:
+            self.changes[-1][1].append((target, attribute, old, new))
+        else:
+            self.changes.append((i, [(target, attribute, old, new)]))
+
+    def __len__(self) -> int:
+        """ Количество размеров, которые будут изменены. """
+        return len(self.changes)
+
+    def __str__(self) -> str:
+        return f"Plan: {len(self.changes)} of {len(self.snapshot)} dimensions to change, " \
+            f"{self.writes_count} writes, {self.avoided_writes_count} writes avoided"
+
+    def describe(self) -> list[tuple[int, str, object, object]]:
+        """ Возвращает список изменений `(номер размера, свойство, старое значение, новое значение)`. """
+        return [
+            (i, attribute, old, new)
+            for i, writes in self.changes
+            for target, attribute, old, new in writes
+        ]
+
+    def apply(self, doc: KAPI7.IKompasDocument2D, is_interactive: bool = True) -> BatchStats:
+        """ Записывает в Компас только изменившиеся свойства. """
+        batch = DimensionBatch(doc, is_interactive)
+        for i, writes in self.changes:
+            batch.add(
+                self.snapshot.dimension(i),
+                *((target, attribute, new) for target, attribute, old, new in writes)
+            )
+        stats = batch.commit()
+        stats.avoided_writes_count = self.avoided_writes_count
+        return stats
@@ -0,0 +1,151 @@
+from __future__ import annotations
+from array import array
+import typing
+
+from src.backend import get_backend
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+class SnapshotField(int):
+    """ Свойства размеров, которые считываются в снимок. Значения можно объединять через `|`. """
+    NominalValue = 0b0000001  # IDimensionText.NominalValue
+    NominalText = 0b0000010  # IDimensionText.NominalText.Str
+    Suffix = 0b0000100  # IDimensionText.Suffix.Str
+    AutoNominalValue = 0b0001000  # IDimensionText.AutoNominalValue
+    Sign = 0b0010000  # IDimensionText.Sign
+    RemoteLines = 0b0100000  # IDimensionParams.RemoteLine1, RemoteLine2
+    ArrowTypes = 0b1000000  # IDimensionParams.ArrowType1, ArrowType2
+
+    TEXT_FIELDS = NominalValue | NominalText | Suffix | AutoNominalValue | Sign
+    PARAMS_FIELDS = RemoteLines | ArrowTypes
+
+
+class DimensionFlag(int):
+    """ Биты упакованных булевых свойств размера. """
+    Angle = 0b0001
+    Auto = 0b0010
+    RemoteLine1 = 0b0100
+    RemoteLine2 = 0b1000
+
+
+class DimensionSnapshot:
+    """
+        Снимок свойств набора размеров, хранящийся по столбцам.
+
+        Каждое запрошенное свойство считывается из Компаса ровно один раз на
+        размер. Числа хранятся в `array`, булевы свойства - в одном байте
+        флагов на размер, строки - в общей таблице строк (одинаковые тексты
+        хранятся один раз).
+    """
+    def __init__(self, fields: int = 0) -> None:
+        self.fields: int = fields
+        self._backend = get_backend()
+
+        self._dims: list[KAPI7.IDrawingObject] = []
+        self._texts: list[KAPI7.IDimensionText] = []
+        self._params: list[KAPI7.IDimensionParams] = []
+
+        self._nominal_values = array("d")
+        self._flags = array("B")
+        self._signs = array("b")
+        self._arrow_types = array("b")  # по два значения на размер
+        self._nominal_text_ids = array("I")
+        self._suffix_ids = array("I")
+
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+
+    def append(self, d: KAPI7.IDrawingObject, is_angle: bool = False) -> None:
+        """ Считывает в снимок запрошенные свойства размера `d`. """
+        fields = self.fields
+        flags = DimensionFlag.Angle if is_angle else 0
+        self._dims.append(d)
+
+        # запрашиваются только нужные интерфейсы, оба - за одно обращение
+        if fields & SnapshotField.TEXT_FIELDS and fields & SnapshotField.PARAMS_FIELDS:
+            dt, dp = self._backend.dimension_interfaces(d)
+        elif fields & SnapshotField.TEXT_FIELDS:
+            dt: KAPI7.IDimensionText = self._backend.dimension_text(d)
+        elif fields & SnapshotField.PARAMS_FIELDS:
+            dp: KAPI7.IDimensionParams = self._backend.dimension_params(d)
+
+        if fields & SnapshotField.TEXT_FIELDS:
+            self._texts.append(dt)
+            if fields & SnapshotField.NominalValue:
+                self._nominal_values.append(dt.NominalValue)
+            if fields & SnapshotField.NominalText:
+                self._nominal_text_ids.append(self._intern(dt.NominalText.Str))
+            if fields & SnapshotField.Suffix:
+                self._suffix_ids.append(self._intern(dt.Suffix.Str))
+            if fields & SnapshotField.AutoNominalValue:
+                if dt.AutoNominalValue:
+                    flags |= DimensionFlag.Auto
+            if fields & SnapshotField.Sign:
+                self._signs.append(dt.Sign)
+
+        if fields & SnapshotField.PARAMS_FIELDS:
+            self._params.append(dp)
+            if fields & SnapshotField.RemoteLines:
+                if dp.RemoteLine1:
+                    flags |= DimensionFlag.RemoteLine1
+                if dp.RemoteLine2:
+                    flags |= DimensionFlag.RemoteLine2
+            if fields & SnapshotField.ArrowTypes:
+                self._arrow_types.append(dp.ArrowType1)
+                self._arrow_types.append(dp.ArrowType2)
+
+        self._flags.append(flags)
+
+    def _intern(self, s: str) -> int:
+        i = self._string_ids.get(s)
+        if i is None:
+            i = len(self._strings)
+            self._strings.append(s)
+            self._string_ids[s] = i
+        return i
+
+    def __len__(self) -> int:
+        return len(self._dims)
+
+    def dimension(self, i: int) -> KAPI7.IDrawingObject:
+        return self._dims[i]
+
+    def text(self, i: int) -> KAPI7.IDimensionText:
+        return self._texts[i]
+
+    def params(self, i: int) -> KAPI7.IDimensionParams:
+        return self._params[i]
+
+    @property
+    def nominal_values(self) -> array:
+        return self._nominal_values
+
+    def nominal_value(self, i: int) -> float:
+        return self._nominal_values[i]
+
+    def nominal_text(self, i: int) -> str:
+        return self._strings[self._nominal_text_ids[i]]
+
+    def suffix(self, i: int) -> str:
+        return self._strings[self._suffix_ids[i]]
+
+    def sign(self, i: int) -> int:
+        return self._signs[i]
+
+    def flags(self, i: int) -> int:
+        return self._flags[i]
+
+    def is_angle(self, i: int) -> bool:
+        return bool(self._flags[i] & DimensionFlag.Angle)
+
+    def is_auto(self, i: int) -> bool:
+        return bool(self._flags[i] & DimensionFlag.Auto)
+
+    def remote_lines(self, i: int) -> tuple[bool, bool]:
+        f = self._flags[i]
+        return (bool(f & DimensionFlag.RemoteLine1), bool(f & DimensionFlag.RemoteLine2))
+
+    def arrow_types(self, i: int) -> tuple[int, int]:
+        return (self._arrow_types[2 * i], self._arrow_types[2 * i + 1])
@@ -0,0 +1,253 @@
+"""
+    Доступ к свойствам интерфейсов API 7 по заранее определённым DISPID.
+
+    Обёртки, сгенерированные makepy (`KAPI7.IDimensionText(d)`), при каждом
+    чтении свойства ищут его описание в таблицах класса и проходят через
+    `_ApplyTypes_`, а при создании обёртки выполняется её инициализация.
+    Здесь DISPID каждого свойства определяется один раз на интерфейс (по
+    таблицам makepy, а если их нет - через `GetIDsOfNames`), после чего
+    свойства читаются и записываются прямым `Invoke`.
+
+    Замер стоимости чтения свойств:
+
+        python -m src.dispatch_accessors  # активный документ Компаса
+        python -m src.dispatch_accessors memory 2000 0.00005  # модель в памяти
+
+    На модели в памяти сравниваются позднее связывание (имя свойства
+    разрешается при каждом обращении) и заранее определённые DISPID.
+"""
+
+from __future__ import annotations
+import time
+import typing
+
+try:
+    import pythoncom
+    DISPATCH_TYPE = pythoncom.TypeIIDs[pythoncom.IID_IDispatch]
+except ImportError:
+    # без pywin32 доступен только замер на модели в памяти
+    pythoncom = None
+    DISPATCH_TYPE = None
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+class InterfaceAccessor:
+    """ DISPID свойств и методов одного интерфейса. """
+    def __init__(self, interface_class: type = None, module=None) -> None:
+        self.interface_class = interface_class
+        # имя интерфейса для трассировки и отладки
+        self.interface_name: str = "IDispatch" if interface_class is None else interface_class.__name__
+        self._module = module
+        self._get_ids: dict[str, int] = {}
+        self._put_ids: dict[str, int] = {}
+        self._method_ids: dict[str, int] = {}
+        self._result_iids: dict[str, str] = {}
+        self._result_accessors: dict[str, InterfaceAccessor] = {}
+
+        if not interface_class is None:
+            # (dispid, lcid, (vt, flags), args, name, CLSID результата)
+            for name, entry in getattr(interface_class, "_prop_map_get_", {}).items():
+                self._get_ids[name] = entry[0]
+                if len(entry) > 5 and not entry[5] is None:
+                    self._result_iids[name] = entry[5]
+            # ((dispid, lcid, invkind, flags), значения по умолчанию)
+            for name, entry in getattr(interface_class, "_prop_map_put_", {}).items():
+                self._put_ids[name] = entry[0][0]
+
+    def _dispid(self, oleobj, name: str, ids: dict[str, int]) -> int:
+        dispid = ids.get(name)
+        if dispid is None:
+            dispid = oleobj.GetIDsOfNames(name)
+            ids[name] = dispid
+        return dispid
+
+    def _result_accessor(self, name: str) -> InterfaceAccessor:
+        accessor = self._result_accessors.get(name)
+        if accessor is None:
+            interface_class = None
+            iid = self._result_iids.get(name)
+            if not iid is None and not self._module is None:
+                interface_class = getattr(self._module, "CLSIDToClassMap", {}).get(iid)
+            accessor = get_accessor(interface_class, self._module)
+            self._result_accessors[name] = accessor
+        return accessor
+
+    def get(self, oleobj, name: str):
+        if not name in self._get_ids and self._is_method(oleobj, name):
+            dispid = self._method_ids[name]
+            return lambda *args: self._wrap_result(name, oleobj.Invoke(dispid, 0, pythoncom.DISPATCH_METHOD, True, *args))
+        value = oleobj.Invoke(self._dispid(oleobj, name, self._get_ids), 0, pythoncom.DISPATCH_PROPERTYGET, True)
+        return self._wrap_result(name, value)
+
+    def put(self, oleobj, name: str, value) -> None:
+        if isinstance(value, FastDispatch):
+            value = value._oleobj_
+        oleobj.Invoke(self._dispid(oleobj, name, self._put_ids), 0, pythoncom.DISPATCH_PROPERTYPUT, False, value)
+
+    def _is_method(self, oleobj, name: str) -> bool:
+        if name in self._method_ids:
+            return True
+        if self.interface_class is None:
+            return False
+        method = getattr(self.interface_class, name, None)
+        if not callable(method):
+            return False
+        self._method_ids[name] = oleobj.GetIDsOfNames(name)
+        return True
+
+    def _wrap_result(self, name: str, value):
+        if isinstance(value, DISPATCH_TYPE):
+            return FastDispatch(value, self._result_accessor(name))
+        return value
+
+
+class FastDispatch:
+    """
+        Обёртка интерфейса, читающая и записывающая свойства через `InterfaceAccessor`.
+        Атрибут `_oleobj_` позволяет передавать её туда же, куда и обёртки makepy.
+    """
+    __slots__ = ("_oleobj_", "_accessor")
+
+    def __init__(self, oleobj, accessor: InterfaceAccessor) -> None:
+        object.__setattr__(self, "_oleobj_", oleobj)
+        object.__setattr__(self, "_accessor", accessor)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._accessor.get(self._oleobj_, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        self._accessor.put(self._oleobj_, name, value)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FastDispatch) and self._oleobj_ == other._oleobj_
+
+    def __hash__(self) -> int:
+        return hash(self._oleobj_)
+
+    def __repr__(self) -> str:
+        return f"<FastDispatch {self._accessor.interface_name}>"
+
+
+def get_interface_name(obj) -> str:
+    """ Имя интерфейса объекта: у `FastDispatch` - интерфейса его `InterfaceAccessor`, иначе - имя класса обёртки. """
+    if isinstance(obj, FastDispatch):
+        return obj._accessor.interface_name
+    return type(obj).__name__
+
+
+_accessors: dict[type, InterfaceAccessor] = {}
+
+
+def get_accessor(interface_class: type = None, module=None) -> InterfaceAccessor:
+    """ Возвращает общий для всех объектов `InterfaceAccessor` интерфейса. """
+    accessor = _accessors.get(interface_class)
+    if accessor is None:
+        accessor = InterfaceAccessor(interface_class, module)
+        _accessors[interface_class] = accessor
+    return accessor
+
+
+def query_interface(obj, interface_class: type, module=None) -> FastDispatch:
+    """ Аналог `interface_class(obj)`: запрашивает интерфейс и возвращает `FastDispatch`. """
+    oleobj = obj._oleobj_.QueryInterface(interface_class.CLSID, pythoncom.IID_IDispatch)
+    return FastDispatch(oleobj, get_accessor(interface_class, module))
+
+
+def query_interfaces(obj, interface_classes: tuple[type, ...], module=None) -> tuple[FastDispatch, ...]:
+    """
+        `query_interface` для нескольких интерфейсов одного объекта. COM требует
+        отдельного `QueryInterface` на каждый интерфейс, но `_oleobj_` объекта
+        получается один раз.
+    """
+    oleobj = obj._oleobj_
+    return tuple(
+        FastDispatch(oleobj.QueryInterface(interface_class.CLSID, pythoncom.IID_IDispatch), get_accessor(interface_class, module))
+        for interface_class in interface_classes
+    )
+
+
+# (интерфейс, свойство) - свойства, которые операции читают у каждого размера
+HOT_PROPERTIES = (
+    ("text", "NominalValue"),
+    ("text", "AutoNominalValue"),
+    ("text", "Sign"),
+    ("text", "NominalText.Str"),
+    ("text", "Suffix.Str"),
+    ("params", "RemoteLine1"),
+    ("params", "ArrowType1"),
+)
+
+
+def benchmark_properties(ds: list[KAPI7.IDrawingObject], repeat: int = 3) -> dict[str, float]:
+    """
+        Замеряет для текущего бэкенда время получения интерфейсов и чтения
+        каждого свойства из `HOT_PROPERTIES`. Возвращает лучшее время в
+        секундах на один размер.
+    """
+    from src.backend import get_backend
+    backend = get_backend()
+    times: dict[str, float] = {}
+
+    def measure(name: str, function) -> None:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - t0)
+        times[name] = best / max(1, len(ds))
+
+    measure("query text", lambda: [backend.dimension_text(d) for d in ds])
+    measure("query params", lambda: [backend.dimension_params(d) for d in ds])
+    measure("query both", lambda: [backend.dimension_interfaces(d) for d in ds])
+
+    interfaces = {
+        "text": [backend.dimension_text(d) for d in ds],
+        "params": [backend.dimension_params(d) for d in ds],
+    }
+    for interface, path in HOT_PROPERTIES:
+        names = path.split(".")
+
+        def read(objs=interfaces[interface], names=names):
+            for obj in objs:
+                for name in names:
+                    obj = getattr(obj, name)
+
+        measure(path, read)
+    return times
+
+
+
+if __name__ == "__main__":
+    import sys
+
+    import src.backend as backend_module
+    import src.round_dimensions as round_dimensions
+
+    if len(sys.argv) > 1 and sys.argv[1] == "memory":
+        from src import memory_backend
+        dimensions_count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0
+        variants = [
+            ("late-bound", memory_backend.MemoryBackend(latency, use_dispatch_accessors=False)),
+            ("dispid", memory_backend.MemoryBackend(latency, use_dispatch_accessors=True)),
+        ]
+        for name, backend in variants:
+            memory_backend.create_random_document(backend, 10, dimensions_count // 10)
+    else:
+        from src.com_backend import ComBackend
+        variants = [("makepy", ComBackend(use_dispatch_accessors=False)), ("dispid", ComBackend(use_dispatch_accessors=True))]
+
+    results: list[dict[str, float]] = []
+    for name, backend in variants:
+        backend_module.set_backend(backend)
+        ds = round_dimensions.get_document_dimensions(backend.open_doc2d(""))
+        results.append(benchmark_properties(ds))
+
+    print(f"{len(ds)} dimensions, us per dimension")
+    print(f"{'':>18}" + "".join(f"{name:>10}" for name, backend in variants))
+    for key in results[0]:
+        print(f"{key:>18}" + "".join(f"{r[key] * 1e6:10.2f}" for r in results))
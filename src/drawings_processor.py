@@ -0,0 +1,264 @@
+"""
+    Пакетная обработка размеров в папке чертежей без участия пользователя.
+
+    Файлы распределяются между несколькими невидимыми экземплярами Компаса:
+    каждый экземпляр работает в своём потоке и берёт следующий файл из общей
+    очереди, как только закончит предыдущий, поэтому все экземпляры заняты до
+    конца обработки.
+
+    Пример:
+
+        python -m src.drawings_processor "D:/project/*.cdw" --operation round --multiple 0.5 --workers 3
+"""
+
+import glob
+import os
+import queue
+import threading
+import time
+
+from src.backend import get_backend
+import src.round_dimensions as round_dimensions
+from src.dimension_snapshot import SnapshotField
+
+
+DRAWING_EXTENSIONS = (".cdw", ".frw")
+
+DEFAULT_WORKERS_COUNT = 2
+
+
+class ProcessingOptions:
+    """ Параметры операции, применяемой ко всем размерам каждого документа. """
+    def __init__(self,
+            operation: str = "round",
+            multiple: float = 1.0,
+            middle_coef: float = 0.5,
+            is_angle_DMS: bool = True,
+            sign: int = round_dimensions.DimensionSign.Nothing,
+            dry_run: bool = False,
+            series: str = "R40",
+            ) -> None:
+        self.operation = operation
+        self.multiple = multiple
+        self.middle_coef = middle_coef
+        self.is_angle_DMS = is_angle_DMS
+        self.sign = sign
+        self.dry_run = dry_run
+        self.series = series
+
+
+# операция: (считываемые свойства, построение плана по снимку)
+OPERATIONS = {
+    "round": (
+        SnapshotField.NominalValue | SnapshotField.NominalText | SnapshotField.AutoNominalValue,
+        lambda snapshot, o: round_dimensions.plan_rounding(snapshot, o.multiple, o.middle_coef, o.is_angle_DMS),
+    ),
+    "series": (
+        SnapshotField.NominalValue | SnapshotField.NominalText | SnapshotField.AutoNominalValue,
+        lambda snapshot, o: round_dimensions.plan_series_rounding(snapshot, o.series, o.middle_coef),
+    ),
+    "remove_rounding": (
+        SnapshotField.AutoNominalValue,
+        lambda snapshot, o: round_dimensions.plan_remove_rounding(snapshot),
+    ),
+    "add_star": (
+        SnapshotField.Suffix,
+        lambda snapshot, o: round_dimensions.plan_set_star(snapshot, True),
+    ),
+    "remove_star": (
+        SnapshotField.Suffix,
+        lambda snapshot, o: round_dimensions.plan_set_star(snapshot, False),
+    ),
+    "sign": (
+        SnapshotField.Sign,
+        lambda snapshot, o: round_dimensions.plan_sign(snapshot, o.sign),
+    ),
+}
+
+
+class FileResult:
+    def __init__(self, filepath: str) -> None:
+        self.filepath: str = filepath
+        self.worker: int = -1
+        self.is_success: bool = False
+        self.error: str = ""
+        self.dimensions_count: int = 0
+        self.writes_count: int = 0
+        self.avoided_writes_count: int = 0
+        self.open_time: float = 0.0
+        self.process_time: float = 0.0
+        self.save_time: float = 0.0
+        self.total_time: float = 0.0
+
+
+def find_drawings(path: str) -> list[str]:
+    """ Возвращает чертежи и фрагменты по пути к папке (рекурсивно) или по шаблону `glob`. """
+    if os.path.isdir(path):
+        pattern = os.path.join(path, "**", "*")
+    else:
+        pattern = path
+    return sorted(
+        os.path.abspath(p)
+        for p in glob.glob(pattern, recursive=True)
+        if os.path.isfile(p) and p.lower().endswith(DRAWING_EXTENSIONS)
+    )
+
+
+def process_document(doc, options: ProcessingOptions, result: FileResult) -> None:
+    fields, make_plan = OPERATIONS[options.operation]
+    ds = round_dimensions.get_document_dimensions(doc)
+    snapshot = round_dimensions.snapshot_dimensions(ds, fields)
+    plan = make_plan(snapshot, options)
+
+    result.dimensions_count = len(snapshot)
+    result.writes_count = plan.writes_count
+    result.avoided_writes_count = plan.avoided_writes_count
+    if not options.dry_run:
+        plan.apply(doc, is_interactive=False)
+
+
+def process_file(app, filepath: str, options: ProcessingOptions, result: FileResult) -> None:
+    backend = get_backend()
+    t0 = time.perf_counter()
+    # документ, открытый до обработки, не сохраняется и не закрывается
+    if backend.is_document_open(app, filepath):
+        raise Exception(f"Document '{filepath}' is already open")
+    doc = backend.open_document(app, filepath)
+    t1 = time.perf_counter()
+    try:
+        process_document(doc, options, result)
+        t2 = time.perf_counter()
+        if not options.dry_run and result.writes_count > 0:
+            backend.save_document(doc)
+        t3 = time.perf_counter()
+    finally:
+        backend.close_document(doc)
+    result.open_time = t1 - t0
+    result.process_time = t2 - t1
+    result.save_time = t3 - t2
+
+
+def _worker(k: int, files: queue.Queue, options: ProcessingOptions, results: dict[str, FileResult], errors: list[str]) -> None:
+    backend = get_backend()
+    backend.initialize_thread()
+    app = None
+    try:
+        app = backend.create_application()
+        while True:
+            try:
+                filepath = files.get_nowait()
+            except queue.Empty:
+                break
+            result = results[filepath]
+            result.worker = k
+            t0 = time.perf_counter()
+            try:
+                process_file(app, filepath, options, result)
+                result.is_success = True
+            except Exception as e:
+                result.error = f"{e.__class__.__name__}: {str(e)}"
+            result.total_time = time.perf_counter() - t0
+    except Exception as e:
+        errors.append(f"Worker {k} failed: {e.__class__.__name__}: {str(e)}")
+    finally:
+        if not app is None:
+            backend.quit_application(app)
+        backend.uninitialize_thread()
+
+
+def process_files(filepaths: list[str], options: ProcessingOptions, workers_count: int = DEFAULT_WORKERS_COUNT) -> list[FileResult]:
+    """ Обрабатывает файлы пулом из `workers_count` экземпляров Компаса. Результаты - в порядке `filepaths`. """
+    if not options.operation in OPERATIONS:
+        raise Exception(f"Unknown operation '{options.operation}'")
+
+    if len(filepaths) == 0:
+        return []
+
+    files = queue.Queue()
+    results: dict[str, FileResult] = {}
+    for filepath in filepaths:
+        files.put(filepath)
+        results[filepath] = FileResult(filepath)
+
+    errors: list[str] = []
+    threads: list[threading.Thread] = []
+    for k in range(max(1, min(workers_count, len(filepaths)))):
+        t = threading.Thread(target=_worker, args=(k, files, options, results, errors), daemon=True)
+        threads.append(t)
+        t.start()
+
+    for t in threads:
+        t.join()
+
+    # файлы, которые не взял ни один экземпляр (например, ни один не запустился)
+    for result in results.values():
+        if result.worker == -1:
+            result.error = "Not processed. " + "; ".join(errors)
+
+    return [results[filepath] for filepath in filepaths]
+
+
+def print_summary(results: list[FileResult], elapsed_time: float) -> None:
+    for r in results:
+        status = "OK" if r.is_success else "ERROR"
+        print(f"[{status:>5}] #{r.worker} {r.total_time:7.2f} s " \
+            f"(open {r.open_time:.2f}, process {r.process_time:.2f}, save {r.save_time:.2f}) " \
+            f"{r.dimensions_count:5} dims, {r.writes_count:5} writes  {r.filepath}")
+        if not r.is_success:
+            print(f"        {r.error}")
+
+    succeeded = sum(1 for r in results if r.is_success)
+    busy_time = sum(r.total_time for r in results)
+    print(f"Files: {len(results)}, succeeded: {succeeded}, failed: {len(results) - succeeded}")
+    print(f"Dimensions: {sum(r.dimensions_count for r in results)}, " \
+        f"writes: {sum(r.writes_count for r in results)}, " \
+        f"avoided writes: {sum(r.avoided_writes_count for r in results)}")
+    print(f"Elapsed: {elapsed_time:.2f} s, sum of file times: {busy_time:.2f} s")
+
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import src.backend as backend_module
+    import src.preferred_numbers as preferred_numbers
+
+    parser = argparse.ArgumentParser(description="Пакетная обработка размеров в чертежах Компас-3D")
+    parser.add_argument("path", nargs="?", default="", help="папка или шаблон пути к файлам .cdw/.frw")
+    parser.add_argument("--operation", default="round", choices=list(OPERATIONS.keys()))
+    parser.add_argument("--multiple", type=float, default=1.0, help="кратность округления")
+    parser.add_argument("--mode", default="closest", choices=["closest", "down", "up"], help="направление округления")
+    parser.add_argument("--series", default="R40", choices=list(preferred_numbers.SERIES.keys()), help="ряд предпочтительных чисел для --operation series")
+    parser.add_argument("--decimal-angles", action="store_true", help="округлять углы в десятичных градусах")
+    parser.add_argument("--sign", type=int, default=0, help="знак перед размером (0 - нет, 1 - диаметр, 2 - квадрат, 3 - радиус, 4 - резьба)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS_COUNT, help="количество экземпляров Компаса")
+    parser.add_argument("--dry-run", action="store_true", help="ничего не записывать, только посчитать изменения")
+    parser.add_argument("--memory", type=int, default=0, metavar="N", help="обработать N сгенерированных документов в памяти вместо Компаса")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка вызова API в секундах для --memory")
+    args = parser.parse_args()
+
+    options = ProcessingOptions(
+        operation=args.operation,
+        multiple=args.multiple,
+        middle_coef={"closest": 0.5, "down": 0, "up": 1}[args.mode],
+        is_angle_DMS=not args.decimal_angles,
+        sign=args.sign,
+        dry_run=args.dry_run,
+        series=args.series,
+    )
+
+    if args.memory > 0:
+        from src import memory_backend
+        backend = memory_backend.MemoryBackend(args.latency)
+        backend_module.set_backend(backend)
+        filepaths = []
+        for i in range(args.memory):
+            filepath = f"memory/drawing_{i}.cdw"
+            backend.files[filepath] = memory_backend.create_random_document(backend, 5, 100, path=filepath, seed=i)
+            filepaths.append(filepath)
+    else:
+        filepaths = find_drawings(args.path)
+
+    t0 = time.perf_counter()
+    results = process_files(filepaths, options, args.workers)
+    print_summary(results, time.perf_counter() - t0)
@@ -1,39 +1,25 @@
 from PyQt5 import QtCore, QtGui, QtWidgets
 import os
+import time
 import traceback
 
 import src.round_dimensions as round_dimensions
-import src.math_utils as math_utils
+import src.preferred_numbers as preferred_numbers
+from src.operation_worker import OperationWorker
+from src.backend import get_backend
+from src.selection_cache import get_selection_cache, SelectionValues
+from src.rounding_preview import RoundingPreview
+from src.icon_cache import IconCache
 
 from src.resources import get_resource_path
 
 from src import config
 
 
-SPINBOX_VALUES = [10/12, 1.0, 10/6, 2.0, 2.5, 100/24, 5.0, 100/12, 10.0]
-SPINBOX_ERROR = 0.02
-
-
 def get_next_value(x: float, is_previous: bool) -> float:
-    c10: int = math_utils.count_10(x)
-    x /= 10 ** c10
-    l_SBV = len(SPINBOX_VALUES)
-    i = 0
-
-    if not is_previous:
-        x *= (1 + SPINBOX_ERROR)
-        for i in range(0, l_SBV):
-            v = SPINBOX_VALUES[i]
-            if v > x:
-                break
-    else:
-        x *= (1 - SPINBOX_ERROR)
-        for i in range(l_SBV - 1, -1, -1):
-            v = SPINBOX_VALUES[i]
-            if v < x:
-                break
-    nv = SPINBOX_VALUES[i] * 10 ** c10
-    return nv
+    if is_previous:
+        return preferred_numbers.MULTIPLE_LADDER.previous(x)
+    return preferred_numbers.MULTIPLE_LADDER.next(x)
 
 
 
@@ -133,136 +119,191 @@ class ConfigWindow(QtWidgets.QWidget):
         self.icon_size_changed.emit(size)
 
 
+# задержка предварительного чтения выделенных размеров после изменения выделения, мс
+PREFETCH_DELAY = 300
+
+
 class MainWindow(QtWidgets.QWidget):
+    selection_changed = QtCore.pyqtSignal()
+    first_painted = QtCore.pyqtSignal(float)  # время первой отрисовки окна, `time.perf_counter()`
+
     def __init__(self, parent = None) -> None:
         super().__init__(parent)
 
+        self.icon_cache = IconCache(os.path.join(config.get_config_folder(), "icons"))
+        self._icon_buttons: list[tuple[QtWidgets.QPushButton, str]] = []
+        self._is_painted: bool = False
+
         self._config_saving_timer: int = 0
         self._window_moving_timer: int = 0
+        self._prefetch_timer: int = 0
+        self._selection_subscription = None
+        self._preview: RoundingPreview = None
+        # события выделения могут приходить из других потоков
+        self.selection_changed.connect(self._selection_changed)
 
         self.setWindowFlag(QtCore.Qt.WindowType.WindowMaximizeButtonHint, False)
         self.resize(10, 10)
 
         self.config_window = ConfigWindow(self)
         self.config_window.icon_size_changed.connect(self.resize_icons)
-        self.config_window.config_changed.connect(lambda: config.save())
+        self.config_window.config_changed.connect(self.save_config_delayed)
+        self.config_window.config_changed.connect(self._update_preview)
         self.config_window.window_stays_on_top_changed.connect(self.set_stays_on_top)
 
         self.fiw_multiple = FloatInputWidget()
         self.fiw_multiple.setToolTip("Кратность округления")
         self.fiw_multiple.setSizePolicy(QtWidgets.QSizePolicy.Policy.MinimumExpanding, QtWidgets.QSizePolicy.Policy.MinimumExpanding)
+        self.fiw_multiple.textChanged.connect(self._update_preview)
 
-        self.btn_round_closest = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/middle.svg")), "")
+        self.lbl_preview = QtWidgets.QLabel()
+        self.lbl_preview.setToolTip("Предпросмотр округления выделенных размеров: текущий текст и тексты после округления вниз, до ближайшего и вверх")
+        self.lbl_preview.setTextInteractionFlags(QtCore.Qt.TextInteractionFlag.TextSelectableByMouse)
+        self.lbl_preview.setVisible(False)
+
+        self.btn_round_closest = self._create_icon_button("img/middle.svg")
         self.btn_round_closest.setToolTip("Округлить до ближайшего")
         self.btn_round_closest.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.round_selected_dimensions(self.fiw_multiple.value(), 0.5, config.options["is_angle_DMS"])
+                round_dimensions.round_selected_dimensions, self.fiw_multiple.value(), 0.5, config.options["is_angle_DMS"]
             )
         )
 
-        self.btn_round_down = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/down.svg")), "")
+        self.btn_round_down = self._create_icon_button("img/down.svg")
         self.btn_round_down.setToolTip("Округлить вниз")
         self.btn_round_down.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.round_selected_dimensions(self.fiw_multiple.value(), 0, config.options["is_angle_DMS"])
+                round_dimensions.round_selected_dimensions, self.fiw_multiple.value(), 0, config.options["is_angle_DMS"]
             )
         )
 
-        self.btn_round_up = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/up.svg")), "")
+        self.btn_round_up = self._create_icon_button("img/up.svg")
         self.btn_round_up.setToolTip("Округлить вверх")
         self.btn_round_up.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.round_selected_dimensions(self.fiw_multiple.value(), 1, config.options["is_angle_DMS"])
+                round_dimensions.round_selected_dimensions, self.fiw_multiple.value(), 1, config.options["is_angle_DMS"]
             )
         )
 
-        self.btn_no_round = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/no_round.svg")), "")
+        self.cb_series = QtWidgets.QComboBox()
+        self.cb_series.addItems(list(preferred_numbers.SERIES.keys()))
+        self.cb_series.setCurrentText("R40")
+        self.cb_series.setToolTip("Ряд предпочтительных чисел (ГОСТ 8032, ряды E)")
+
+        self.btn_round_series = QtWidgets.QPushButton("Ряд")
+        self.btn_round_series.setToolTip("Округлить до ближайшего числа из ряда предпочтительных чисел")
+        self.btn_round_series.clicked.connect(
+            lambda: self.execute(
+                round_dimensions.round_selected_dimensions_to_series, self.cb_series.currentText(), 0.5
+            )
+        )
+
+        self.btn_no_round = self._create_icon_button("img/no_round.svg")
         self.btn_no_round.setToolTip("Вернуть неокругленное значение")
         self.btn_no_round.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.remove_rounding_in_selected_dimensions()
+                round_dimensions.remove_rounding_in_selected_dimensions
             )
         )
 
 
-        self.btn_select_rounded = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/select_rounded.svg")), "")
+        self.btn_select_rounded = self._create_icon_button("img/select_rounded.svg")
         self.btn_select_rounded.setToolTip("Выбрать размеры с ручным вводом (округленные)")
         self.btn_select_rounded.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.select_rounded_dimensions()
+                round_dimensions.select_rounded_dimensions
             )
         )
 
 
-        self.btn_toggle_star = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/star.svg")), "")
+        self.btn_toggle_star = self._create_icon_button("img/star.svg")
         self.btn_toggle_star.setToolTip("Добавить/убрать звездочку")
         self.btn_toggle_star.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.toggle_star_in_selected_dimensions()
+                round_dimensions.toggle_star_in_selected_dimensions
             )
         )
 
 
-        self.btn_sign_nothing = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/nothing.svg")), "")
+        self.btn_sign_nothing = self._create_icon_button("img/nothing.svg")
         self.btn_sign_nothing.setToolTip("Убрать знак перед размером")
         self.btn_sign_nothing.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.set_sign_in_selected_dimensions(round_dimensions.DimensionSign.Nothing)
+                round_dimensions.set_sign_in_selected_dimensions, round_dimensions.DimensionSign.Nothing
             )
         )
 
-        self.btn_sign_diameter = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/diameter.svg")), "")
+        self.btn_sign_diameter = self._create_icon_button("img/diameter.svg")
         self.btn_sign_diameter.setToolTip("Установить знак диаметра")
         self.btn_sign_diameter.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.set_sign_in_selected_dimensions(round_dimensions.DimensionSign.Diameter)
+                round_dimensions.set_sign_in_selected_dimensions, round_dimensions.DimensionSign.Diameter
             )
         )
 
-        self.btn_sign_square = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/square.svg")), "")
+        self.btn_sign_square = self._create_icon_button("img/square.svg")
         self.btn_sign_square.setToolTip("Установить знак квадрата")
         self.btn_sign_square.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.set_sign_in_selected_dimensions(round_dimensions.DimensionSign.Square)
+                round_dimensions.set_sign_in_selected_dimensions, round_dimensions.DimensionSign.Square
             )
         )
 
-        self.btn_sign_radius = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/radius.svg")), "")
+        self.btn_sign_radius = self._create_icon_button("img/radius.svg")
         self.btn_sign_radius.setToolTip("Установить знак радиуса")
         self.btn_sign_radius.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.set_sign_in_selected_dimensions(round_dimensions.DimensionSign.Radius)
+                round_dimensions.set_sign_in_selected_dimensions, round_dimensions.DimensionSign.Radius
             )
         )
 
-        self.btn_sign_metric = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/metric.svg")), "")
+        self.btn_sign_metric = self._create_icon_button("img/metric.svg")
         self.btn_sign_metric.setToolTip("Установить знак метрической резьбы")
         self.btn_sign_metric.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.set_sign_in_selected_dimensions(round_dimensions.DimensionSign.MetricThread)
+                round_dimensions.set_sign_in_selected_dimensions, round_dimensions.DimensionSign.MetricThread
             )
         )
 
-        self.btn_switch_remote_lines = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/remote_lines.svg")), "")
+        self.btn_switch_remote_lines = self._create_icon_button("img/remote_lines.svg")
         self.btn_switch_remote_lines.setToolTip("Переключить отображение выносных линий")
         self.btn_switch_remote_lines.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.switch_remote_lines_in_selected_dimensions()
+                round_dimensions.switch_remote_lines_in_selected_dimensions
             )
         )
 
-        self.btn_switch_arrows = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/arrows.svg")), "")
+        self.btn_switch_arrows = self._create_icon_button("img/arrows.svg")
         self.btn_switch_arrows.setToolTip("Переключить виды стрелок")
         self.btn_switch_arrows.clicked.connect(
             lambda: self.execute(
-                lambda: round_dimensions.switch_arrows_in_selected_dimensions()
+                round_dimensions.switch_arrows_in_selected_dimensions
             )
         )
 
-        self.btn_settings = QtWidgets.QPushButton(QtGui.QIcon(get_resource_path("img/settings.svg")), "")
+        self.btn_settings = self._create_icon_button("img/settings.svg")
         self.btn_settings.setToolTip("Перейти в настройки")
         self.btn_settings.clicked.connect(self._show_settings)
 
+        self.pb_progress = QtWidgets.QProgressBar()
+        self.pb_progress.setToolTip("Ход выполнения операции")
+        self.pb_progress.setRange(0, 1)
+        self.pb_progress.setValue(0)
+        self.pb_progress.setTextVisible(False)
+
+        self.btn_cancel = QtWidgets.QPushButton("Отмена")
+        self.btn_cancel.setToolTip("Прервать выполнение операции (уже изменённые размеры останутся изменёнными)")
+        self.btn_cancel.setEnabled(False)
+
+        self.worker = OperationWorker(self)
+        self.worker.progress_changed.connect(self._progress_changed)
+        self.worker.job_started.connect(self._job_started)
+        self.worker.job_finished.connect(self._job_finished)
+        self.worker.job_failed.connect(self._job_failed)
+        self.worker.became_idle.connect(self._worker_became_idle)
+        self.worker.background_job_finished.connect(self._background_job_finished)
+        self.btn_cancel.clicked.connect(self.worker.cancel)
+
 
         self.layout_ = QtWidgets.QGridLayout()
         self.layout_.setContentsMargins(2, 2, 2, 2)
@@ -283,50 +324,77 @@ class MainWindow(QtWidgets.QWidget):
         self.layout_.addWidget(self.btn_switch_remote_lines, 1, 6, 1, 1)
         self.layout_.addWidget(self.btn_switch_arrows, 1, 7, 1, 1)
         self.layout_.addWidget(self.btn_settings, 1, 8, 1, 1)
+
+        self.layout_.addWidget(self.cb_series, 2, 0, 1, 4)
+        self.layout_.addWidget(self.btn_round_series, 2, 4, 1, 1)
+        self.layout_.addWidget(self.pb_progress, 2, 5, 1, 3)
+        self.layout_.addWidget(self.btn_cancel, 2, 8, 1, 1)
+        self.layout_.addWidget(self.lbl_preview, 3, 0, 1, 9)
         self.setLayout(self.layout_)
 
         self.resize_icons(config.options["icon_size"])
         self.set_stays_on_top(config.options["window_stays_on_top"])
 
 
-    def execute(self, func) -> None:
-        QtWidgets.qApp.setOverrideCursor(QtCore.Qt.CursorShape.WaitCursor)
-        try:
-            func()
-        except Exception as e:
-            QtWidgets.qApp.restoreOverrideCursor()
-            self.show_error(e=e)
-        QtWidgets.qApp.restoreOverrideCursor()
+    def execute(self, func, *args) -> None:
+        """
+            Ставит операцию `func(*args)` в очередь рабочего потока. Аргументы
+            вычисляются здесь, в потоке окна, так как виджеты нельзя читать из другого потока.
+        """
+        self.worker.submit(func, *args)
+
+    def _job_started(self) -> None:
+        self.setCursor(QtCore.Qt.CursorShape.BusyCursor)
+        self.pb_progress.setRange(0, 0)
+        self.btn_cancel.setEnabled(True)
+
+    def _progress_changed(self, done_count: int, total_count: int) -> None:
+        self.pb_progress.setRange(0, max(total_count, 1))
+        self.pb_progress.setValue(done_count)
 
+    def _job_finished(self, result: object) -> None:
+        # операция могла изменить выделенные размеры
+        self.prefetch_selection_delayed()
 
-    def show_error(self, text: str = "Произошла ошибка", e: Exception = None) -> None:
+    def _job_failed(self, e: Exception, traceback_text: str) -> None:
+        self.show_error(e=e, traceback_text=traceback_text)
+
+    def _worker_became_idle(self) -> None:
+        self.unsetCursor()
+        self.pb_progress.setRange(0, 1)
+        self.pb_progress.setValue(0)
+        self.btn_cancel.setEnabled(False)
+
+
+    def show_error(self, text: str = "Произошла ошибка", e: Exception = None, traceback_text: str = None) -> None:
             if e is None:
                 e_str = ""
             else:
-                e_str = f"<br>{e.__class__.__name__}: {str(e)}<br><pre>{traceback.format_exc()}</pre>"
+                if traceback_text is None:
+                    traceback_text = traceback.format_exc()
+                e_str = f"<br>{e.__class__.__name__}: {str(e)}<br><pre>{traceback_text}</pre>"
             QtWidgets.QMessageBox.critical(
                 self,
                 "Ошибка",
                 f"{text}{e_str}",
             )
 
+    def _create_icon_button(self, svg_path: str) -> QtWidgets.QPushButton:
+        """ Кнопка с иконкой; иконка нужного размера устанавливается в `resize_icons`. """
+        button = QtWidgets.QPushButton()
+        self._icon_buttons.append((button, get_resource_path(svg_path)))
+        return button
+
     def resize_icons(self, new_size: int) -> None:
         size = QtCore.QSize(new_size, new_size)
-        self.btn_round_closest.setIconSize(size)
-        self.btn_round_down.setIconSize(size)
-        self.btn_round_up.setIconSize(size)
-        self.btn_no_round.setIconSize(size)
-        self.btn_select_rounded.setIconSize(size)
-        self.btn_toggle_star.setIconSize(size)
-        self.btn_sign_nothing.setIconSize(size)
-        self.btn_sign_diameter.setIconSize(size)
-        self.btn_sign_square.setIconSize(size)
-        self.btn_sign_radius.setIconSize(size)
-        self.btn_sign_metric.setIconSize(size)
-        self.btn_switch_remote_lines.setIconSize(size)
-        self.btn_switch_arrows.setIconSize(size)
-        self.btn_settings.setIconSize(size)
+        for button, svg_path in self._icon_buttons:
+            button.setIcon(self.icon_cache.get_icon(svg_path, new_size))
+            button.setIconSize(size)
         self.fiw_multiple.setFont(QtGui.QFont("monospace", max(int(new_size * 10/24), 8)))
+        self.cb_series.setFont(QtGui.QFont("monospace", max(int(new_size * 10/24), 8)))
+        self.btn_round_series.setFont(QtGui.QFont("monospace", max(int(new_size * 10/24), 8)))
+        self.btn_cancel.setFont(QtGui.QFont("monospace", max(int(new_size * 10/24), 8)))
+        self.lbl_preview.setFont(QtGui.QFont("monospace", max(int(new_size * 8/24), 7)))
 
     def set_stays_on_top(self, state: bool) -> None:
         self.setWindowFlag(QtCore.Qt.WindowType.WindowStaysOnTopHint, state)
@@ -337,27 +405,71 @@ class MainWindow(QtWidgets.QWidget):
             x, y = self.x(), self.y()
             w, h = self.width(), self.height()
             config.options["window_geometry"] = [x, y, w, h]
-            config.save()
+            self.save_config_delayed()
+
+    def _restart_timer(self, timer_id: int, interval: int) -> int:
+        """ Перезапускает таймер: события, пришедшие до его срабатывания, объединяются в одно. """
+        if timer_id != 0:
+            self.killTimer(timer_id)
+        return self.startTimer(interval)
 
     def moveEvent(self, a0):
-        self._window_moving_timer = self.startTimer(2000)
+        self._window_moving_timer = self._restart_timer(self._window_moving_timer, 2000)
         return super().moveEvent(a0)
 
     def resizeEvent(self, a0):
-        self._window_moving_timer = self.startTimer(2000)
+        self._window_moving_timer = self._restart_timer(self._window_moving_timer, 2000)
         return super().resizeEvent(a0)
 
+    def subscribe_selection_changes(self) -> None:
+        """ Подписывается на изменения выделения, чтобы заранее считывать выделенные размеры. """
+        self._selection_subscription = get_backend().subscribe_selection_changes(self.selection_changed.emit)
+        get_selection_cache().set_enabled(not self._selection_subscription is None)
+        self.prefetch_selection_delayed()
+
+    def _selection_changed(self) -> None:
+        get_selection_cache().invalidate()
+        self._preview = None
+        self._update_preview()
+        self.prefetch_selection_delayed()
+
+    def _background_job_finished(self, result: object) -> None:
+        if isinstance(result, SelectionValues):
+            self._preview = RoundingPreview(result)
+            self._update_preview()
+
+    def _update_preview(self) -> None:
+        """ Пересчитывает предпросмотр по заранее считанным значениям, без обращения к Компасу. """
+        # при вводе кратность может быть временно нулевой ("0," на пути к "0,5")
+        if self._preview is None or self.fiw_multiple.validate() != 2:
+            self.lbl_preview.setVisible(False)
+            return
+        self.lbl_preview.setText(self._preview.format_table(self.fiw_multiple.value(), config.options["is_angle_DMS"]))
+        self.lbl_preview.setVisible(True)
+
+    def prefetch_selection_delayed(self) -> None:
+        if not self._selection_subscription is None:
+            self._prefetch_timer = self._restart_timer(self._prefetch_timer, PREFETCH_DELAY)
+
     def save_config_delayed(self) -> None:
-        self._config_saving_timer = self.startTimer(1000)
+        config.request_save()
+        self._config_saving_timer = self._restart_timer(self._config_saving_timer, 1000)
 
     def timerEvent(self, event: QtCore.QTimerEvent):
         if event.timerId() == self._config_saving_timer:
-            config.save()
             self.killTimer(self._config_saving_timer)
+            self._config_saving_timer = 0
+            config.flush()
 
         if event.timerId() == self._window_moving_timer:
-            self.remember_geometry()
             self.killTimer(self._window_moving_timer)
+            self._window_moving_timer = 0
+            self.remember_geometry()
+
+        if event.timerId() == self._prefetch_timer:
+            self.killTimer(self._prefetch_timer)
+            self._prefetch_timer = 0
+            self.worker.submit_background(get_selection_cache().prefetch)
 
         return super().timerEvent(event)
 
@@ -370,8 +482,23 @@ class MainWindow(QtWidgets.QWidget):
                     self.move(x, y)
                     self.resize(w, h)
 
+    def paintEvent(self, a0):
+        if not self._is_painted:
+            self._is_painted = True
+            self.first_painted.emit(time.perf_counter())
+        return super().paintEvent(a0)
+
     def closeEvent(self, a0):
+        if not self._selection_subscription is None:
+            self._selection_subscription.close()
+            self._selection_subscription = None
+        self.worker.stop()
+        try:
+            self.icon_cache.persist(config.options["icon_size"])
+        except Exception as e:
+            print(f"Icon cache is not saved: {e.__class__.__name__}: {str(e)}")
         config.save()
+        print(config.get_saving_stats())
         return super().closeEvent(a0)
 
     def _show_settings(self) -> None:
@@ -0,0 +1,103 @@
+"""
+    Растровые иконки кнопок, построенные из SVG один раз на размер.
+
+    `IconCache.get_icon` возвращает общую для всех кнопок иконку из
+    растрового изображения заданного размера. Изображение берётся из памяти,
+    затем из PNG-файла в папке кэша и только если его нет - строится из SVG.
+    `persist` сохраняет изображения используемого размера в PNG, чтобы при
+    следующем запуске SVG не разбирались. Имя файла содержит размер, время
+    изменения и размер файла SVG, поэтому изменённые SVG строятся заново.
+    В памяти хранятся изображения только текущего размера.
+"""
+
+import os
+import sys
+
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+
+class IconCache:
+    def __init__(self, cache_folder: str) -> None:
+        self.cache_folder = cache_folder
+        # изображения и иконки размера `_size`
+        self._size: int = None
+        self._pixmaps: dict[str, QtGui.QPixmap] = {}
+        self._icons: dict[str, QtGui.QIcon] = {}
+        self._stamps: dict[str, str] = {}
+
+        self.loaded_count: int = 0
+        self.rendered_count: int = 0
+        self.saved_count: int = 0
+
+    def _device_pixel_ratio(self) -> float:
+        return QtWidgets.qApp.devicePixelRatio() if not QtWidgets.qApp is None else 1.0
+
+    def _file_stamp(self, svg_path: str) -> str:
+        """ Время изменения и размер файла SVG (без чтения содержимого). """
+        stamp = self._stamps.get(svg_path)
+        if stamp is None:
+            # собранная программа (pyinstaller -F) распаковывает SVG при каждом запуске
+            # с новым временем изменения; они меняются только вместе с исполняемым файлом
+            st = os.stat(sys.executable if getattr(sys, "frozen", False) else svg_path)
+            stamp = f"{st.st_mtime_ns:x}-{st.st_size:x}"
+            self._stamps[svg_path] = stamp
+        return stamp
+
+    def _use_size(self, size: int) -> None:
+        """ При смене размера иконок изображения прежнего размера больше не нужны. """
+        if size != self._size:
+            self._pixmaps.clear()
+            self._icons.clear()
+            self._size = size
+
+    def get_png_path(self, svg_path: str, size: int) -> str:
+        ratio = self._device_pixel_ratio()
+        name = os.path.splitext(os.path.basename(svg_path))[0]
+        return os.path.join(self.cache_folder, f"{name}-{size}px-{ratio:g}x-{self._file_stamp(svg_path)}.png")
+
+    def get_pixmap(self, svg_path: str, size: int) -> QtGui.QPixmap:
+        self._use_size(size)
+        pixmap = self._pixmaps.get(svg_path)
+        if pixmap is None:
+            ratio = self._device_pixel_ratio()
+            pixmap = QtGui.QPixmap()
+            if pixmap.load(self.get_png_path(svg_path, size), "PNG"):
+                self.loaded_count += 1
+            else:
+                pixels = max(1, round(size * ratio))
+                pixmap = QtGui.QIcon(svg_path).pixmap(QtCore.QSize(pixels, pixels))
+                self.rendered_count += 1
+            pixmap.setDevicePixelRatio(ratio)
+            self._pixmaps[svg_path] = pixmap
+        return pixmap
+
+    def get_icon(self, svg_path: str, size: int) -> QtGui.QIcon:
+        self._use_size(size)
+        icon = self._icons.get(svg_path)
+        if icon is None:
+            icon = QtGui.QIcon(self.get_pixmap(svg_path, size))
+            self._icons[svg_path] = icon
+        return icon
+
+    def persist(self, size: int) -> None:
+        """
+            Сохраняет в PNG изображения размера `size`, которых ещё нет в папке
+            кэша, и удаляет оттуда изображения других размеров и устаревшие.
+        """
+        keep: set[str] = set()
+        pixmaps = self._pixmaps if size == self._size else {}
+        for svg_path, pixmap in pixmaps.items():
+            png_path = self.get_png_path(svg_path, size)
+            keep.add(os.path.basename(png_path))
+            if not os.path.exists(png_path):
+                os.makedirs(self.cache_folder, exist_ok=True)
+                if pixmap.save(png_path, "PNG"):
+                    self.saved_count += 1
+
+        if os.path.isdir(self.cache_folder):
+            for filename in os.listdir(self.cache_folder):
+                if filename.endswith(".png") and not filename in keep:
+                    os.remove(os.path.join(self.cache_folder, filename))
+
+    def __str__(self) -> str:
+        return f"Icons: {self.loaded_count} loaded from PNG cache, {self.rendered_count} rendered from SVG, {self.saved_count} saved"
@@ -12,22 +12,19 @@ def construct_class_dict(classes: list):
 
 
 class JSONable:
+    # пустые `__slots__`, чтобы наследники могли обходиться без `__dict__`
+    __slots__ = ()
+
     def to_json_base(self):
         return { CLASS_NAME_KEY: self.__class__.__name__ }
 
     def to_json(self) -> dict:
-        d = self.to_json_base()
-        v = vars(self).copy()
-        for key in v:
-            if not key.startswith("_"):
-                d[key] = v[key]
-        return d
+        return get_fields_encoder(type(self))(self)
 
     def from_json_base(self, d: dict):
         if CLASS_NAME_KEY in d:
             del d[CLASS_NAME_KEY]
-        for key in d:
-            vars(self)[key] = d[key]
+        get_fields_setter(type(self))(self, d)
 
     @staticmethod
     def from_json(d: dict):
@@ -35,42 +32,189 @@ class JSONable:
 
     @staticmethod
     def encode(obj):
-        if isinstance(obj, JSONable):
-            return obj.to_json()
-        raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+        return get_encoder(type(obj))(obj)
 
     @staticmethod
     def check_dict(obj):
         return isinstance(obj, dict) and CLASS_NAME_KEY in obj
 
 
-### ----- DECODERS -----
+### ----- COMPILED CLASS CODECS -----
+
+
+def get_slots(cls: type) -> tuple[str, ...]:
+    """ Имена слотов класса и его предков (без `__dict__` и `__weakref__`). """
+    slots: list[str] = []
+    for c in reversed(cls.__mro__):
+        names = c.__dict__.get("__slots__", ())
+        if isinstance(names, str):
+            names = (names, )
+        for name in names:
+            if not name in ("__dict__", "__weakref__") and not name in slots:
+                slots.append(name)
+    return tuple(slots)
+
+
+def has_instance_dict(cls: type) -> bool:
+    return any("__dict__" in c.__dict__ for c in cls.__mro__ if not c is object)
+
+
+def compile_fields_encoder(cls: type) -> 'function(JSONable) -> dict':
+    """
+        Функция, возвращающая открытые (не начинающиеся с `_`) поля объекта
+        вместе с результатом `to_json_base()` (по умолчанию - имя класса).
+    """
+    class_name = cls.__name__
+    public_slots = tuple(name for name in get_slots(cls) if not name.startswith("_"))
+    with_dict = has_instance_dict(cls)
+    # переопределённый `to_json_base` вызывается, стандартный - подставляется
+    with_base = not cls.to_json_base is JSONable.to_json_base
+
+    def encode(obj) -> dict:
+        d = obj.to_json_base() if with_base else { CLASS_NAME_KEY: class_name }
+        for key in public_slots:
+            value = getattr(obj, key, _MISSING)
+            if not value is _MISSING:
+                d[key] = value
+        if with_dict:
+            for key, value in obj.__dict__.items():
+                if key[0] != "_":
+                    d[key] = value
+        return d
+    return encode
 
 
-def decoder_classes(general: list, special: list = []):
-    class_names = construct_class_dict(general + special)
+def compile_fields_setter(cls: type) -> 'function(JSONable, dict)':
+    """ Функция, присваивающая объекту поля из словаря. """
+    slots = frozenset(get_slots(cls))
+    with_dict = has_instance_dict(cls)
 
-    def decode(obj):
-        if JSONable.check_dict(obj) \
-                and obj[CLASS_NAME_KEY] in class_names:
-            class_name = class_names[obj[CLASS_NAME_KEY]]
-            # Decoding nested objects
-            for key in obj:
-                if key == CLASS_NAME_KEY: continue
-                obj[key] = decode(obj[key])
-            # Special
-            if class_name in special:
-                return class_name.from_json(obj)
-            # General
+    if not with_dict:
+        def set_fields(obj, d: dict) -> None:
+            for key, value in d.items():
+                setattr(obj, key, value)
+        return set_fields
+
+    if len(slots) == 0:
+        def set_fields(obj, d: dict) -> None:
+            obj.__dict__.update(d)
+        return set_fields
+
+    def set_fields(obj, d: dict) -> None:
+        for key, value in d.items():
+            if key in slots:
+                setattr(obj, key, value)
             else:
-                result: JSONable = class_names[obj[CLASS_NAME_KEY]]()
-                result.from_json_base(obj)
-                return result
-        return obj
+                obj.__dict__[key] = value
+    return set_fields
+
+
+def compile_encoder(cls: type) -> 'function(object) -> dict':
+    """ Кодировщик объектов класса `cls` для параметра `default` функций `json.dump(s)`. """
+    if not issubclass(cls, JSONable):
+        def encode(obj):
+            raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+        return encode
+    if cls.to_json is JSONable.to_json:
+        return get_fields_encoder(cls)
+    return cls.to_json
 
+
+def compile_decoder(cls: type, is_special: bool) -> 'function(dict) -> object':
+    """ Декодировщик словаря с `CLASS_NAME_KEY`, равным имени класса `cls`. """
+    if is_special:
+        return cls.from_json
+    if cls.from_json_base is JSONable.from_json_base:
+        set_fields = get_fields_setter(cls)
+
+        def decode(d: dict):
+            del d[CLASS_NAME_KEY]
+            result = cls()
+            set_fields(result, d)
+            return result
+        return decode
+
+    def decode(d: dict):
+        result = cls()
+        result.from_json_base(d)
+        return result
     return decode
 
 
+_MISSING = object()
+
+_fields_encoders: dict[type, 'function'] = {}
+_fields_setters: dict[type, 'function'] = {}
+_encoders: dict[type, 'function'] = {}
+
+
+def get_fields_encoder(cls: type) -> 'function(JSONable) -> dict':
+    encode = _fields_encoders.get(cls)
+    if encode is None:
+        encode = compile_fields_encoder(cls)
+        _fields_encoders[cls] = encode
+    return encode
+
+
+def get_fields_setter(cls: type) -> 'function(JSONable, dict)':
+    set_fields = _fields_setters.get(cls)
+    if set_fields is None:
+        set_fields = compile_fields_setter(cls)
+        _fields_setters[cls] = set_fields
+    return set_fields
+
+
+def get_encoder(cls: type) -> 'function(object) -> dict':
+    encode = _encoders.get(cls)
+    if encode is None:
+        encode = compile_encoder(cls)
+        _encoders[cls] = encode
+    return encode
+
+
+class JSONCodec:
+    """
+        Кодирование и декодирование объектов `JSONable` классов `general`
+        и `special` (у последних вызывается `from_json`).
+
+        `decode` используется как `object_hook`: `json` вызывает его для
+        каждого словаря ровно один раз, начиная с вложенных, поэтому к
+        моменту декодирования объекта его поля уже декодированы.
+    """
+    def __init__(self, general: list = [], special: list = []) -> None:
+        self._decoders: dict[str, 'function(dict) -> object'] = {}
+        for cls in general:
+            self._decoders[cls.__name__] = compile_decoder(cls, False)
+        for cls in special:
+            self._decoders[cls.__name__] = compile_decoder(cls, True)
+
+    def decode(self, obj):
+        if obj.__class__ is dict:
+            class_name = obj.get(CLASS_NAME_KEY)
+            if not class_name is None:
+                decoder = self._decoders.get(class_name)
+                if not decoder is None:
+                    return decoder(obj)
+        return obj
+
+    @staticmethod
+    def encode(obj):
+        return get_encoder(type(obj))(obj)
+
+    def loads(self, text: str):
+        return json.loads(text, object_hook=self.decode)
+
+    def dumps(self, target: object, indent: int = 2) -> str:
+        return json.dumps(target, default=self.encode, ensure_ascii=False, indent=indent)
+
+
+### ----- DECODERS -----
+
+
+def decoder_classes(general: list, special: list = []):
+    return JSONCodec(general, special).decode
+
+
 def mix_decoders(*decoders: 'function(object)'):
     def decode(obj):
         old_type = type(obj)
@@ -87,7 +231,7 @@ def mix_decoders(*decoders: 'function(object)'):
 
 def save_json(path: str, target: object):
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(target, f, default=JSONable.encode, ensure_ascii=False, indent=2)
+        json.dump(target, f, default=JSONCodec.encode, ensure_ascii=False, indent=2)
 
 
 def load_json(path: str, object_hook: 'function(dict)'):
@@ -97,13 +241,16 @@ def load_json(path: str, object_hook: 'function(dict)'):
 
 
 def load_json_with_classes(path: str, general: list = [], special: list = []):
-    with open(path, "r", encoding="utf-8") as f:
-        obj = json.load(f, object_hook=decoder_classes(general, special))
-    return obj
+    return load_json(path, decoder_classes(general, special))
 
 
 
 if __name__ == "__main__":
+    import os
+    import sys
+    import tempfile
+    import time
+
     class A(JSONable):
         def __init__(self, i = 0) -> None:
             super().__init__()
@@ -133,24 +280,108 @@ if __name__ == "__main__":
                 b._arr.append(el)
             return b
 
-    a = A()
-    b = B(3)
+    class Node(JSONable):
+        __slots__ = ("value", "name", "children")
+
+        def __init__(self, value: float = 0, name: str = "", children: list = None) -> None:
+            self.value = value
+            self.name = name
+            self.children = [] if children is None else children
+
+    class DictNode(JSONable):
+        def __init__(self, value: float = 0, name: str = "", children: list = None) -> None:
+            self.value = value
+            self.name = name
+            self.children = [] if children is None else children
+
+    def make_tree(cls: type, depth: int, width: int) -> JSONable:
+        if depth == 0:
+            return cls(depth, "leaf")
+        return cls(depth, f"node {depth}", [make_tree(cls, depth - 1, width) for _ in range(width)])
+
+    def reference_to_json(obj):
+        """ `JSONable.to_json` и `JSONable.encode` до появления скомпилированных кодировщиков. """
+        if not isinstance(obj, JSONable):
+            raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+        d = { CLASS_NAME_KEY: obj.__class__.__name__ }
+        v = vars(obj).copy()
+        for key in v:
+            if not key.startswith("_"):
+                d[key] = v[key]
+        return d
 
+    def reference_decoder_classes(general: list, special: list = []):
+        """ `decoder_classes` до появления `JSONCodec`: повторно декодирует поля объекта. """
+        class_names = construct_class_dict(general + special)
+
+        def decode(obj):
+            if JSONable.check_dict(obj) \
+                    and obj[CLASS_NAME_KEY] in class_names:
+                class_name = class_names[obj[CLASS_NAME_KEY]]
+                for key in obj:
+                    if key == CLASS_NAME_KEY: continue
+                    obj[key] = decode(obj[key])
+                if class_name in special:
+                    return class_name.from_json(obj)
+                else:
+                    result: JSONable = class_names[obj[CLASS_NAME_KEY]]()
+                    result.from_json_base(obj)
+                    return result
+            return obj
+
+        return decode
+
+    def measure(function, repeat: int = 3) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            function()
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    # пример из старой версии модуля
+    b = B(3)
     b.foo()
-
     d = {
-        "a": a,
+        "a": A(),
         "b": b,
         "o": 10,
         "p": "word",
         "l": ["b", B(1)],
     }
-
-    save_json("test.json", d)
-    dd = load_json("test.json", [A], [B])
-    bb = dd["b"]
-
-    print(dd)
-    print(vars(bb))
-    for el in bb._arr:
-        print(el.i)
+    codec = JSONCodec([A], [B])
+    dd = codec.loads(codec.dumps(d))
+    assert [el.i for el in dd["b"]._arr] == [0, 1, 2]
+    assert isinstance(dd["l"][1], B) and isinstance(dd["b"].z[0], A)
+
+    # замер на глубоком документе
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    slots_tree = make_tree(Node, depth, width)
+    dict_tree = make_tree(DictNode, depth, width)
+    text = json.dumps(dict_tree, default=reference_to_json)
+    assert text == json.dumps(dict_tree, default=JSONCodec.encode)
+    assert json.dumps(slots_tree, default=JSONCodec.encode) == text.replace("DictNode", "Node")
+
+    reference_decode = reference_decoder_classes([DictNode])
+    codec = JSONCodec([DictNode, Node])
+    assert json.dumps(json.loads(text, object_hook=reference_decode), default=reference_to_json) == \
+        json.dumps(codec.loads(text), default=JSONCodec.encode)
+
+    timings = [
+        ("encode", measure(lambda: json.dumps(dict_tree, default=reference_to_json)), measure(lambda: json.dumps(dict_tree, default=JSONCodec.encode))),
+        ("encode __slots__", None, measure(lambda: json.dumps(slots_tree, default=JSONCodec.encode))),
+        ("decode", measure(lambda: json.loads(text, object_hook=reference_decode)), measure(lambda: codec.loads(text))),
+    ]
+
+    path = os.path.join(tempfile.gettempdir(), "json_utils_benchmark.json")
+    timings.append(("save", None, measure(lambda: save_json(path, dict_tree))))
+    os.remove(path)
+
+    print(f"tree depth {depth}, width {width}: {len(text) / 1e6:.1f} MB")
+    for name, reference, compiled in timings:
+        line = f"{name:>18}: {compiled * 1000:8.1f} ms"
+        if not reference is None:
+            line += f", before {reference * 1000:8.1f} ms, x{reference / compiled:.2f}"
+        print(line)
@@ -1,5 +1,12 @@
+from fractions import Fraction
+import functools
 import math
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 PRECISION_DIGIT_COUNT = 7
 PRECISION_VALUE = 10 ** -PRECISION_DIGIT_COUNT
 
@@ -105,6 +112,144 @@ def round_to_number_str(x: float, number: float, middle_coefficient: float = 0.5
 
 
 
+EXACT_CACHE_SIZE = 1 << 16
+MAX_MULTIPLE_DENOMINATOR = 10 ** 6
+
+
+@functools.lru_cache(maxsize=1024)
+def to_fraction(x: float) -> Fraction:
+    """
+        Converts a multiple or a coefficient to the rational number it was meant to be,
+        e.g. `100 / 24` to `25/6` and `0.1` to `1/10`.
+    """
+    return Fraction(x).limit_denominator(MAX_MULTIPLE_DENOMINATOR)
+
+
+@functools.lru_cache(maxsize=1024)
+def _exact_rounding_constants(number: float, middle_coefficient: float) -> tuple[int, int, int, int, int]:
+    """
+        Integer constants of `round_to_number_exact` for the given `number`
+        and `middle_coefficient`: `(factor, shift, divisor, numerator, denominator)`.
+    """
+    nf = to_fraction(number)
+    cf = to_fraction(middle_coefficient)
+    scale = 10 ** PRECISION_DIGIT_COUNT
+    # q = floor((R / scale + c * n) / n), where R = round(|x| * scale)
+    return (
+        nf.denominator * cf.denominator,
+        cf.numerator * nf.numerator * scale,
+        nf.numerator * scale * cf.denominator,
+        nf.numerator,
+        nf.denominator,
+    )
+
+
+def _exact_quotient(x: float, factor: int, shift: int, divisor: int) -> int:
+    """ Number of multiples in rounded `abs(x)`, see `_exact_rounding_constants`. """
+    return (round(abs(x) * 10 ** PRECISION_DIGIT_COUNT) * factor + shift) // divisor
+
+
+def _exact_value(x: float, quotient: int, numerator: int, denominator: int) -> float:
+    """ Rounded `x` from its `_exact_quotient`. """
+    v = quotient * numerator / denominator
+    return round_tail(-v if x < 0 else v) + 0.0
+
+
+@functools.lru_cache(maxsize=EXACT_CACHE_SIZE)
+def round_to_number_exact(x: float, number: float, middle_coefficient: float = 0.5) -> float:
+    """
+        Exact version of `round_to_number`.
+
+        `x` is taken as the decimal number it represents within
+        `PRECISION_DIGIT_COUNT` digits, `number` and `middle_coefficient` as
+        rationals (see `to_fraction`), and the rounding is done in integers
+        scaled by `10 ** PRECISION_DIGIT_COUNT`, so there is no float drift
+        at the boundaries: for example, `round_to_number(0.3, 0.1, 0)` gives
+        `0.2`, while this function gives `0.3`.
+        Results are memoized, because drawings repeat the same values a lot.
+    """
+    if do_floats_equal(x, 0):
+        return 0.0
+    factor, shift, divisor, numerator, denominator = _exact_rounding_constants(number, middle_coefficient)
+    return _exact_value(x, _exact_quotient(x, factor, shift, divisor), numerator, denominator)
+
+
+def round_to_number_exact_str(x: float, number: float, middle_coefficient: float = 0.5) -> str:
+    """ Exact version of `round_to_number_str`. """
+    return round_tail_str(round_to_number_exact(x, number, middle_coefficient))
+
+
+# The vectorized path gives the same results as `round_tail` only while
+# `x * 10 ** PRECISION_DIGIT_COUNT` is exactly representable in float64.
+NUMPY_SAFE_LIMIT = 2 ** 52 / 10 ** PRECISION_DIGIT_COUNT
+
+
+def _round_to_number_list(xs, number: float, middle_coefficient: float) -> list[float]:
+    scale = 10 ** PRECISION_DIGIT_COUNT
+    shift = middle_coefficient * number
+    result = []
+    for x in xs:
+        if abs(x) < PRECISION_VALUE:
+            result.append(0.0)
+        elif x < 0:
+            result.append(round(-int((-x + shift) // number) * number * scale) / scale)
+        else:
+            result.append(round(int((x + shift) // number) * number * scale) / scale)
+    return result
+
+
+def _round_to_number_numpy(xs, number: float, middle_coefficient: float):
+    scale = float(10 ** PRECISION_DIGIT_COUNT)
+    x = numpy.asarray(xs, dtype=numpy.float64)
+    a = numpy.abs(x)
+    y = numpy.floor_divide(a + middle_coefficient * number, number) * number
+    y = numpy.rint(y * scale) / scale
+    y = numpy.where(x < 0, -y, y)
+    y[a < PRECISION_VALUE] = 0.0
+    return y + 0.0  # -0.0 -> 0.0
+
+
+def round_to_number_array(xs, number: float, middle_coefficient: float = 0.5, exact: bool = False):
+    """
+        Batch version of `round_to_number` for a sequence or a NumPy array.
+
+        Returns a NumPy array if NumPy is installed, otherwise a list.
+        The results are identical to calling `round_to_number` for each value
+        (or `round_to_number_exact`, if `exact`).
+    """
+    if exact:
+        if not numpy is None:
+            xs = numpy.asarray(xs, dtype=numpy.float64).tolist()
+        result = [round_to_number_exact(x, number, middle_coefficient) for x in xs]
+        return result if numpy is None else numpy.array(result, dtype=numpy.float64)
+    if not numpy is None:
+        x = numpy.asarray(xs, dtype=numpy.float64)
+        if len(x) == 0 or numpy.max(numpy.abs(x)) + abs(number) < NUMPY_SAFE_LIMIT:
+            return _round_to_number_numpy(x, number, middle_coefficient)
+        return numpy.array(_round_to_number_list(x.tolist(), number, middle_coefficient))
+    return _round_to_number_list(xs, number, middle_coefficient)
+
+
+def round_to_number_str_batch(xs, number: float, middle_coefficient: float = 0.5, exact: bool = False) -> tuple[list[float], list[str]]:
+    """
+        Batch version of `round_to_number` and `round_to_number_str`
+        (or their exact versions, if `exact`).
+
+        Returns the rounded values and their string representations,
+        identical to the scalar functions.
+    """
+    values = round_to_number_array(xs, number, middle_coefficient, exact)
+    if not numpy is None:
+        values = values.tolist()
+    scale = 10 ** PRECISION_DIGIT_COUNT
+    strings = []
+    for x in values:
+        s = str(round(x * scale) / scale)
+        strings.append(s[:-2] if s.endswith(".0") else s)
+    return (values, strings)
+
+
+
 def integrate(a, b, n, f):
     l = (b - a) / n
     s = 0
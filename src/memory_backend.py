@@ -0,0 +1,525 @@
+"""
+    Хранящаяся в памяти модель объектов Компаса (API 7) для работы без Компаса.
+
+    Модель повторяет используемую программой часть API: документы, виды,
+    коллекции размеров `ISymbols2DContainer`, `ISelectionManager`,
+    `IDimensionText` и `IDimensionParams`. Каждое обращение к свойству или
+    методу учитывается в `MemoryBackend.calls_count` и может сопровождаться
+    задержкой `latency`, имитирующей вызов COM-сервера из другого процесса.
+
+    Как и `ComBackend`, бэкенд может возвращать интерфейсы размеров с
+    заранее определёнными DISPID (по умолчанию) или с поздним связыванием
+    (`use_dispatch_accessors=False`, см. `MemoryLateBoundDispatch`), чтобы
+    сравнивать их без Компаса.
+"""
+
+import random
+import threading
+import time
+
+from src.backend import KompasBackend
+from src.dimension_kinds import DimensionKind
+
+
+DIMENSION_KINDS = (
+    "LineDimension",
+    "RadialDimension",
+    "AngleDimension",
+    "ArcDimension",
+    "BreakLineDimension",
+    "BreakRadialDimension",
+    "DiametralDimension",
+    "HeightDimension",
+)
+
+ANGLE_DIMENSION_KINDS = (
+    "AngleDimension",
+    "BreakAngleDimension",
+)
+
+# вид объекта модели -> (код ksDrawingObjectTypeEnum, вид размера)
+OBJECT_TYPES = {
+    "LineSegment": (1, DimensionKind.NotDimension),
+    "Text": (4, DimensionKind.NotDimension),
+    "Hatch": (7, DimensionKind.NotDimension),
+    "LineDimension": (9, DimensionKind.Line),
+    "AngleDimension": (10, DimensionKind.Angle),
+    "DiametralDimension": (13, DimensionKind.Diametral),
+    "RadialDimension": (14, DimensionKind.Radial),
+    "BreakRadialDimension": (15, DimensionKind.BreakRadial),
+    "BreakLineDimension": (39, DimensionKind.BreakLine),
+    "BreakAngleDimension": (40, DimensionKind.BreakAngle),
+    "ArcDimension": (44, DimensionKind.Arc),
+    # кода нет в `KNOWN_TYPE_CODES`: вид определяется по интерфейсу при первой встрече
+    "HeightDimension": (47, DimensionKind.Height),
+}
+
+
+class MemoryObject:
+    """
+        Базовый класс объектов модели. Обращения к публичным атрибутам
+        (не начинающимся с `_`) считаются вызовами API.
+    """
+    def __init__(self, backend: 'MemoryBackend') -> None:
+        object.__setattr__(self, "_backend", backend)
+
+    def __getattribute__(self, name: str):
+        if not name.startswith("_"):
+            object.__getattribute__(self, "_backend").call()
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name: str, value) -> None:
+        if not name.startswith("_"):
+            self._backend.call()
+        object.__setattr__(self, name, value)
+
+    def _init_public(self, **attributes) -> None:
+        """ Задаёт публичные атрибуты, не учитывая это как вызовы API. """
+        for name, value in attributes.items():
+            object.__setattr__(self, name, value)
+
+
+class MemoryLateBoundDispatch:
+    """
+        Интерфейс объекта модели с поздним связыванием: перед каждым чтением
+        или записью свойства его имя разрешается заново (`GetIDsOfNames`),
+        что учитывается как ещё один вызов API.
+    """
+    __slots__ = ("_obj",)
+
+    def __init__(self, obj: MemoryObject) -> None:
+        object.__setattr__(self, "_obj", obj)
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        obj = object.__getattribute__(self, "_obj")
+        obj._backend.call()  # GetIDsOfNames
+        value = getattr(obj, name)
+        return MemoryLateBoundDispatch(value) if isinstance(value, MemoryObject) else value
+
+    def __setattr__(self, name: str, value) -> None:
+        obj = object.__getattribute__(self, "_obj")
+        obj._backend.call()  # GetIDsOfNames
+        setattr(obj, name, value)
+
+
+class MemoryTextLine(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend', s: str = "") -> None:
+        super().__init__(backend)
+        self._init_public(Str=s)
+
+
+class MemoryDrawingObject(MemoryObject):
+    """ Объект вида, не являющийся размером (отрезок, текст, штриховка...). """
+    def __init__(self, backend: 'MemoryBackend', kind: str = "LineSegment") -> None:
+        super().__init__(backend)
+        self._kind = kind
+        self._init_public(Reference=backend.next_reference(), DrawingObjectType=OBJECT_TYPES[kind][0])
+
+
+class MemoryDimension(MemoryDrawingObject):
+    """ Размер; реализует одновременно `IDimensionText` и `IDimensionParams`. """
+    def __init__(self, backend: 'MemoryBackend', kind: str, nominal_value: float) -> None:
+        super().__init__(backend, kind)
+        self._update_count = 0
+        self._init_public(
+            NominalValue=nominal_value,
+            NominalText=MemoryTextLine(backend, str(nominal_value).replace(".", ",")),
+            Suffix=MemoryTextLine(backend),
+            AutoNominalValue=True,
+            Sign=0,
+            RemoteLine1=True,
+            RemoteLine2=True,
+            ArrowType1=2,
+            ArrowType2=2,
+        )
+
+    def Update(self) -> bool:
+        self._update_count += 1
+        return True
+
+
+class MemoryDimensions(MemoryObject):
+    """ Коллекция размеров одного типа (`ILineDimensions`, `IAngleDimensions`...). """
+    def __init__(self, backend: 'MemoryBackend', view: 'MemoryView', kind: str) -> None:
+        super().__init__(backend)
+        self._view = view
+        self._kind = kind
+
+    @property
+    def Count(self) -> int:
+        return len(self._view._dimensions[self._kind])
+
+    def __getattr__(self, name: str):
+        # метод получения элемента называется по типу размера: LineDimension(j)
+        if name == self._kind:
+            return self._view._dimensions[self._kind].__getitem__
+        raise AttributeError(name)
+
+
+class MemorySymbols2DContainer(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend', view: 'MemoryView') -> None:
+        super().__init__(backend)
+        self._init_public(**{
+            kind + "s": MemoryDimensions(backend, view, kind)
+            for kind in DIMENSION_KINDS
+        })
+
+
+class MemoryView(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend', name: str = "") -> None:
+        super().__init__(backend)
+        self._dimensions: dict[str, list[MemoryDimension]] = {kind: [] for kind in DIMENSION_KINDS}
+        self._objects: list[MemoryDrawingObject] = []
+        self._container = MemorySymbols2DContainer(backend, self)
+        self._init_public(Name=name)
+
+    def _add_dimension(self, kind: str, nominal_value: float) -> MemoryDimension:
+        d = MemoryDimension(self._backend, kind, nominal_value)
+        self._dimensions[kind].append(d)
+        self._objects.append(d)
+        return d
+
+    def _add_object(self, kind: str = "LineSegment") -> MemoryDrawingObject:
+        obj = MemoryDrawingObject(self._backend, kind)
+        self._objects.append(obj)
+        return obj
+
+
+class MemoryViews(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend', views: list[MemoryView]) -> None:
+        super().__init__(backend)
+        self._views = views
+
+    @property
+    def Count(self) -> int:
+        return len(self._views)
+
+    def View(self, i: int) -> MemoryView:
+        return self._views[i]
+
+
+class MemoryViewsAndLayersManager(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend', views: list[MemoryView]) -> None:
+        super().__init__(backend)
+        self._init_public(Views=MemoryViews(backend, views))
+
+
+class MemorySelectionManager(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend') -> None:
+        super().__init__(backend)
+        self._selected: list[MemoryDrawingObject] = []
+
+    @property
+    def SelectedObjects(self):
+        # как и в COM: None, один объект или кортеж объектов
+        if len(self._selected) == 0:
+            return None
+        if len(self._selected) == 1:
+            return self._selected[0]
+        return tuple(self._selected)
+
+    def Select(self, obj: MemoryDrawingObject) -> bool:
+        if not any(el is obj for el in self._selected):
+            self._selected.append(obj)
+        self._backend.notify_selection_changed()
+        return True
+
+    def Unselect(self, obj: MemoryDrawingObject) -> bool:
+        self._selected = [el for el in self._selected if not el is obj]
+        self._backend.notify_selection_changed()
+        return True
+
+    def UnselectAll(self) -> bool:
+        self._selected = []
+        self._backend.notify_selection_changed()
+        return True
+
+
+class MemoryDocument(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend', path: str = "") -> None:
+        super().__init__(backend)
+        self._views: list[MemoryView] = []
+        self._refresh_count = 0
+        self._save_count = 0
+        self._is_closed = False
+        self._init_public(
+            DocumentType=1,  # ksDocumentDrawing
+            PathName=path,
+            Reference=backend.next_reference(),
+            ViewsAndLayersManager=MemoryViewsAndLayersManager(backend, self._views),
+            SelectionManager=MemorySelectionManager(backend),
+        )
+
+    def _add_view(self, name: str = "") -> MemoryView:
+        v = MemoryView(self._backend, name)
+        self._views.append(v)
+        return v
+
+    def Save(self) -> bool:
+        self._save_count += 1
+        return True
+
+    def Close(self, options: int = 0) -> bool:
+        self._is_closed = True
+        return True
+
+    def _iterate_dimensions(self):
+        for v in self._views:
+            for kind in DIMENSION_KINDS:
+                yield from v._dimensions[kind]
+
+
+class MemoryDocuments(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend', application: 'MemoryApplication') -> None:
+        super().__init__(backend)
+        self._application = application
+        self._documents: list[MemoryDocument] = []
+
+    @property
+    def Count(self) -> int:
+        return len(self._documents)
+
+    def Item(self, i: int) -> MemoryDocument:
+        return self._documents[i]
+
+    def Add(self, type_: int = 1, is_visible: bool = True) -> MemoryDocument:
+        doc = MemoryDocument(self._backend)
+        self._documents.append(doc)
+        object.__setattr__(self._application, "ActiveDocument", doc)
+        return doc
+
+    def Open(self, filepath: str, is_visible: bool = True, is_readonly: bool = False) -> MemoryDocument:
+        doc = self._backend.files.get(filepath)
+        if doc is None:
+            return None
+        self._documents.append(doc)
+        object.__setattr__(self._application, "ActiveDocument", doc)
+        return doc
+
+
+class MemoryApplication(MemoryObject):
+    def __init__(self, backend: 'MemoryBackend') -> None:
+        super().__init__(backend)
+        self._init_public(
+            Visible=True,
+            ActiveDocument=None,
+            Documents=MemoryDocuments(backend, self),
+        )
+
+    def Quit(self) -> bool:
+        return True
+
+
+class MemoryBackend(KompasBackend):
+    """
+        Бэкенд, работающий с моделью в памяти.
+
+        `latency` - задержка в секундах на каждый вызов API. Задержки от 1 мс
+        выполняются через `time.sleep()` (как и ожидание ответа COM-сервера,
+        они не удерживают GIL), более короткие - активным ожиданием.
+
+        `files` - документы, которые можно открыть по пути через
+        `Documents.Open()`.
+    """
+    def __init__(self, latency: float = 0.0, use_dispatch_accessors: bool = True) -> None:
+        self.latency: float = latency
+        self.use_dispatch_accessors = use_dispatch_accessors
+        self.calls_count: int = 0
+        self.is_task_access_enabled: bool = True
+        self.files: dict[str, MemoryDocument] = {}
+        self._last_reference = 0
+        self._lock = threading.Lock()
+        self._selection_callbacks: list = []
+        self.application = MemoryApplication(self)
+
+    def call(self) -> None:
+        with self._lock:
+            self.calls_count += 1
+        if self.latency >= 0.001:
+            time.sleep(self.latency)
+        elif self.latency > 0:
+            end = time.perf_counter() + self.latency
+            while time.perf_counter() < end:
+                pass
+
+    def next_reference(self) -> int:
+        with self._lock:
+            self._last_reference += 1
+            return self._last_reference
+
+    def reset_calls_count(self) -> None:
+        self.calls_count = 0
+
+    def notify_selection_changed(self) -> None:
+        for callback in list(self._selection_callbacks):
+            callback()
+
+    def is_running(self) -> bool:
+        return True
+
+    def open_doc2d(self, filepath: str = "") -> MemoryDocument:
+        app = self.application
+        if filepath == "":
+            if app.ActiveDocument is None:
+                raise Exception("Не обнаружен открытый документ.")
+            return app.ActiveDocument
+
+        doc = app.Documents.Open(filepath, True, False)
+        if doc is None:
+            raise Exception(f"Cannot open document '{filepath}'")
+        return doc
+
+    def create_application(self) -> MemoryApplication:
+        self.call()
+        app = MemoryApplication(self)
+        app.Visible = False
+        return app
+
+    def quit_application(self, app: MemoryApplication) -> None:
+        app.Quit()
+
+    def is_document_open(self, app: MemoryApplication, filepath: str) -> bool:
+        docs: MemoryDocuments = app.Documents
+        return any(doc.PathName == filepath for doc in docs._documents if not doc._is_closed)
+
+    def open_document(self, app: MemoryApplication, filepath: str) -> MemoryDocument:
+        doc = app.Documents.Open(filepath, False, False)
+        if doc is None:
+            raise Exception(f"Cannot open document '{filepath}'")
+        return doc
+
+    def save_document(self, doc: MemoryDocument) -> None:
+        doc.Save()
+
+    def close_document(self, doc: MemoryDocument) -> None:
+        doc.Close(0)
+
+    def open_documents_references(self) -> set[int]:
+        docs: MemoryDocuments = self.application.Documents
+        return set(doc.Reference for doc in docs._documents if not doc._is_closed)
+
+    def selection_manager(self, doc: MemoryDocument) -> MemorySelectionManager:
+        return doc.SelectionManager
+
+    def drawing_object_type(self, obj: MemoryDrawingObject) -> int:
+        # как и у типизированных COM-обёрток, код известен без обращения к API
+        return OBJECT_TYPES[obj._kind][0]
+
+    def dimension_kind(self, obj: MemoryDrawingObject) -> int:
+        return OBJECT_TYPES[obj._kind][1]
+
+    def dimension_text(self, d: MemoryDimension) -> MemoryDimension:
+        self.call()  # QueryInterface
+        return d if self.use_dispatch_accessors else MemoryLateBoundDispatch(d)
+
+    def dimension_params(self, d: MemoryDimension) -> MemoryDimension:
+        self.call()  # QueryInterface
+        return d if self.use_dispatch_accessors else MemoryLateBoundDispatch(d)
+
+    def symbols_container(self, v: MemoryView) -> MemorySymbols2DContainer:
+        self.call()  # QueryInterface
+        return v._container
+
+    def set_task_access(self, is_enabled: bool) -> None:
+        self.call()
+        self.is_task_access_enabled = is_enabled
+
+    def refresh_document_window(self, doc: MemoryDocument) -> int:
+        self.call()
+        doc._refresh_count += 1
+        return 1
+
+    def subscribe_selection_changes(self, callback) -> 'MemorySelectionSubscription':
+        return MemorySelectionSubscription(self, callback)
+
+    def marshal_document(self, doc: MemoryDocument) -> MemoryDocument:
+        return doc
+
+    def unmarshal_document(self, marshalled: MemoryDocument) -> MemoryDocument:
+        return marshalled
+
+    def release_marshalled_document(self, marshalled: MemoryDocument) -> None:
+        pass
+
+
+class MemorySelectionSubscription:
+    """ Подписка на изменения выделения; события модели вызываются в потоке, изменившем выделение. """
+    def __init__(self, backend: MemoryBackend, callback) -> None:
+        self._backend = backend
+        self._callback = callback
+        backend._selection_callbacks.append(callback)
+
+    def close(self) -> None:
+        if self._callback in self._backend._selection_callbacks:
+            self._backend._selection_callbacks.remove(self._callback)
+
+
+def create_random_document(
+        backend: MemoryBackend,
+        views_count: int = 10,
+        dimensions_per_view: int = 100,
+        other_objects_per_view: int = 0,
+        path: str = "",
+        seed: int = 0,
+        ) -> MemoryDocument:
+    """ Создаёт документ со случайными размерами и делает его активным. """
+    rnd = random.Random(seed)
+    doc = MemoryDocument(backend, path)
+    for i in range(views_count):
+        v = doc._add_view(f"View {i}")
+        for j in range(dimensions_per_view):
+            kind = rnd.choice(DIMENSION_KINDS)
+            if kind in ANGLE_DIMENSION_KINDS:
+                nominal_value = rnd.uniform(0, 180)
+            else:
+                nominal_value = 10 ** rnd.uniform(-2, 4)
+            v._add_dimension(kind, nominal_value)
+        for j in range(other_objects_per_view):
+            v._add_object()
+    backend.application.Documents._documents.append(doc)
+    object.__setattr__(backend.application, "ActiveDocument", doc)
+    return doc
+
+
+def select_all(doc: MemoryDocument) -> None:
+    """ Выделяет все объекты документа, не учитывая это как вызовы API. """
+    sm = object.__getattribute__(doc, "SelectionManager")
+    sm._selected = [obj for v in doc._views for obj in v._objects]
+    doc._backend.notify_selection_changed()
+
+
+
+if __name__ == "__main__":
+    import sys
+
+    import src.backend as backend_module
+    import src.round_dimensions as round_dimensions
+
+    dimensions_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.00005
+
+    backend = MemoryBackend(latency)
+    backend_module.set_backend(backend)
+    doc = create_random_document(backend, 10, dimensions_count // 10, dimensions_count // 10)
+
+    operations = [
+        ("round", lambda: round_dimensions.round_selected_dimensions(1, 0.5, True)),
+        ("round again", lambda: round_dimensions.round_selected_dimensions(1, 0.5, True)),
+        ("remove rounding", lambda: round_dimensions.remove_rounding_in_selected_dimensions()),
+        ("toggle star", lambda: round_dimensions.toggle_star_in_selected_dimensions()),
+        ("set sign", lambda: round_dimensions.set_sign_in_selected_dimensions(round_dimensions.DimensionSign.Diameter)),
+        ("switch remote lines", lambda: round_dimensions.switch_remote_lines_in_selected_dimensions()),
+        ("switch arrows", lambda: round_dimensions.switch_arrows_in_selected_dimensions()),
+        ("select rounded", lambda: round_dimensions.select_rounded_dimensions()),
+    ]
+
+    print(f"{dimensions_count} dimensions, latency {latency * 1e6:.0f} us per call")
+    for name, operation in operations:
+        select_all(doc)
+        backend.reset_calls_count()
+        t0 = time.perf_counter()
+        operation()
+        dt = time.perf_counter() - t0
+        print(f"{name:>20}: {dt * 1000:8.1f} ms, {backend.calls_count / dimensions_count:6.2f} calls per dimension")
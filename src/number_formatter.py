@@ -0,0 +1,183 @@
+"""
+    Форматирование округлённых значений размеров в текст размерной надписи.
+
+    `RoundingFormatter` создаётся один раз на набор параметров округления
+    (`get_formatter`) и заранее знает кратность в виде рационального числа и
+    количество знаков после запятой. Округление выполняется в целых числах,
+    а если кратность - конечная десятичная дробь, то и форматирование (без
+    `str(float)`, `endswith(".0")` и `.replace(".", ",")`). Результат
+    совпадает с `math_utils.round_to_number_exact_str`.
+"""
+
+import functools
+
+import src.math_utils as math_utils
+
+
+# максимальное количество знаков после запятой для целочисленного форматирования;
+# при большем количестве `str(float)` переходит на экспоненциальную запись
+MAX_DECIMAL_PLACES = 4
+
+# до этого значения `math_utils.round_tail` точно представляется в виде десятичной дроби
+MAX_INTEGER_VALUE = 10 ** 8
+
+
+class IntegerRounder:
+    """
+        `math_utils.round_to_number_exact` без кэша, с заранее вычисленными
+        константами: константы и вычисления берутся из `math_utils`.
+    """
+    def __init__(self, number: float, middle_coefficient: float) -> None:
+        self.number = number
+        self.middle_coefficient = middle_coefficient
+        self._factor, self._shift, self._divisor, self._numerator, self._denominator = \
+            math_utils._exact_rounding_constants(number, middle_coefficient)
+
+        # кратность в единицах последнего знака: n = unit / 10 ** places
+        self.places: int = None
+        self.unit: int = None
+        for places in range(MAX_DECIMAL_PLACES + 1):
+            if 10 ** places % self._denominator == 0:
+                self.places = places
+                self.unit = self._numerator * (10 ** places // self._denominator)
+                break
+
+    def quotient(self, x: float) -> int:
+        """ Количество кратностей в модуле округлённого `x`. """
+        return math_utils._exact_quotient(x, self._factor, self._shift, self._divisor)
+
+    def units(self, x: float) -> int:
+        """ Модуль округлённого `x` в единицах `10 ** -places` (только при конечном `places`). """
+        return self.quotient(x) * self.unit
+
+    def value(self, x: float) -> float:
+        """ То же, что `math_utils.round_to_number_exact(x, number, middle_coefficient)` для ненулевого `x`. """
+        return math_utils._exact_value(x, self.quotient(x), self._numerator, self._denominator)
+
+
+class RoundingFormatter:
+    """
+        Текст размерной надписи для значений, округлённых с кратностью
+        `multiple` (см. `round_dimensions.get_rounded_text`).
+    """
+    def __init__(self, multiple: float = 1, middle_coef: float = 0.5, is_angle_DMS: bool = True, decimal_separator: str = ",") -> None:
+        self.multiple = multiple
+        self.middle_coef = middle_coef
+        self.is_angle_DMS = is_angle_DMS
+        self.decimal_separator = decimal_separator
+
+        self._rounder = IntegerRounder(multiple, middle_coef)
+        self._seconds_rounder = IntegerRounder(multiple * 3600, middle_coef)
+
+    def format_number(self, x: float) -> str:
+        """ Округлённое значение с десятичным разделителем `decimal_separator`. """
+        if abs(x) >= MAX_INTEGER_VALUE:
+            return math_utils.round_to_number_exact_str(x, self.multiple, self.middle_coef).replace(".", self.decimal_separator)
+        if math_utils.do_floats_equal(x, 0):
+            return "0"
+
+        rounder = self._rounder
+        if rounder.places is None:
+            return math_utils.round_tail_str(rounder.value(x)).replace(".", self.decimal_separator)
+
+        u = rounder.units(x)
+        if u == 0:
+            return "0"
+        s = str(u)
+        places = rounder.places
+        if places > 0:
+            s = s.rjust(places + 1, "0")
+            fraction = s[-places:].rstrip("0")
+            s = s[:-places] + self.decimal_separator + fraction if fraction != "" else s[:-places]
+        return "-" + s if x < 0 else s
+
+    def format_dms(self, x: float) -> str:
+        """ Угол в градусах, минутах и секундах, округлённый в секундах. """
+        if math_utils.do_floats_equal(x, 0):
+            return "0°"
+
+        x = x * 3600
+        rounder = self._seconds_rounder
+        if abs(x) >= MAX_INTEGER_VALUE:
+            seconds = round(math_utils.round_to_number_exact(x, self.multiple * 3600, self.middle_coef))
+        elif rounder.places == 0:
+            seconds = rounder.units(x)
+            seconds = -seconds if x < 0 else seconds
+        else:
+            seconds = round(rounder.value(x))
+        sign = -1 if seconds < 0 else +1
+        seconds = abs(seconds)
+
+        v, rest = divmod(seconds, 3600)
+        m, s = divmod(rest, 60)
+        text = f"{sign * v}°"
+        if m != 0:
+            text += f"{m}'"
+        if s != 0:
+            text += f"{s}\""
+        return text
+
+    def format(self, nv: float, is_angle: bool) -> str:
+        if is_angle:
+            if self.is_angle_DMS:
+                return self.format_dms(nv)
+            return self.format_number(nv) + "°"
+        return self.format_number(nv)
+
+    def format_batch(self, nvs, is_angles) -> list[str]:
+        format_number = self.format_number
+        format_ = self.format
+        return [format_(nv, is_angle) if is_angle else format_number(nv) for nv, is_angle in zip(nvs, is_angles)]
+
+
+@functools.lru_cache(maxsize=64)
+def get_formatter(multiple: float = 1, middle_coef: float = 0.5, is_angle_DMS: bool = True, decimal_separator: str = ",") -> RoundingFormatter:
+    """ Возвращает форматтер, созданный один раз для данных параметров. """
+    return RoundingFormatter(multiple, middle_coef, is_angle_DMS, decimal_separator)
+
+
+
+if __name__ == "__main__":
+    import random
+    import sys
+    import time
+
+    def reference_text(x: float, is_angle: bool, multiple: float, middle_coef: float, is_angle_DMS: bool) -> str:
+        """ Форматирование по одному значению, как в `round_dimensions.get_rounded_text` до появления форматтера. """
+        if is_angle and is_angle_DMS:
+            if math_utils.do_floats_equal(x, 0):
+                return "0°"
+            x = round(math_utils.round_to_number_exact(x * 3600, multiple * 3600, middle_coef))
+            sign = -1 if x < 0 else +1
+            x = abs(x)
+            v = int(x / 3600)
+            m = int(x / 60 - v * 60)
+            s = int(x - v * 3600 - m * 60)
+            text = f"{sign * v}°"
+            if m != 0:
+                text += f"{m}'"
+            if s != 0:
+                text += f"{s}\""
+            return text
+        text = math_utils.round_to_number_exact_str(x, multiple, middle_coef).replace(".", ",")
+        return text + "°" if is_angle else text
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    rnd = random.Random(0)
+    nvs = [rnd.uniform(-180, 180) if rnd.random() < 0.2 else 10 ** rnd.uniform(-2, 4) for _ in range(count)]
+    is_angles = [abs(nv) < 180 and rnd.random() < 0.5 for nv in nvs]
+
+    for multiple, middle_coef, is_angle_DMS in [(1, 0.5, True), (0.1, 0, False), (0.25, 1, True), (100 / 24, 0.5, True), (10 / 12, 0.5, False)]:
+        math_utils.round_to_number_exact.cache_clear()
+        t0 = time.perf_counter()
+        expected = [reference_text(nv, is_angle, multiple, middle_coef, is_angle_DMS) for nv, is_angle in zip(nvs, is_angles)]
+        t1 = time.perf_counter()
+        texts = get_formatter(multiple, middle_coef, is_angle_DMS).format_batch(nvs, is_angles)
+        t2 = time.perf_counter()
+
+        if texts != expected:
+            i = next(i for i in range(count) if texts[i] != expected[i])
+            raise Exception(f"Formatter differs for {nvs[i]!r}: {texts[i]!r} != {expected[i]!r}")
+        print(f"multiple {multiple:.6g}, middle {middle_coef}, DMS {is_angle_DMS}: {count} values, " \
+            f"per-value {(t1 - t0) * 1000:.0f} ms, formatter {(t2 - t1) * 1000:.0f} ms, x{(t1 - t0) / (t2 - t1):.1f}")
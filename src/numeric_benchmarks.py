@@ -0,0 +1,155 @@
+"""
+    Замеры производительности численного ядра: округления, форматирования
+    чисел и углов, ряда кратностей поля ввода.
+
+    Значения генерируются по распределению, близкому к реальным чертежам:
+    длины от 0,01 до 10 000 мм (равномерно по порядку величины) и углы от 0
+    до 360 градусов. Для каждой функции выводится лучшее из `--repeat`
+    время на одно значение.
+
+        python -m src.numeric_benchmarks --output bench.json
+        python -m src.numeric_benchmarks --baseline bench.json --tolerance 0.2
+
+    При `--baseline` результаты сравниваются с сохранёнными ранее, и если
+    какая-либо функция стала медленнее более чем на `--tolerance`, программа
+    завершается с кодом 1.
+
+    В репозитории хранятся базовые результаты `benchmarks/numeric_baseline.json`
+    (машина и версия Python записаны в файле). Проверка изменений:
+
+        python -m src.numeric_benchmarks --baseline benchmarks/numeric_baseline.json
+
+    Время зависит от машины, поэтому на другой машине базовые результаты
+    сначала пересохраняются с текущего кода (`--repeat 5 --output
+    benchmarks/numeric_baseline.json`), а затем сравниваются с изменённым.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import src.math_utils as math_utils
+import src.number_formatter as number_formatter
+import src.round_dimensions as round_dimensions
+
+
+MULTIPLES = [10 / 12, 1.0, 10 / 6, 2.0, 2.5, 100 / 24, 5.0, 100 / 12, 10.0, 0.1, 0.5, 0.01]
+
+
+def make_lengths(count: int, seed: int = 0) -> list[float]:
+    rnd = random.Random(seed)
+    return [10 ** rnd.uniform(-2, 4) for _ in range(count)]
+
+
+def make_angles(count: int, seed: int = 0) -> list[float]:
+    rnd = random.Random(seed + 1)
+    return [rnd.uniform(0, 360) for _ in range(count)]
+
+
+def make_multiples(count: int, seed: int = 0) -> list[float]:
+    rnd = random.Random(seed + 2)
+    return [rnd.choice(MULTIPLES) * 10 ** rnd.randint(-2, 2) for _ in range(count)]
+
+
+def get_benchmarks(count: int, seed: int = 0) -> dict:
+    """ Возвращает словарь "имя замера -> функция без аргументов, обрабатывающая `count` значений". """
+    lengths = make_lengths(count, seed)
+    angles = make_angles(count, seed)
+    multiples = make_multiples(count, seed)
+    is_angles = [True] * count
+
+    benchmarks = {
+        "round_to_number": lambda: [math_utils.round_to_number(x, 0.5, 0.5) for x in lengths],
+        "round_to_number_exact": lambda: [math_utils.round_to_number_exact(x, 0.5, 0.5) for x in lengths],
+        "round_to_number_str": lambda: [math_utils.round_to_number_str(x, 0.5, 0.5) for x in lengths],
+        "round_to_number_str_batch": lambda: math_utils.round_to_number_str_batch(lengths, 0.5, 0.5),
+        "round_digits_str": lambda: [math_utils.round_digits_str(x, 3) for x in lengths],
+        "count_10": lambda: [math_utils.count_10(x) for x in lengths],
+        "count_digits": lambda: [math_utils.count_digits(x) for x in lengths],
+        "dms_get_rounded_text": lambda: [round_dimensions.get_rounded_text(x, True, 100 / 24, 0.5, True) for x in angles],
+        "dms_format_batch": lambda: number_formatter.get_formatter(100 / 24, 0.5, True).format_batch(angles, is_angles),
+        "length_format_batch": lambda: number_formatter.get_formatter(0.5, 0.5, False).format_batch(lengths, [False] * count),
+    }
+
+    try:
+        import src.gui as gui
+        benchmarks["get_next_value"] = lambda: [gui.get_next_value(x, i % 2 == 0) for i, x in enumerate(multiples)]
+    except ImportError as e:
+        print(f"get_next_value skipped: {e}")
+    return benchmarks
+
+
+def run(count: int = 100000, repeat: int = 3, names: list[str] = None, seed: int = 0) -> dict[str, float]:
+    """ Выполняет замеры. Возвращает лучшее время на одно значение в наносекундах. """
+    results: dict[str, float] = {}
+    for name, benchmark in get_benchmarks(count, seed).items():
+        if names and not name in names:
+            continue
+        best = float("inf")
+        for _ in range(repeat):
+            math_utils.round_to_number_exact.cache_clear()
+            t0 = time.perf_counter()
+            benchmark()
+            best = min(best, time.perf_counter() - t0)
+        results[name] = best / count * 1e9
+    return results
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], tolerance: float = 0.2) -> list[str]:
+    """ Возвращает имена замеров, ставших медленнее базовых более чем на `tolerance`. """
+    return [
+        name for name, ns in results.items()
+        if name in baseline and ns > baseline[name] * (1 + tolerance)
+    ]
+
+
+def print_results(results: dict[str, float], baseline: dict[str, float] = None) -> None:
+    for name, ns in results.items():
+        line = f"{name:>28}: {ns:10.1f} ns"
+        if baseline and name in baseline:
+            line += f"   baseline {baseline[name]:10.1f} ns, x{ns / baseline[name]:.2f}"
+        print(line)
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Замеры производительности численного ядра")
+    parser.add_argument("--count", type=int, default=100000, help="количество значений в каждом замере")
+    parser.add_argument("--repeat", type=int, default=3, help="количество повторов; берётся лучшее время")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", default=None, metavar="NAME", help="выполнить только указанные замеры")
+    parser.add_argument("--output", default="", help="сохранить результаты в JSON-файл")
+    parser.add_argument("--baseline", default="", help="JSON-файл с базовыми результатами для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="допустимое замедление относительно базовых результатов")
+    args = parser.parse_args()
+
+    results = run(args.count, args.repeat, args.only, args.seed)
+
+    baseline = None
+    if args.baseline != "":
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print(f"{args.count} values, best of {args.repeat}, per value:")
+    print_results(results, baseline)
+
+    if args.output != "":
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "python": sys.version,
+                "platform": platform.platform(),
+                "count": args.count,
+                "repeat": args.repeat,
+                "seed": args.seed,
+                "results": results,
+            }, f, indent=4)
+
+    if not baseline is None:
+        regressions = compare(results, baseline, args.tolerance)
+        if len(regressions) > 0:
+            print(f"Regressions (slower by more than {args.tolerance * 100:.0f}%): {', '.join(regressions)}")
+            sys.exit(1)
+        print("No regressions")
@@ -0,0 +1,120 @@
+"""
+    Выполнение операций над размерами в отдельном потоке.
+
+    Операции главного окна ставятся в очередь `OperationWorker` и
+    выполняются по одной в его потоке, подготовленном к работе с API
+    (`KompasBackend.initialize_thread`); окно при этом продолжает отвечать.
+    Ход выполнения и результат передаются в окно сигналами Qt.
+"""
+
+import queue
+import traceback
+
+from PyQt5 import QtCore
+
+from src.backend import get_backend
+from src.dimension_batch import BatchProgress, set_progress
+
+
+class Job(BatchProgress):
+    """
+        Операция в очереди: функция и её аргументы, вычисленные в потоке окна.
+        Фоновые операции (`is_background`) не показывают ход выполнения,
+        их результат передаётся сигналом `background_job_finished`, а ошибки
+        только выводятся.
+    """
+    def __init__(self, worker: 'OperationWorker', func, args: tuple, is_background: bool = False) -> None:
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.is_background = is_background
+        self._worker = worker
+
+    def report(self, done_count: int, total_count: int) -> None:
+        if not self.is_background:
+            self._worker.progress_changed.emit(done_count, total_count)
+
+
+class OperationWorker(QtCore.QThread):
+    progress_changed = QtCore.pyqtSignal(int, int)  # обработано, всего
+    job_started = QtCore.pyqtSignal()
+    job_finished = QtCore.pyqtSignal(object)  # результат операции
+    job_failed = QtCore.pyqtSignal(object, str)  # исключение, текст traceback
+    became_idle = QtCore.pyqtSignal()
+    background_job_finished = QtCore.pyqtSignal(object)  # результат фоновой операции
+
+    def __init__(self, parent = None) -> None:
+        super().__init__(parent)
+        self._jobs: queue.Queue = queue.Queue()
+        self._current_job: Job = None
+
+    def submit(self, func, *args) -> Job:
+        """ Ставит `func(*args)` в очередь. Аргументы должны быть вычислены заранее, в потоке окна. """
+        return self._put(Job(self, func, args))
+
+    def submit_background(self, func, *args) -> Job:
+        return self._put(Job(self, func, args, is_background=True))
+
+    def _put(self, job: Job) -> Job:
+        self._jobs.put(job)
+        if not self.isRunning():
+            self.start()
+        return job
+
+    def cancel(self) -> None:
+        """ Убирает из очереди ожидающие операции и отменяет выполняемую (между частями размеров). """
+        while True:
+            try:
+                self._jobs.get_nowait()
+            except queue.Empty:
+                break
+        job = self._current_job
+        if not job is None:
+            job.cancel()
+
+    def stop(self) -> None:
+        """
+            Отменяет операции и ожидает завершения потока. Выполняемая операция
+            прекращается после текущей части размеров, поэтому ожидание недолгое;
+            уничтожать поток, пока операция выполняется, нельзя.
+        """
+        self.cancel()
+        if self.isRunning():
+            self._jobs.put(None)
+            self.wait()
+
+    def run(self) -> None:
+        backend = get_backend()
+        backend.initialize_thread()
+        try:
+            while True:
+                job: Job = self._jobs.get()
+                if job is None:
+                    break
+                self._current_job = job
+                if job.is_background:
+                    self._run_background_job(job)
+                else:
+                    self.job_started.emit()
+                    self._run_job(job)
+                self._current_job = None
+                if self._jobs.empty():
+                    self.became_idle.emit()
+        finally:
+            backend.uninitialize_thread()
+
+    def _run_job(self, job: Job) -> None:
+        set_progress(job)
+        try:
+            result = job.func(*job.args)
+            self.job_finished.emit(result)
+        except Exception as e:
+            self.job_failed.emit(e, traceback.format_exc())
+        finally:
+            set_progress(None)
+
+    def _run_background_job(self, job: Job) -> None:
+        try:
+            self.background_job_finished.emit(job.func(*job.args))
+        except Exception as e:
+            print(f"Background job failed: {e.__class__.__name__}: {str(e)}")
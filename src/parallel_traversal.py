@@ -0,0 +1,173 @@
+"""
+    Эксперимент: параллельный перебор размеров документа в нескольких потоках.
+
+    Операции над размерами этот модуль не используют; он нужен для оценки
+    выигрыша (`benchmark()`, запуск `python -m src.parallel_traversal 1 2 4 8`).
+    Перебор в одном потоке выполняет `dimension_index.DimensionIndex`.
+"""
+
+from __future__ import annotations
+import threading
+import time
+import typing
+
+from src.backend import get_backend
+import src.dimension_index as dimension_index
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+DEFAULT_WORKERS_COUNT = 4
+
+
+class DimensionRecord:
+    """
+        Данные размера, полученные в рабочем потоке.
+
+        Сам COM-объект размера принадлежит апартаменту рабочего потока, поэтому
+        наружу передаётся только его положение в документе: вид, тип коллекции
+        и номер в коллекции. Получить объект в вызывающем потоке можно через
+        `resolve_dimensions()`.
+    """
+    __slots__ = ("view_index", "type", "position", "is_auto", "nominal_value")
+
+    def __init__(self, view_index: int, type_: int, position: int, is_auto: bool, nominal_value: float) -> None:
+        self.view_index = view_index
+        self.type = type_
+        self.position = position
+        self.is_auto = is_auto
+        self.nominal_value = nominal_value
+
+
+def _scan_views(doc: KAPI7.IKompasDocument2D, view_indices: range) -> list[DimensionRecord]:
+    records: list[DimensionRecord] = []
+    backend = get_backend()
+    vs: KAPI7.IViews = dimension_index.get_views(doc)
+    for i in view_indices:
+        v: KAPI7.IView = vs.View(i)
+        positions = [0] * len(dimension_index.DIMENSION_COLLECTIONS)
+        for type_, d in dimension_index.iterate_view_dimensions(v):
+            dt: KAPI7.IDimensionText = backend.dimension_text(d)
+            records.append(DimensionRecord(i, type_, positions[type_], bool(dt.AutoNominalValue), dt.NominalValue))
+            positions[type_] += 1
+    return records
+
+
+def _worker(marshalled_doc: object, view_indices: range, results: list, k: int) -> None:
+    backend = get_backend()
+    backend.initialize_thread()
+    try:
+        doc = backend.unmarshal_document(marshalled_doc)
+        results[k] = _scan_views(doc, view_indices)
+    except Exception as e:
+        results[k] = e
+    finally:
+        backend.uninitialize_thread()
+
+
+def split_range(count: int, parts_count: int) -> list[range]:
+    """ Делит `range(count)` на `parts_count` непрерывных частей примерно равной длины. """
+    parts_count = max(1, min(parts_count, count))
+    size, rest = divmod(count, parts_count)
+    parts: list[range] = []
+    start = 0
+    for k in range(parts_count):
+        end = start + size + int(k < rest)
+        parts.append(range(start, end))
+        start = end
+    return parts
+
+
+def get_dimension_records(doc: KAPI7.IKompasDocument2D, workers_count: int = DEFAULT_WORKERS_COUNT) -> list[DimensionRecord]:
+    """
+        Перебирает размеры всех видов документа в `workers_count` потоках.
+
+        Интерфейс документа передаётся в каждый поток через
+        `CoMarshalInterThreadInterfaceInStream`, каждый поток обрабатывает
+        непрерывный диапазон видов. Результаты объединяются в порядке видов,
+        поэтому не зависят от количества потоков.
+    """
+    views_count: int = dimension_index.get_views(doc).Count
+    parts = split_range(views_count, workers_count)
+    if len(parts) <= 1:
+        return _scan_views(doc, range(views_count))
+
+    backend = get_backend()
+    results: list = [None] * len(parts)
+    marshalled_docs: list = []
+    threads: list[threading.Thread] = []
+    try:
+        for view_indices in parts:
+            marshalled_docs.append(backend.marshal_document(doc))
+        for k, view_indices in enumerate(parts):
+            t = threading.Thread(target=_worker, args=(marshalled_docs[k], view_indices, results, k), daemon=True)
+            t.start()
+            threads.append(t)
+    finally:
+        # запущенные потоки распаковывают свои интерфейсы сами, остальные освобождаются здесь
+        for marshalled_doc in marshalled_docs[len(threads):]:
+            backend.release_marshalled_document(marshalled_doc)
+        for t in threads:
+            t.join()
+
+    records: list[DimensionRecord] = []
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+        records.extend(result)
+    return records
+
+
+def resolve_dimensions(doc: KAPI7.IKompasDocument2D, records: list[DimensionRecord]) -> list[KAPI7.IDrawingObject]:
+    """ Получает COM-объекты размеров по записям в текущем потоке. """
+    dims: list[KAPI7.IDrawingObject] = []
+    vs: KAPI7.IViews = dimension_index.get_views(doc)
+    view_index = -1
+    collections = []
+    for r in records:
+        if r.view_index != view_index:
+            view_index = r.view_index
+            collections = dimension_index.get_view_collections(vs.View(view_index))
+        item_name = dimension_index.DIMENSION_COLLECTIONS[r.type][1]
+        dims.append(getattr(collections[r.type], item_name)(r.position))
+    return dims
+
+
+def benchmark(doc: KAPI7.IKompasDocument2D, workers_counts: list[int] = [1, 2, 4, 8], repeat: int = 3) -> dict[int, float]:
+    """
+        Сравнивает время перебора размеров параллельно и последовательно
+        (в `1` потоке; он измеряется всегда, даже если не указан в
+        `workers_counts`). Возвращает лучшее время в секундах для каждого
+        количества потоков.
+    """
+    def measure(workers_count: int) -> tuple[float, list[tuple]]:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            records = get_dimension_records(doc, workers_count)
+            best = min(best, time.perf_counter() - t0)
+        return best, [(r.view_index, r.type, r.position, r.is_auto, r.nominal_value) for r in records]
+
+    serial_time, reference = measure(1)
+    times: dict[int, float] = {}
+    for workers_count in workers_counts:
+        if workers_count == 1:
+            best = serial_time
+        else:
+            best, key = measure(workers_count)
+            if key != reference:
+                raise Exception(f"Results for {workers_count} workers differ from serial traversal")
+
+        times[workers_count] = best
+        print(f"{workers_count} workers: {len(reference)} dimensions, {best * 1000:.1f} ms, " \
+            f"speedup x{serial_time / best:.2f}")
+    return times
+
+
+
+if __name__ == "__main__":
+    import sys
+
+    workers_counts = [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 8]
+    benchmark(get_backend().open_doc2d(""), workers_counts)
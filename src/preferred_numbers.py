@@ -0,0 +1,145 @@
+"""
+    Ряды предпочтительных чисел: ряды Ренара R5, R10, R20, R40 (ГОСТ 8032)
+    и ряды E6, E12, E24.
+
+    Каждый ряд заранее разворачивается по декадам в отсортированную таблицу,
+    и поиск ближайшего, меньшего или большего значения ряда выполняется
+    двоичным поиском (`bisect`). Тот же индекс используется для ряда
+    кратностей, перебираемого колёсиком мыши в поле ввода кратности.
+"""
+
+import bisect
+from fractions import Fraction
+import math
+
+import src.math_utils as math_utils
+
+
+# значения рядов в пределах одной декады
+SERIES_MANTISSAS: dict[str, tuple[float, ...]] = {
+    "R5": (1.00, 1.60, 2.50, 4.00, 6.30),
+    "R10": (1.00, 1.25, 1.60, 2.00, 2.50, 3.15, 4.00, 5.00, 6.30, 8.00),
+    "R20": (
+        1.00, 1.12, 1.25, 1.40, 1.60, 1.80, 2.00, 2.24, 2.50, 2.80,
+        3.15, 3.55, 4.00, 4.50, 5.00, 5.60, 6.30, 7.10, 8.00, 9.00,
+    ),
+    "R40": (
+        1.00, 1.06, 1.12, 1.18, 1.25, 1.32, 1.40, 1.50, 1.60, 1.70,
+        1.80, 1.90, 2.00, 2.12, 2.24, 2.36, 2.50, 2.65, 2.80, 3.00,
+        3.15, 3.35, 3.55, 3.75, 4.00, 4.25, 4.50, 4.75, 5.00, 5.30,
+        5.60, 6.00, 6.30, 6.70, 7.10, 7.50, 8.00, 8.50, 9.00, 9.50,
+    ),
+    "E6": (1.0, 1.5, 2.2, 3.3, 4.7, 6.8),
+    "E12": (1.0, 1.2, 1.5, 1.8, 2.2, 2.7, 3.3, 3.9, 4.7, 5.6, 6.8, 8.2),
+    "E24": (
+        1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7, 3.0,
+        3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1,
+    ),
+}
+
+# ряд кратностей округления для поля ввода; числа, отнесённые к 6, 12, 24,
+# предназначены для округления углов с минутами и секундами
+MULTIPLE_LADDER_MANTISSAS = (10 / 12, 1.0, 10 / 6, 2.0, 2.5, 100 / 24, 5.0, 100 / 12)
+
+# относительная погрешность, в пределах которой значение считается равным значению ряда
+LADDER_ERROR = 0.02
+
+MIN_EXPONENT = -4
+MAX_EXPONENT = 8
+
+# ряд кратностей покрывает все значения, которые можно ввести в поле кратности
+LADDER_MIN_EXPONENT = -12
+LADDER_MAX_EXPONENT = 9
+
+
+class PreferredSeries:
+    """ Ряд предпочтительных чисел, развёрнутый по декадам от `10 ** min_exponent` до `10 ** max_exponent`. """
+    def __init__(self, name: str, mantissas: tuple[float, ...], min_exponent: int = MIN_EXPONENT, max_exponent: int = MAX_EXPONENT) -> None:
+        self.name = name
+        self.mantissas = mantissas
+        # значения вычисляются в рациональных числах, чтобы одинаковые значения
+        # соседних декад (10/12 * 10 и 100/12) совпадали, а 1,12 * 100 давало ровно 112
+        values = set()
+        for k in range(min_exponent, max_exponent + 1):
+            for m in mantissas:
+                values.add(math_utils.to_fraction(m) * Fraction(10) ** k)
+        self.values: list[float] = sorted(float(v) for v in values)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def floor(self, x: float) -> float:
+        """ Наибольшее значение ряда, не превышающее `x` (или наименьшее значение ряда). """
+        i = bisect.bisect_right(self.values, x + math_utils.PRECISION_VALUE)
+        return self.values[max(i - 1, 0)]
+
+    def ceil(self, x: float) -> float:
+        """ Наименьшее значение ряда, не меньшее `x` (или наибольшее значение ряда). """
+        i = bisect.bisect_left(self.values, x - math_utils.PRECISION_VALUE)
+        return self.values[min(i, len(self.values) - 1)]
+
+    def nearest(self, x: float) -> float:
+        return self.round(x, 0.5)
+
+    def round(self, x: float, middle_coefficient: float = 0.5) -> float:
+        """
+            Округляет `x` до значения ряда. Как и в `math_utils.round_to_number`,
+            `0` - вниз, `1` - вверх, другие значения задают точку перехода
+            в долях интервала между соседними значениями ряда.
+        """
+        if math_utils.do_floats_equal(x, 0):
+            return 0.0
+        sign = -1 if x < 0 else +1
+        x = abs(x)
+        lo = self.floor(x)
+        hi = self.ceil(x)
+        if lo >= hi or math_utils.do_floats_equal(x, lo):
+            return sign * lo
+        if math_utils.do_floats_equal(x, hi):
+            return sign * hi
+        if middle_coefficient <= 0:
+            return sign * lo
+        if middle_coefficient >= 1:
+            return sign * hi
+        return sign * (hi if x - lo >= (1 - middle_coefficient) * (hi - lo) else lo)
+
+    def next(self, x: float, error: float = LADDER_ERROR) -> float:
+        """
+            Следующее значение ряда, большее `x` более чем на `error` (в долях `x`),
+            но не больше ближайшей сверху степени 10: от 9,9 следующим будет 10.
+        """
+        i = bisect.bisect_right(self.values, x * (1 + error))
+        v = self.values[min(i, len(self.values) - 1)]
+        if x <= 0:
+            return v
+        # не `math_utils.count_10`: она считает нулём значения меньше 1e-7
+        decade_end = 10.0 * 10 ** math.floor(math.log10(x))
+        return decade_end if v > decade_end else v
+
+    def previous(self, x: float, error: float = LADDER_ERROR) -> float:
+        """ Предыдущее значение ряда, меньшее `x` более чем на `error` (в долях `x`). """
+        i = bisect.bisect_left(self.values, x * (1 - error))
+        return self.values[max(i - 1, 0)]
+
+
+SERIES: dict[str, PreferredSeries] = {
+    name: PreferredSeries(name, mantissas)
+    for name, mantissas in SERIES_MANTISSAS.items()
+}
+
+MULTIPLE_LADDER = PreferredSeries("multiples", MULTIPLE_LADDER_MANTISSAS, LADDER_MIN_EXPONENT, LADDER_MAX_EXPONENT)
+
+
+def get_series(name: str) -> PreferredSeries:
+    if not name in SERIES:
+        raise Exception(f"Unknown preferred number series '{name}'")
+    return SERIES[name]
+
+
+
+if __name__ == "__main__":
+    for name, series in SERIES.items():
+        print(f"{name:>4}: {len(series)} values;", ", ".join(
+            f"{x} -> {series.nearest(x)}" for x in [0.37, 13, 33.14, 117, 2718.28]
+        ))
+    print("ladder:", ", ".join(f"{x} -> {MULTIPLE_LADDER.previous(x):.6g}/{MULTIPLE_LADDER.next(x):.6g}" for x in [0.1, 1, 2.5, 10, 100 / 24]))
@@ -1,11 +1,21 @@
-
+from __future__ import annotations
 import typing
 
-from src.HEAD import *
-
 # import config
 
 import src.math_utils as math_utils
+import src.number_formatter as number_formatter
+import src.preferred_numbers as preferred_numbers
+from src.backend import get_backend
+from src.dimension_batch import BatchStats, is_cancelled, iterate_chunks
+from src.dimension_plan import DimensionPlan
+from src.dimension_snapshot import DimensionSnapshot, SnapshotField
+import src.dimension_index as dimension_index
+import src.dimension_kinds as dimension_kinds
+from src.selection_cache import get_selection_cache
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
 
 
 
@@ -17,27 +27,14 @@ def find_in_list(element, list_, default_value: int = -1) -> int:
     return default_value
 
 
+def is_kompas_running() -> bool:
+    return get_backend().is_running()
 
 
+def open_doc2d(filepath: str = "") -> KAPI7.IKompasDocument2D:
+    return get_backend().open_doc2d(filepath)
 
 
-DIMENSIONS_CLASSES = (
-    KAPI7.IAngleDimension,
-    KAPI7.IBreakAngleDimension,
-
-    KAPI7.IArcDimension,
-    KAPI7.IBreakLineDimension,
-    KAPI7.IBreakRadialDimension,
-    KAPI7.IDiametralDimension,
-    KAPI7.IHeightDimension,
-    KAPI7.ILineDimension,
-    KAPI7.IRadialDimension,
-)
-
-DIMENSIONS_CLASSES_ANGLE = (
-    KAPI7.IAngleDimension,
-    KAPI7.IBreakAngleDimension,
-)
 
 
 class DimensionSign(int):
@@ -51,196 +48,245 @@ class DimensionSign(int):
 
 
 
-def iterate_selected_dimensions():
-    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+def iterate_selected_dimensions(doc: KAPI7.IKompasDocument2D = None):
+    if doc is None:
+        doc = open_doc2d("")
     ds: list[KAPI7.IDrawingObject] = get_selected_dimensions(doc)
+    backend = get_backend()
     for d in ds:
-        dt: KAPI7.IDimensionText = KAPI7.IDimensionText(d)
-        dp: KAPI7.IDimensionParams = KAPI7.IDimensionParams(d)
+        dt, dp = backend.dimension_interfaces(d)
         yield (d, dt, dp)
 
 
-def round_selected_dimensions(multiple: float = 1, middle_coef: float = 0.5, is_angle_DMS: bool = True) -> None:
-    for d, dt, dp in iterate_selected_dimensions():
-        is_angle = isinstance(d, DIMENSIONS_CLASSES_ANGLE)
-        nv = dt.NominalValue
-        nt: KAPI7.ITextLine = dt.NominalText
-        old = nt.Str
-
-        if is_angle:
-            x = nv
-            if is_angle_DMS:
-                if math_utils.do_floats_equal(x, 0):
-                    new = "0°"
-                else:
-                    # rounding in seconds
-                    x = round(math_utils.round_to_number(x * 3600, multiple * 3600, middle_coef))
-
-                    sign = -1 if x < 0 else +1
-                    x = abs(x)
-                    v = int(x / 3600)
-                    m = int(x / 60 - v * 60)
-                    s = int(x - v * 3600 - m * 60)
-
-                    new = f"{sign * v}°"
-                    if m != 0:
-                        new += f"{m}'"
-                    if s != 0:
-                        new += f"{s}\""
-
-                    vr = v + m/60 + s/3600
-            else:
-                new = math_utils.round_to_number_str(nv, multiple, middle_coef).replace(".", ",") + "°"
+def snapshot_dimensions(ds: list[KAPI7.IDrawingObject], fields: int, kinds: list[int] = None) -> DimensionSnapshot:
+    """
+        `kinds` - виды размеров (`DimensionKind`), если они уже известны.
+        Размеры считываются частями (`iterate_chunks`); при отмене операции
+        снимок содержит только считанные размеры.
+    """
+    if kinds is None:
+        kinds = [dimension_kinds.classify(d) for d in ds]
+    snapshot = DimensionSnapshot(fields)
+    for chunk in iterate_chunks(list(zip(ds, kinds))):
+        for d, kind in chunk:
+            snapshot.append(d, dimension_kinds.is_angle_kind(kind))
+    return snapshot
+
+
+def snapshot_selected_dimensions(doc: KAPI7.IKompasDocument2D, fields: int) -> DimensionSnapshot:
+    """
+        Снимок выделенных размеров. Если выделение не менялось с момента
+        предварительного чтения, размеры и их виды берутся из кэша, а свойства
+        всё равно считываются заново.
+    """
+    selection = get_selection_cache().get_selection(doc)
+    if selection is None:
+        selection = get_selected_dimensions_kinds(doc)
+    ds, kinds = selection
+    return snapshot_dimensions(ds, fields, kinds)
+
+
+def get_rounded_text(nv: float, is_angle: bool, multiple: float = 1, middle_coef: float = 0.5, is_angle_DMS: bool = True) -> str:
+    """ Возвращает текст размерной надписи для округленного значения `nv`. """
+    return number_formatter.get_formatter(multiple, middle_coef, is_angle_DMS).format(nv, is_angle)
+
+
+def get_rounded_texts(nvs: typing.Sequence[float], is_angles: typing.Sequence[bool], multiple: float = 1, middle_coef: float = 0.5, is_angle_DMS: bool = True) -> list[str]:
+    """ Пакетный вариант `get_rounded_text`. """
+    return number_formatter.get_formatter(multiple, middle_coef, is_angle_DMS).format_batch(nvs, is_angles)
+
+
+def execute_plan(doc: KAPI7.IKompasDocument2D, plan: DimensionPlan, dry_run: bool = False, is_interactive: bool = True) -> typing.Union[BatchStats, DimensionPlan]:
+    """ Применяет план изменений; при `dry_run` возвращает сам план, ничего не записывая. """
+    if dry_run:
+        return plan
+    if is_cancelled():
+        # снимок считан не полностью
+        stats = BatchStats()
+        stats.is_cancelled = True
+        return stats
+    if len(plan) > 0:
+        # записанные значения отличаются от снимка
+        get_selection_cache().invalidate()
+    return plan.apply(doc, is_interactive)
+
+
+def plan_rounding(snapshot: DimensionSnapshot, multiple: float = 1, middle_coef: float = 0.5, is_angle_DMS: bool = True) -> DimensionPlan:
+    plan = DimensionPlan(snapshot)
+    is_angles = [snapshot.is_angle(i) for i in range(len(snapshot))]
+    texts = get_rounded_texts(snapshot.nominal_values, is_angles, multiple, middle_coef, is_angle_DMS)
+    for i in range(len(snapshot)):
+        new = texts[i]
+        dt = snapshot.text(i)
+        is_auto = snapshot.is_auto(i)
+        plan.add(i, dt, "AutoNominalValue", is_auto, False)
+        # при автоопределении значения текущий текст не хранится, поэтому записываем всегда
+        plan.add(i, dt, "NominalText.Str", snapshot.nominal_text(i), new, force=is_auto)
+    return plan
+
+
+def round_selected_dimensions(multiple: float = 1, middle_coef: float = 0.5, is_angle_DMS: bool = True, dry_run: bool = False) -> typing.Union[BatchStats, DimensionPlan]:
+    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+    snapshot = snapshot_selected_dimensions(doc, SnapshotField.NominalValue | SnapshotField.NominalText | SnapshotField.AutoNominalValue)
+    plan = plan_rounding(snapshot, multiple, middle_coef, is_angle_DMS)
+    if not dry_run and len(plan) > 0:
+        dimension_index.invalidate_document_index(doc)
+    return execute_plan(doc, plan, dry_run)
+
+
+def plan_series_rounding(snapshot: DimensionSnapshot, series_name: str = "R40", middle_coef: float = 0.5) -> DimensionPlan:
+    """ Округление до чисел ряда предпочтительных чисел `series_name`. Угловые размеры не изменяются. """
+    series = preferred_numbers.get_series(series_name)
+    plan = DimensionPlan(snapshot)
+    for i in range(len(snapshot)):
+        if snapshot.is_angle(i):
+            continue
+        new = math_utils.round_tail_str(series.round(snapshot.nominal_value(i), middle_coef)).replace(".", ",")
+        dt = snapshot.text(i)
+        is_auto = snapshot.is_auto(i)
+        plan.add(i, dt, "AutoNominalValue", is_auto, False)
+        plan.add(i, dt, "NominalText.Str", snapshot.nominal_text(i), new, force=is_auto)
+    return plan
+
+
+def round_selected_dimensions_to_series(series_name: str = "R40", middle_coef: float = 0.5, dry_run: bool = False) -> typing.Union[BatchStats, DimensionPlan]:
+    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+    snapshot = snapshot_selected_dimensions(doc, SnapshotField.NominalValue | SnapshotField.NominalText | SnapshotField.AutoNominalValue)
+    plan = plan_series_rounding(snapshot, series_name, middle_coef)
+    if not dry_run and len(plan) > 0:
+        dimension_index.invalidate_document_index(doc)
+    return execute_plan(doc, plan, dry_run)
+
+
+def plan_remove_rounding(snapshot: DimensionSnapshot) -> DimensionPlan:
+    plan = DimensionPlan(snapshot)
+    for i in range(len(snapshot)):
+        plan.add(i, snapshot.text(i), "AutoNominalValue", snapshot.is_auto(i), True)
+    return plan
+
+
+def remove_rounding_in_selected_dimensions(dry_run: bool = False) -> typing.Union[BatchStats, DimensionPlan]:
+    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+    snapshot = snapshot_selected_dimensions(doc, SnapshotField.AutoNominalValue)
+    plan = plan_remove_rounding(snapshot)
+    if not dry_run and len(plan) > 0:
+        dimension_index.invalidate_document_index(doc)
+    return execute_plan(doc, plan, dry_run)
+
+
+def plan_set_star(snapshot: DimensionSnapshot, is_star: bool) -> DimensionPlan:
+    plan = DimensionPlan(snapshot)
+    for i in range(len(snapshot)):
+        old: str = snapshot.suffix(i)
+        if not is_star:
+            # убираем звездочку в конце
+            new = old[:old.find("*")] if "*" in old else old
         else:
-            new = math_utils.round_to_number_str(nv, multiple, middle_coef).replace(".", ",")
+            # добавляем звездочку в конце
+            new = old if old.endswith("*") else old + "*"
+        plan.add(i, snapshot.text(i), "Suffix.Str", old, new)
+    return plan
 
-        dt.AutoNominalValue = False
-        nt.Str = new
-        d.Update()
 
+def plan_toggle_star(snapshot: DimensionSnapshot) -> DimensionPlan:
+    if len(snapshot) == 0:
+        return DimensionPlan(snapshot)
+    has_star: bool = snapshot.suffix(0).endswith("*")
+    return plan_set_star(snapshot, not has_star)
 
-def remove_rounding_in_selected_dimensions() -> None:
-    for d, dt, dp in iterate_selected_dimensions():
-        dt.AutoNominalValue = True
-        d.Update()
 
+def toggle_star_in_selected_dimensions(dry_run: bool = False) -> typing.Union[BatchStats, DimensionPlan]:
+    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+    snapshot = snapshot_selected_dimensions(doc, SnapshotField.Suffix)
+    return execute_plan(doc, plan_toggle_star(snapshot), dry_run)
 
-def toggle_star_in_selected_dimensions() -> None:
-    ds = list(iterate_selected_dimensions())
-    if len(ds) == 0:
-        return
-    d0, dt0, dp0 = ds[0]
-    suffix0: str = dt0.Suffix.Str
-    has_star: bool = suffix0.endswith("*")
-
-    if has_star:
-        # убираем звездочку в конце
-        for d, dt, dp in ds:
-            old: str = dt.Suffix.Str
-            dt.Suffix.Str = old[:old.find("*")]
-            d.Update()
-    else:
-        # добавляем звездочку в конце
-        for d, dt, dp in ds:
-            old: str = dt.Suffix.Str
-            if not old.endswith("*"):
-                dt.Suffix.Str = old + "*"
-                d.Update()
 
+def plan_sign(snapshot: DimensionSnapshot, sign: DimensionSign) -> DimensionPlan:
+    plan = DimensionPlan(snapshot)
+    for i in range(len(snapshot)):
+        plan.add(i, snapshot.text(i), "Sign", snapshot.sign(i), sign)
+    return plan
 
 
-def set_sign_in_selected_dimensions(sign: DimensionSign) -> None:
-    for d, dt, dp in iterate_selected_dimensions():
-        dt.Sign = sign
-        d.Update()
+def set_sign_in_selected_dimensions(sign: DimensionSign, dry_run: bool = False) -> typing.Union[BatchStats, DimensionPlan]:
+    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+    snapshot = snapshot_selected_dimensions(doc, SnapshotField.Sign)
+    return execute_plan(doc, plan_sign(snapshot, sign), dry_run)
 
 
 
-def get_selected_dimensions(doc: KAPI7.IKompasDocument2D) -> list[KAPI7.IDrawingObject]:
-    active_doc = KAPI7.IKompasDocument2D1(doc)
-    sm: KAPI7.ISelectionManager = active_doc.SelectionManager
-    s_objs: typing.Iterable[KAPI7.IKompasAPIObject] = [sm.SelectedObjects] if not isinstance(sm.SelectedObjects, tuple) else sm.SelectedObjects
+def get_selected_dimensions_kinds(doc: KAPI7.IKompasDocument2D) -> tuple[list[KAPI7.IDrawingObject], list[int]]:
+    """ Возвращает выделенные размеры и их виды. """
+    s_objs: typing.Iterable[KAPI7.IKompasAPIObject] = get_backend().selected_objects(doc)
+    return dimension_kinds.split_dimensions(s_objs)
 
-    dms: list[KAPI7.IDrawingObject] = []
 
-    for obj in s_objs:
-        if isinstance(obj, DIMENSIONS_CLASSES):
-            dms.append(obj)
-    return dms
+def get_selected_dimensions(doc: KAPI7.IKompasDocument2D) -> list[KAPI7.IDrawingObject]:
+    return get_selected_dimensions_kinds(doc)[0]
 
 
-def switch_remote_lines_in_selected_dimensions() -> None:
-    ds = list(iterate_selected_dimensions())
-    if len(ds) == 0:
-        return
-    d0, dt0, dp0 = ds[0]
+def plan_switch_remote_lines(snapshot: DimensionSnapshot) -> DimensionPlan:
+    plan = DimensionPlan(snapshot)
+    if len(snapshot) == 0:
+        return plan
 
-    state = 0b10 * int(dp0.RemoteLine1) + 0b01 * int(dp0.RemoteLine2)
+    rl1, rl2 = snapshot.remote_lines(0)
+    state = 0b10 * int(rl1) + 0b01 * int(rl2)
     states = [0b11, 0b10, 0b01, 0b00]
     next_i = (find_in_list(state, states, -1) + 1) % len(states)
     next_state = states[next_i]
 
-    for d, dt, dp in ds:
-        dp.RemoteLine1 = bool(0b10 & next_state)
-        dp.RemoteLine2 = bool(0b01 & next_state)
-        d.Update()
+    for i in range(len(snapshot)):
+        dp = snapshot.params(i)
+        rl1, rl2 = snapshot.remote_lines(i)
+        plan.add(i, dp, "RemoteLine1", rl1, bool(0b10 & next_state))
+        plan.add(i, dp, "RemoteLine2", rl2, bool(0b01 & next_state))
+    return plan
 
 
-def switch_arrows_in_selected_dimensions() -> None:
-    ds = list(iterate_selected_dimensions())
-    if len(ds) == 0:
-        return
-    d0, dt0, dp0 = ds[0]
+def switch_remote_lines_in_selected_dimensions(dry_run: bool = False) -> typing.Union[BatchStats, DimensionPlan]:
+    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+    snapshot = snapshot_selected_dimensions(doc, SnapshotField.RemoteLines)
+    return execute_plan(doc, plan_switch_remote_lines(snapshot), dry_run)
+
 
-    print(dp0.ArrowType1, dp0.ArrowType2)
+def plan_switch_arrows(snapshot: DimensionSnapshot) -> DimensionPlan:
+    plan = DimensionPlan(snapshot)
+    if len(snapshot) == 0:
+        return plan
 
-    state = 0b10 * int(2 != dp0.ArrowType1) + 0b01 * int(2 != dp0.ArrowType2)
+    at1, at2 = snapshot.arrow_types(0)
+    state = 0b10 * int(2 != at1) + 0b01 * int(2 != at2)
     states = [0b00, 0b10, 0b01, 0b11]
     next_i = (find_in_list(state, states, -1) + 1) % len(states)
     next_state = states[next_i]
 
-    for d, dt, dp in ds:
-        dp.ArrowType1 = 2 + 3 * int(bool(0b10 & next_state))
-        dp.ArrowType2 = 2 + 3 * int(bool(0b01 & next_state))
-        d.Update()
-
-
-def get_all_dimensions(filter_function = lambda dim: True) -> list[KAPI7.IKompasAPIObject]:
-    dims: list[KAPI7.IKompasAPIObject] = []
-
-    doc2d: KAPI7.IKompasDocument2D = open_doc2d("")
-    vlm = KAPI7.IViewsAndLayersManager = doc2d.ViewsAndLayersManager
-    vs: KAPI7.IViews = vlm.Views
+    for i in range(len(snapshot)):
+        dp = snapshot.params(i)
+        at1, at2 = snapshot.arrow_types(i)
+        plan.add(i, dp, "ArrowType1", at1, 2 + 3 * int(bool(0b10 & next_state)))
+        plan.add(i, dp, "ArrowType2", at2, 2 + 3 * int(bool(0b01 & next_state)))
+    return plan
 
-    for i in range(vs.Count):
-        v: KAPI7.IView = vs.View(i)
-        sc = KAPI7.ISymbols2DContainer(v)
-
-        linedims: KAPI7.ILineDimensions = sc.LineDimensions
-        for j in range(linedims.Count):
-            dim = linedims.LineDimension(j)
-            if filter_function(dim):
-                dims.append(dim)
 
-        radialdims: KAPI7.IRadialDimensions = sc.RadialDimensions
-        for j in range(radialdims.Count):
-            dim = radialdims.RadialDimension(j)
-            if filter_function(dim):
-                dims.append(dim)
+def switch_arrows_in_selected_dimensions(dry_run: bool = False) -> typing.Union[BatchStats, DimensionPlan]:
+    doc: KAPI7.IKompasDocument2D = open_doc2d("")
+    snapshot = snapshot_selected_dimensions(doc, SnapshotField.ArrowTypes)
+    return execute_plan(doc, plan_switch_arrows(snapshot), dry_run)
 
-        angledims: KAPI7.IAngleDimensions = sc.AngleDimensions
-        for j in range(angledims.Count):
-            dim = angledims.AngleDimension(j)
-            if filter_function(dim):
-                dims.append(dim)
 
-        arcdims: KAPI7.IArcDimensions = sc.ArcDimensions
-        for j in range(arcdims.Count):
-            dim = arcdims.ArcDimension(j)
-            if filter_function(dim):
-                dims.append(dim)
+def get_all_dimensions(filter_function = lambda dim: True) -> list[KAPI7.IKompasAPIObject]:
+    return get_document_dimensions(open_doc2d(""), filter_function)
 
-        breaklinedims: KAPI7.IBreakLineDimensions = sc.BreakLineDimensions
-        for j in range(breaklinedims.Count):
-            dim = breaklinedims.BreakLineDimension(j)
-            if filter_function(dim):
-                dims.append(dim)
 
-        breakradialdims: KAPI7.IBreakRadialDimensions = sc.BreakRadialDimensions
-        for j in range(breakradialdims.Count):
-            dim = breakradialdims.BreakRadialDimension(j)
-            if filter_function(dim):
-                dims.append(dim)
+def get_document_dimensions(doc2d: KAPI7.IKompasDocument2D, filter_function = lambda dim: True) -> list[KAPI7.IKompasAPIObject]:
+    dims: list[KAPI7.IKompasAPIObject] = []
 
-        diamdims: KAPI7.IDiametralDimensions = sc.DiametralDimensions
-        for j in range(diamdims.Count):
-            dim = diamdims.DiametralDimension(j)
-            if filter_function(dim):
-                dims.append(dim)
+    vs: KAPI7.IViews = dimension_index.get_views(doc2d)
 
-        heightdims: KAPI7.IHeightDimensions = sc.HeightDimensions
-        for j in range(heightdims.Count):
-            dim = heightdims.HeightDimension(j)
+    for i in range(vs.Count):
+        v: KAPI7.IView = vs.View(i)
+        for type_, dim in dimension_index.iterate_view_dimensions(v):
             if filter_function(dim):
                 dims.append(dim)
 
@@ -249,7 +295,7 @@ def get_all_dimensions(filter_function = lambda dim: True) -> list[KAPI7.IKompas
 
 
 def check_if_dimension_not_auto(d) -> bool:
-    dt: KAPI7.IDimensionText = KAPI7.IDimensionText(d)
+    dt: KAPI7.IDimensionText = get_backend().dimension_text(d)
     return not dt.AutoNominalValue
 
 
@@ -258,14 +304,19 @@ def select_rounded_dimensions() -> None:
 
     dims = get_selected_dimensions(doc)
     if len(dims) == 0:
-        dims = get_all_dimensions()
+        index = dimension_index.get_document_index(doc)
+        index.refresh(doc)
+        dims = index.get_manual_dimensions()
+    else:
+        dims = [dim for chunk in iterate_chunks(dims) for dim in chunk if check_if_dimension_not_auto(dim)]
+    if is_cancelled():
+        return
 
-    active_doc = KAPI7.IKompasDocument2D1(doc)
-    sm: KAPI7.ISelectionManager = active_doc.SelectionManager
+    sm: KAPI7.ISelectionManager = get_backend().selection_manager(doc)
     sm.UnselectAll()
 
-    for dim in dims:
-        if check_if_dimension_not_auto(dim):
+    for chunk in iterate_chunks(dims):
+        for dim in chunk:
             sm.Select(dim)
 
 
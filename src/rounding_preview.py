@@ -0,0 +1,99 @@
+"""
+    Предпросмотр округления выделенных размеров.
+
+    Новые тексты для трёх вариантов округления (вниз, до ближайшего, вверх)
+    вычисляются по значениям, считанным заранее (`selection_cache.SelectionValues`),
+    без обращения к Компасу. Результаты запоминаются по кратности, поэтому при
+    прокрутке кратности колёсиком мыши туда и обратно уже вычисленные варианты
+    не пересчитываются.
+"""
+
+import collections
+
+import src.math_utils as math_utils
+import src.number_formatter as number_formatter
+from src.selection_cache import SelectionValues
+
+
+# варианты округления: (название, коэффициент середины)
+ROUNDING_MODES = (
+    ("вниз", 0),
+    ("ближ.", 0.5),
+    ("вверх", 1),
+)
+
+# допустимые кратности (как в поле ввода кратности): `MIN_MULTIPLE < multiple < MAX_MULTIPLE`
+MIN_MULTIPLE = 10 ** -12
+MAX_MULTIPLE = 10 ** 9
+
+# количество кратностей, для которых хранятся вычисленные тексты
+CACHED_MULTIPLES_COUNT = 32
+
+# отметка значения, вычисленного Компасом (при автоопределении): Компас показывает
+# его по своим настройкам точности, поэтому реальный текст надписи неизвестен
+COMPUTED_VALUE_MARK = "≈"
+
+
+def is_valid_multiple(multiple: float) -> bool:
+    """ Проверяет кратность; при нулевой, отрицательной, бесконечной кратности или `nan` округление невозможно. """
+    return MIN_MULTIPLE < multiple < MAX_MULTIPLE
+
+
+class RoundingPreview:
+    def __init__(self, values: SelectionValues) -> None:
+        self.values = values
+        # текст ручного ввода или отмеченное значение; значение с отметкой
+        # не совпадает ни с одним новым текстом, так как при округлении
+        # автоопределение снимается и текст записывается всегда
+        self.old_texts: list[str] = [
+            COMPUTED_VALUE_MARK + math_utils.round_tail_str(nv).replace(".", ",") if text is None else text
+            for nv, text in zip(values.nominal_values, values.texts)
+        ]
+        self._results: collections.OrderedDict[tuple[float, bool], list[list[str]]] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get_texts(self, multiple: float, is_angle_DMS: bool = True) -> list[list[str]]:
+        """ Новые тексты всех размеров: по списку на каждый вариант из `ROUNDING_MODES`. """
+        if not is_valid_multiple(multiple):
+            raise Exception(f"Недопустимая кратность: {multiple}")
+        key = (multiple, is_angle_DMS)
+        texts = self._results.get(key)
+        if texts is None:
+            texts = [
+                number_formatter.get_formatter(multiple, middle_coef, is_angle_DMS).format_batch(self.values.nominal_values, self.values.is_angles)
+                for name, middle_coef in ROUNDING_MODES
+            ]
+            self._results[key] = texts
+            if len(self._results) > CACHED_MULTIPLES_COUNT:
+                self._results.popitem(last=False)
+        else:
+            self._results.move_to_end(key)
+        return texts
+
+    def get_changed_counts(self, multiple: float, is_angle_DMS: bool = True) -> list[int]:
+        """ Количество размеров, текст которых изменится, для каждого варианта округления. """
+        return [
+            sum(1 for old, new in zip(self.old_texts, texts) if old != new)
+            for texts in self.get_texts(multiple, is_angle_DMS)
+        ]
+
+    def format_table(self, multiple: float, is_angle_DMS: bool = True, rows_count: int = 3) -> str:
+        """ Таблица "старый текст: новые тексты" для первых `rows_count` размеров. """
+        if len(self) == 0:
+            return "Размеры не выделены"
+        if not is_valid_multiple(multiple):
+            return "Недопустимая кратность"
+        texts = self.get_texts(multiple, is_angle_DMS)
+        width = max(len(self.old_texts[i]) for i in range(min(rows_count, len(self))))
+        lines = ["{:>{}}  ".format("", width) + " ".join(f"{name:>8}" for name, middle_coef in ROUNDING_MODES)]
+        for i in range(min(rows_count, len(self))):
+            lines.append(f"{self.old_texts[i]:>{width}}: " + " ".join(f"{mode_texts[i]:>8}" for mode_texts in texts))
+        if len(self) > rows_count:
+            lines.append(f"... ещё {len(self) - rows_count}")
+        counts = self.get_changed_counts(multiple, is_angle_DMS)
+        lines.append(f"изменится из {len(self)}: " + ", ".join(
+            f"{name} {count}" for (name, middle_coef), count in zip(ROUNDING_MODES, counts)
+        ))
+        return "\n".join(lines)
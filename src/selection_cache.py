@@ -0,0 +1,157 @@
+"""
+    Снимок выделенных размеров, подготовленный до нажатия кнопки.
+
+    При изменении выделения (событие Компаса, см.
+    `KompasBackend.subscribe_selection_changes`) окно с задержкой ставит в
+    очередь рабочего потока `prefetch()`: выделенные размеры классифицируются,
+    и все их свойства считываются в снимок для предпросмотра. Операция,
+    выполняемая затем в том же потоке, получает через `get_selection()` уже
+    классифицированные размеры, если выделение с тех пор не менялось, но их
+    свойства считывает заново: значения могли измениться и без изменения
+    выделения (отмена действия, правка в Компасе), а план записывает только
+    отличия от снимка. Если события недоступны или выделение изменилось,
+    размеры находятся как раньше, при нажатии.
+"""
+
+from __future__ import annotations
+import threading
+import time
+import typing
+
+from src.backend import get_backend
+import src.dimension_kinds as dimension_kinds
+from src.dimension_snapshot import DimensionSnapshot, SnapshotField
+
+if typing.TYPE_CHECKING:
+    from src.HEAD import KAPI7
+
+
+# свойства, считываемые заранее: те, что нужны для предпросмотра округления
+PREFETCH_FIELDS = SnapshotField.NominalValue | SnapshotField.NominalText | SnapshotField.AutoNominalValue
+
+# время в секундах, после которого выделение не используется: объекты размеров
+# могут стать недействительными и без события изменения выделения
+MAX_SNAPSHOT_AGE = 60.0
+
+
+class SelectionValues:
+    """
+        Значения выделенных размеров без COM-объектов: их можно передать
+        в поток окна (например, для предпросмотра округления).
+        `texts[i]` - текст ручного ввода или `None` при автоопределении значения.
+    """
+    __slots__ = ("nominal_values", "is_angles", "texts")
+
+    def __init__(self, snapshot: DimensionSnapshot) -> None:
+        self.nominal_values: list[float] = list(snapshot.nominal_values)
+        self.is_angles: list[bool] = [snapshot.is_angle(i) for i in range(len(snapshot))]
+        self.texts: list[str] = [
+            None if snapshot.is_auto(i) else snapshot.nominal_text(i)
+            for i in range(len(snapshot))
+        ]
+
+    def __len__(self) -> int:
+        return len(self.nominal_values)
+
+
+class CachedSelection:
+    __slots__ = ("generation", "thread_id", "doc_reference", "dims", "kinds", "time")
+
+    def __init__(self, generation: int, doc_reference: int, dims: list[KAPI7.IDrawingObject], kinds: list[int]) -> None:
+        self.generation = generation
+        self.thread_id = threading.get_ident()
+        # обёртки документа могут быть разными объектами (например, при трассировке COM-вызовов)
+        self.doc_reference = doc_reference
+        self.dims = dims
+        self.kinds = kinds
+        self.time = time.perf_counter()
+
+
+class SelectionCache:
+    """
+        Выделенные размеры активного документа и их виды.
+
+        Каждое изменение выделения увеличивает номер поколения
+        (`invalidate`); выделение используется, только если оно считано в том
+        же поколении, в том же потоке и для того же документа.
+    """
+    def __init__(self) -> None:
+        self.is_enabled: bool = False
+        self._lock = threading.Lock()
+        self._generation: int = 0
+        self._entry: CachedSelection = None
+
+        self.prefetches_count: int = 0
+        self.hits_count: int = 0
+        self.misses_count: int = 0
+
+    def set_enabled(self, is_enabled: bool) -> None:
+        """ Снимки создаются только при подписке на события выделения: иначе их нельзя вовремя сбросить. """
+        self.is_enabled = is_enabled
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entry = None
+
+    def prefetch(self, doc: KAPI7.IKompasDocument2D = None) -> SelectionValues:
+        """ Считывает выделенные размеры активного документа в снимок. Возвращает их значения. """
+        if not self.is_enabled:
+            return None
+        with self._lock:
+            generation = self._generation
+
+        backend = get_backend()
+        if doc is None:
+            doc = backend.open_doc2d("")
+        ds, kinds = dimension_kinds.split_dimensions(backend.selected_objects(doc))
+        snapshot = DimensionSnapshot(PREFETCH_FIELDS)
+        for d, kind in zip(ds, kinds):
+            snapshot.append(d, dimension_kinds.is_angle_kind(kind))
+        doc_reference: int = doc.Reference
+
+        with self._lock:
+            # выделение изменилось во время чтения - снимок уже устарел
+            if generation == self._generation:
+                self._entry = CachedSelection(generation, doc_reference, ds, kinds)
+                self.prefetches_count += 1
+            else:
+                return None
+        return SelectionValues(snapshot)
+
+    def get_selection(self, doc: KAPI7.IKompasDocument2D) -> tuple[list[KAPI7.IDrawingObject], list[int]]:
+        """
+            Возвращает выделенные размеры `doc` и их виды или `None`, если
+            выделение изменилось. Свойства размеров перед записью нужно
+            считать заново.
+        """
+        with self._lock:
+            entry = self._entry
+            is_valid = not entry is None \
+                and entry.generation == self._generation \
+                and entry.thread_id == threading.get_ident() \
+                and time.perf_counter() - entry.time < MAX_SNAPSHOT_AGE
+        # вызов API - вне блокировки
+        if is_valid:
+            is_valid = entry.doc_reference == doc.Reference
+        with self._lock:
+            if is_valid and entry.generation == self._generation:
+                self.hits_count += 1
+                return (entry.dims, entry.kinds)
+            if self.is_enabled:
+                self.misses_count += 1
+            return None
+
+    def __str__(self) -> str:
+        return f"Selection cache: {self.prefetches_count} prefetches, {self.hits_count} hits, {self.misses_count} misses"
+
+
+_cache: SelectionCache = None
+
+
+def get_selection_cache() -> SelectionCache:
+    global _cache
+    if _cache is None:
+        _cache = SelectionCache()
+    return _cache
@@ -0,0 +1,181 @@
+"""
+    Профилирование запуска программы.
+
+    Включается ключом `--profile-startup` или переменной окружения
+    `ROMASHKI_PROFILE_STARTUP` (значение `cprofile` или ключ
+    `--profile-startup-cprofile` дополнительно включают `cProfile`).
+    Записывается время каждого этапа запуска (`phase`) и каждого импорта
+    модуля, занявшего больше `MIN_IMPORT_TIME`. Отчёт сохраняется в JSON
+    рядом с файлом настроек (`startup_profile.json`) и дописывается строкой
+    в историю `startup_profiles.jsonl`, а данные `cProfile` - в `startup_profile.prof`.
+
+    Модуль импортируется первым, поэтому сам не импортирует ничего тяжёлого.
+"""
+
+import builtins
+import contextlib
+import os
+import sys
+import time
+
+
+PROFILE_ENV_VARIABLE = "ROMASHKI_PROFILE_STARTUP"
+PROFILE_ARGUMENT = "--profile-startup"
+CPROFILE_ARGUMENT = "--profile-startup-cprofile"
+
+# импорты быстрее этого времени (с) в отчёт не попадают
+MIN_IMPORT_TIME = 0.001
+
+REPORT_FILENAME = "startup_profile.json"
+HISTORY_FILENAME = "startup_profiles.jsonl"
+CPROFILE_FILENAME = "startup_profile.prof"
+
+
+def is_enabled_by_arguments(argv: list[str] = None) -> bool:
+    argv = sys.argv if argv is None else argv
+    return PROFILE_ARGUMENT in argv or CPROFILE_ARGUMENT in argv
+
+
+def is_enabled_by_environment() -> bool:
+    return os.getenv(PROFILE_ENV_VARIABLE, "") not in ("", "0")
+
+
+def is_cprofile_requested(argv: list[str] = None) -> bool:
+    argv = sys.argv if argv is None else argv
+    return CPROFILE_ARGUMENT in argv or os.getenv(PROFILE_ENV_VARIABLE, "").lower() == "cprofile"
+
+
+class StartupProfiler:
+    """
+        Время этапов запуска и импортов модулей, отсчитываемое от `start_time`
+        (`time.perf_counter()` в начале `main.py`).
+    """
+    def __init__(self, start_time: float, use_cprofile: bool = False) -> None:
+        self.start_time = start_time
+        # (этап, начало, длительность), с
+        self.phases: list[tuple[str, float, float]] = []
+        # (модуль, вложенность, длительность вместе с вложенными импортами), с
+        self.imports: list[tuple[str, int, float]] = []
+        self.marks: dict[str, float] = {}
+
+        self._import_depth = 0
+        self._original_import = None
+        self._cprofile = None
+        if use_cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def start(self) -> None:
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        if not self._cprofile is None:
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        if not self._cprofile is None:
+            self._cprofile.disable()
+        if not self._original_import is None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # учитываются только модули, которые ещё не загружены
+        if level != 0 or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        depth = self._import_depth
+        self._import_depth += 1
+        t0 = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._import_depth = depth
+            if elapsed >= MIN_IMPORT_TIME:
+                self.imports.append((name, depth, elapsed))
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, t0 - self.start_time, time.perf_counter() - t0))
+
+    def mark(self, name: str, t: float = None) -> None:
+        """ Отмечает момент `t` (по умолчанию - текущий), например, первую отрисовку окна. """
+        self.marks[name] = (time.perf_counter() if t is None else t) - self.start_time
+
+    def get_report(self, extra_import_times: dict[str, float] = {}) -> dict:
+        return {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version,
+            "platform": sys.platform,
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "executable": sys.executable,
+            "total_ms": round((time.perf_counter() - self.start_time) * 1000, 1),
+            "marks_ms": {name: round(t * 1000, 1) for name, t in self.marks.items()},
+            "phases": [
+                {"name": name, "start_ms": round(start * 1000, 1), "duration_ms": round(duration * 1000, 1)}
+                for name, start, duration in self.phases
+            ],
+            "imports": [
+                {"module": name, "depth": depth, "duration_ms": round(duration * 1000, 1)}
+                for name, depth, duration in self.imports
+            ] + [
+                {"module": name, "depth": 0, "duration_ms": round(duration * 1000, 1), "lazy": True}
+                for name, duration in extra_import_times.items()
+            ],
+        }
+
+    def save(self, folder: str, extra_import_times: dict[str, float] = {}) -> str:
+        """ Сохраняет отчёт (и данные `cProfile`) в папку `folder`. Возвращает путь к отчёту. """
+        import json
+
+        self.stop()
+        report = self.get_report(extra_import_times)
+        os.makedirs(folder, exist_ok=True)
+        report_path = os.path.join(folder, REPORT_FILENAME)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(os.path.join(folder, HISTORY_FILENAME), "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+        if not self._cprofile is None:
+            self._cprofile.dump_stats(os.path.join(folder, CPROFILE_FILENAME))
+        return report_path
+
+    def summary(self) -> str:
+        lines = [f"Startup profile, ms from start:"]
+        for name, start, duration in self.phases:
+            lines.append(f"    {name:>24}: {start * 1000:8.1f} +{duration * 1000:8.1f}")
+        for name, t in self.marks.items():
+            lines.append(f"    {name:>24}: {t * 1000:8.1f}")
+        for name, depth, duration in self.imports:
+            if depth == 0:
+                lines.append(f"    {'import ' + name:>24}: {duration * 1000:8.1f}")
+        return "\n".join(lines)
+
+
+_profiler: StartupProfiler = None
+
+
+def get_profiler() -> StartupProfiler:
+    """ Возвращает профилировщик запуска или `None`, если профилирование не включено. """
+    return _profiler
+
+
+def enable(start_time: float, use_cprofile: bool = False) -> StartupProfiler:
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler(start_time, use_cprofile)
+        _profiler.start()
+    return _profiler
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """ Этап запуска; если профилирование не включено, ничего не делает. """
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.phase(name):
+            yield
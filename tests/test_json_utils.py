@@ -0,0 +1,62 @@
+import json
+
+from src.json_utils import CLASS_NAME_KEY, JSONable, JSONCodec, save_json, load_json_with_classes
+
+
+class Point(JSONable):
+    __slots__ = ("x", "y", "_cache")
+
+    def __init__(self, x: float = 0, y: float = 0) -> None:
+        self.x = x
+        self.y = y
+        self._cache = None
+
+
+class Private(JSONable):
+    __slots__ = ("_a", )
+
+    def __init__(self) -> None:
+        self._a = 1
+
+
+class Item(JSONable):
+    def __init__(self, name: str = "", points: list = None) -> None:
+        self.name = name
+        self.points = [] if points is None else points
+        self._hidden = 0
+
+
+class Versioned(JSONable):
+    def __init__(self) -> None:
+        self.value = 1
+
+    def to_json_base(self):
+        d = super().to_json_base()
+        d["version"] = 2
+        return d
+
+
+def test_round_trip():
+    codec = JSONCodec([Point, Item])
+    item = Item("a", [Point(1, 2), Point(3.5, -1)])
+    decoded = codec.loads(codec.dumps({"item": item, "n": 10}))
+    assert decoded["n"] == 10
+    assert decoded["item"].name == "a"
+    assert [(p.x, p.y) for p in decoded["item"].points] == [(1, 2), (3.5, -1)]
+    assert not "_hidden" in json.loads(codec.dumps(item))
+
+
+def test_private_slots_only():
+    assert json.loads(JSONCodec().dumps(Private())) == { CLASS_NAME_KEY: "Private" }
+    assert isinstance(JSONCodec([Private]).loads(JSONCodec().dumps(Private())), Private)
+
+
+def test_to_json_base_is_called():
+    assert json.loads(JSONCodec().dumps(Versioned())) == { CLASS_NAME_KEY: "Versioned", "version": 2, "value": 1 }
+
+
+def test_save_json(tmp_path):
+    path = str(tmp_path / "item.json")
+    save_json(path, Item("b", [Point(1, 1)]))
+    item = load_json_with_classes(path, [Item, Point])
+    assert item.name == "b" and item.points[0].x == 1
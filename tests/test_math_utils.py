@@ -0,0 +1,78 @@
+from fractions import Fraction
+import math
+import random
+
+import src.math_utils as math_utils
+from src.math_utils import round_tail, round_to_number, round_to_number_exact, to_fraction
+
+
+MULTIPLES = [0.01, 0.05, 0.1, 0.2, 0.25, 0.5, 1, 2, 2.5, 5, 10, 10 / 12, 10 / 6, 100 / 24, 100 / 12, 1 / 3600, 5 / 60]
+MIDDLE_COEFFICIENTS = [0, 0.25, 0.5, 1]
+
+
+def round_to_number_fraction(x: float, number: float, middle_coefficient: float = 0.5) -> float:
+    """ Reference implementation of `round_to_number_exact` in rationals. """
+    if math_utils.do_floats_equal(x, 0):
+        return 0.0
+    sign = -1 if x < 0 else +1
+    xf = Fraction(repr(round_tail(abs(x))))
+    nf = to_fraction(number)
+    q = math.floor((xf + to_fraction(middle_coefficient) * nf) / nf)
+    return round_tail(sign * float(q * nf)) + 0.0
+
+
+def random_cases(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        number = rnd.choice(MULTIPLES)
+        middle_coefficient = rnd.choice(MIDDLE_COEFFICIENTS)
+        if rnd.random() < 0.5:
+            # значения, лежащие ровно на границе округления или на кратном
+            x = (rnd.randint(-10000, 10000) + rnd.choice([0, 1 - middle_coefficient])) * number
+            x = float(repr(round_tail(x)))
+        else:
+            x = rnd.choice([1, -1]) * 10 ** rnd.uniform(-2, 4)
+        yield (x, number, middle_coefficient)
+
+
+def test_examples():
+    assert round_to_number_exact(0.3, 0.1, 0) == 0.3
+    assert round_to_number(0.3, 0.1, 0) == 0.2
+    assert round_to_number_exact(3.75, 1, 0.25) == 4
+    assert round_to_number_exact(3.7499999, 1, 0.25) == 3
+    assert round_to_number_exact(-2.5, 1, 0.5) == -3
+    assert round_to_number_exact(2.4999999, 1, 0.5) == 2
+    assert round_to_number_exact(100 / 24 * 7, 100 / 24, 0) == round_tail(100 / 24 * 7)
+    assert round_to_number_exact(0.00000001, 1, 1) == 0.0
+
+
+def test_negative_zero():
+    assert math.copysign(1, round_to_number_exact(-0.2, 1, 0.5)) == 1
+
+
+def test_matches_fraction_reference():
+    round_to_number_exact.cache_clear()
+    for x, number, middle_coefficient in random_cases(50000):
+        expected = round_to_number_fraction(x, number, middle_coefficient)
+        assert round_to_number_exact(x, number, middle_coefficient) == expected, (x, number, middle_coefficient)
+
+
+def test_agrees_with_float_version_except_at_boundaries():
+    """ Float version can be wrong only at rounding boundaries. """
+    for x, number, middle_coefficient in random_cases(50000, seed=1):
+        exact = round_to_number_exact(x, number, middle_coefficient)
+        if exact == round_to_number(x, number, middle_coefficient):
+            continue
+        t = (to_fraction(abs(x)) + to_fraction(middle_coefficient) * to_fraction(number)) / to_fraction(number)
+        assert abs(t - round(t)) <= Fraction(1, 10 ** 5), (x, number, middle_coefficient)
+
+
+def test_array_matches_scalar():
+    cases = list(random_cases(2000, seed=2))
+    for number in (0.1, 0.5, 100 / 24):
+        for middle_coefficient in MIDDLE_COEFFICIENTS:
+            xs = [x for x, n, c in cases]
+            for exact, function in ((False, round_to_number), (True, round_to_number_exact)):
+                values, strings = math_utils.round_to_number_str_batch(xs, number, middle_coefficient, exact)
+                assert list(values) == [function(x, number, middle_coefficient) for x in xs]
+                assert strings == [math_utils.round_tail_str(function(x, number, middle_coefficient)) for x in xs]
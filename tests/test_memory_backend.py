@@ -0,0 +1,170 @@
+"""
+    Количество вызовов API на размер для каждой операции на модели в памяти.
+    Рост количества вызовов (например, повторное чтение свойств или запись
+    неизменившихся значений) должен приводить к падению теста.
+"""
+
+import pytest
+
+import src.backend as backend_module
+import src.math_utils as math_utils
+import src.dimension_index as dimension_index
+from src.dimension_batch import BatchProgress, set_progress
+import src.round_dimensions as round_dimensions
+from src.memory_backend import ANGLE_DIMENSION_KINDS, MemoryBackend, create_random_document, select_all
+from src.preferred_numbers import get_series
+from src.selection_cache import get_selection_cache
+
+
+DIMENSIONS_COUNT = 500
+
+# вызовы, не зависящие от количества размеров (выделение, документ, обновление окна)
+CONSTANT_CALLS = 20
+
+
+@pytest.fixture
+def backend():
+    previous = backend_module._backend
+    backend = MemoryBackend()
+    backend_module.set_backend(backend)
+    get_selection_cache().set_enabled(False)
+    # ссылки документов новой модели совпадают со ссылками документов предыдущих тестов
+    dimension_index._indices.clear()
+    yield backend
+    backend_module.set_backend(previous)
+
+
+def count_calls(backend: MemoryBackend, operation) -> float:
+    backend.reset_calls_count()
+    operation()
+    return (backend.calls_count - CONSTANT_CALLS) / DIMENSIONS_COUNT
+
+
+# (операция, не больше вызовов на размер); операции выполняются по порядку
+# на одном документе, поэтому "round again" ничего не записывает
+OPERATIONS = [
+    ("round", lambda: round_dimensions.round_selected_dimensions(1, 0.5, True), 9),
+    ("round again", lambda: round_dimensions.round_selected_dimensions(1, 0.5, True), 5),
+    ("remove rounding", lambda: round_dimensions.remove_rounding_in_selected_dimensions(), 4),
+    ("toggle star", lambda: round_dimensions.toggle_star_in_selected_dimensions(), 6),
+    ("set sign", lambda: round_dimensions.set_sign_in_selected_dimensions(round_dimensions.DimensionSign.Diameter), 4),
+    ("switch remote lines", lambda: round_dimensions.switch_remote_lines_in_selected_dimensions(), 5),
+    ("switch arrows", lambda: round_dimensions.switch_arrows_in_selected_dimensions(), 5),
+    ("select rounded", lambda: round_dimensions.select_rounded_dimensions(), 2),
+]
+
+
+def test_calls_per_dimension(backend):
+    doc = create_random_document(backend, 10, DIMENSIONS_COUNT // 10, DIMENSIONS_COUNT // 10)
+    for name, operation, max_calls in OPERATIONS:
+        select_all(doc)
+        assert count_calls(backend, operation) <= max_calls, name
+
+
+def test_round_again_does_not_write(backend):
+    doc = create_random_document(backend, 10, DIMENSIONS_COUNT // 10)
+    select_all(doc)
+    round_dimensions.round_selected_dimensions(0.5)
+    stats = round_dimensions.round_selected_dimensions(0.5)
+    assert stats.writes_count == 0
+
+
+def test_prefetched_selection(backend):
+    """ После предварительного чтения операция не находит выделенные размеры заново, но свойства считывает. """
+    doc = create_random_document(backend, 10, DIMENSIONS_COUNT // 10, DIMENSIONS_COUNT // 10)
+    cache = get_selection_cache()
+    cache.set_enabled(True)
+    try:
+        select_all(doc)
+        cache.prefetch()
+        assert count_calls(backend, lambda: round_dimensions.round_selected_dimensions(1, 0.5, True)) <= 9
+        assert cache.hits_count > 0
+    finally:
+        cache.set_enabled(False)
+
+
+def test_select_rounded_without_selection(backend):
+    """
+        Выделение размеров по индексу документа: при повторном обращении
+        считываются только свойства размеров (и количества размеров в видах).
+    """
+    doc = create_random_document(backend, 10, DIMENSIONS_COUNT // 10, DIMENSIONS_COUNT // 10)
+    assert count_calls(backend, round_dimensions.select_rounded_dimensions) <= 2.7
+    assert count_calls(backend, round_dimensions.select_rounded_dimensions) <= 2.4
+
+
+class CancellingProgress(BatchProgress):
+    """ Отменяет операцию после первой части размеров. """
+    def report(self, done_count: int, total_count: int) -> None:
+        self.cancel()
+
+
+def test_cancel_while_reading(backend):
+    """ Отмена при чтении снимка: размеры не записываются, остальные не считываются. """
+    doc = create_random_document(backend, 10, DIMENSIONS_COUNT // 10)
+    select_all(doc)
+    set_progress(CancellingProgress())
+    try:
+        calls = count_calls(backend, lambda: round_dimensions.round_selected_dimensions(0.5))
+        stats = round_dimensions.round_selected_dimensions(0.5)
+    finally:
+        set_progress(None)
+    assert stats.is_cancelled and stats.writes_count == 0
+    assert calls < 1
+
+
+def read_dimensions(doc) -> list[tuple[float, bool, str, bool]]:
+    """ `(номинальное значение, угловой, текст, автоопределение)` каждого размера документа. """
+    return [
+        (d.NominalValue, d._kind in ANGLE_DIMENSION_KINDS, d.NominalText.Str, d.AutoNominalValue)
+        for d in doc._iterate_dimensions()
+    ]
+
+
+def test_written_values(backend):
+    """ Значения, записанные в документ округлением, округлением по ряду и снятием округления. """
+    doc = create_random_document(backend, 5, 40)
+    select_all(doc)
+
+    round_dimensions.round_selected_dimensions(0.5, 0.5, True)
+    for nv, is_angle, text, is_auto in read_dimensions(doc):
+        assert not is_auto
+        if is_angle:
+            assert text == round_dimensions.get_rounded_text(nv, True, 0.5, 0.5, True)
+        else:
+            assert text == math_utils.round_to_number_exact_str(nv, 0.5, 0.5).replace(".", ",")
+
+    select_all(doc)
+    round_dimensions.remove_rounding_in_selected_dimensions()
+    assert all(is_auto for nv, is_angle, text, is_auto in read_dimensions(doc))
+    texts = [text for nv, is_angle, text, is_auto in read_dimensions(doc)]
+
+    select_all(doc)
+    round_dimensions.round_selected_dimensions_to_series("R40")
+    series = get_series("R40")
+    for (nv, is_angle, text, is_auto), previous_text in zip(read_dimensions(doc), texts):
+        if is_angle:
+            # угловые размеры не изменяются
+            assert is_auto and text == previous_text
+        else:
+            assert not is_auto
+            assert text == math_utils.round_tail_str(series.round(nv, 0.5)).replace(".", ",")
+
+
+def test_late_bound_variant():
+    """ Позднее связывание даёт те же значения, но требует больше вызовов API. """
+    previous = backend_module._backend
+    texts = []
+    calls = []
+    try:
+        for use_dispatch_accessors in (True, False):
+            backend = MemoryBackend(use_dispatch_accessors=use_dispatch_accessors)
+            backend_module.set_backend(backend)
+            doc = create_random_document(backend, 10, DIMENSIONS_COUNT // 10)
+            select_all(doc)
+            calls.append(count_calls(backend, lambda: round_dimensions.round_selected_dimensions(0.5)))
+            texts.append([d.NominalText.Str for d in doc._iterate_dimensions()])
+    finally:
+        backend_module.set_backend(previous)
+    assert texts[0] == texts[1]
+    assert calls[0] < calls[1]
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+import src.math_utils as math_utils
+from src.number_formatter import get_formatter
+
+
+def reference_text(x: float, is_angle: bool, multiple: float, middle_coef: float, is_angle_DMS: bool) -> str:
+    """ Formatting one value at a time, as `round_dimensions.get_rounded_text` did before the formatter. """
+    if is_angle and is_angle_DMS:
+        if math_utils.do_floats_equal(x, 0):
+            return "0°"
+        x = round(math_utils.round_to_number_exact(x * 3600, multiple * 3600, middle_coef))
+        sign = -1 if x < 0 else +1
+        x = abs(x)
+        v = int(x / 3600)
+        m = int(x / 60 - v * 60)
+        s = int(x - v * 3600 - m * 60)
+        text = f"{sign * v}°"
+        if m != 0:
+            text += f"{m}'"
+        if s != 0:
+            text += f"{s}\""
+        return text
+    text = math_utils.round_to_number_exact_str(x, multiple, middle_coef).replace(".", ",")
+    return text + "°" if is_angle else text
+
+
+def random_values(count: int, seed: int = 0):
+    rnd = random.Random(seed)
+    nvs = [rnd.uniform(-180, 180) if rnd.random() < 0.2 else 10 ** rnd.uniform(-2, 4) for _ in range(count)]
+    nvs += [0.0, -0.0, 1e-9, 0.5, 2.5, -2.5, 359.99999, 1e8, 123456789.125]
+    is_angles = [abs(nv) < 360 and rnd.random() < 0.5 for nv in nvs]
+    return nvs, is_angles
+
+
+@pytest.mark.parametrize("multiple, middle_coef, is_angle_DMS", [
+    (1, 0.5, True),
+    (0.1, 0, False),
+    (0.25, 1, True),
+    (100 / 24, 0.5, True),
+    (10 / 12, 0.5, False),
+    (1 / 60, 0.5, True),
+    (0.005, 0.5, True),
+])
+def test_matches_per_value_formatting(multiple, middle_coef, is_angle_DMS):
+    nvs, is_angles = random_values(20000)
+    texts = get_formatter(multiple, middle_coef, is_angle_DMS).format_batch(nvs, is_angles)
+    for nv, is_angle, text in zip(nvs, is_angles, texts):
+        assert text == reference_text(nv, is_angle, multiple, middle_coef, is_angle_DMS), (nv, is_angle)
+
+
+def test_dms_examples():
+    formatter = get_formatter(1 / 60, 0.5, True)
+    assert formatter.format(30.5, True) == "30°30'"
+    assert formatter.format(-1.25, True) == "-1°15'"
+    assert formatter.format(10.0, False) == "10"
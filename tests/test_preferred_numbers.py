@@ -0,0 +1,29 @@
+import random
+
+from src.preferred_numbers import MULTIPLE_LADDER, get_series
+
+
+def test_ladder_is_monotonic_in_input_range():
+    rnd = random.Random(0)
+    for _ in range(20000):
+        x = 10 ** rnd.uniform(-12, 9)
+        assert MULTIPLE_LADDER.previous(x) < x < MULTIPLE_LADDER.next(x), x
+
+
+def test_ladder_small_values():
+    assert MULTIPLE_LADDER.previous(4.17e-5) == 2.5e-5
+    assert MULTIPLE_LADDER.next(4.17e-5) == 5e-5
+    assert MULTIPLE_LADDER.next(9.9e-9) == 1e-8
+
+
+def test_ladder_stops_at_power_of_ten():
+    assert MULTIPLE_LADDER.next(100 / 12) == 10
+    assert MULTIPLE_LADDER.next(10) == 10 / 6 * 10
+    assert MULTIPLE_LADDER.previous(10) == 100 / 12
+
+
+def test_series_round():
+    r40 = get_series("R40")
+    assert r40.nearest(117) == 118
+    assert r40.round(117, 0) == 112
+    assert r40.round(-117, 1) == -118
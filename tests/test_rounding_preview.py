@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+import src.backend as backend_module
+from src.memory_backend import MemoryBackend, create_random_document, select_all
+from src.rounding_preview import RoundingPreview, is_valid_multiple
+from src.selection_cache import get_selection_cache
+
+
+@pytest.fixture
+def preview():
+    previous = backend_module._backend
+    backend = MemoryBackend()
+    backend_module.set_backend(backend)
+    doc = create_random_document(backend, 1, 20)
+    cache = get_selection_cache()
+    cache.set_enabled(True)
+    select_all(doc)
+    yield RoundingPreview(cache.prefetch())
+    cache.set_enabled(False)
+    backend_module.set_backend(previous)
+
+
+def test_valid_multiples():
+    assert is_valid_multiple(0.5)
+    assert is_valid_multiple(100 / 24)
+    for multiple in (0.0, -0.5, -1, 1e-300, math.inf, -math.inf, math.nan):
+        assert not is_valid_multiple(multiple), multiple
+
+
+def test_preview_texts(preview):
+    texts = preview.get_texts(1)
+    assert len(texts) == 3
+    assert all(len(mode_texts) == len(preview) for mode_texts in texts)
+    assert all(text.startswith("≈") for text in preview.old_texts)
+    assert preview.get_changed_counts(1) == [len(preview)] * 3
+
+
+@pytest.mark.parametrize("multiple", [0.0, -0.5, -1, 1e-300, math.inf, math.nan])
+def test_invalid_multiple(preview, multiple):
+    assert preview.format_table(multiple) == "Недопустимая кратность"
+    with pytest.raises(Exception):
+        preview.get_texts(multiple)
+
+
+def test_negative_values(preview):
+    preview.values.nominal_values = [-2.4, -2.26, -0.1, -1e-8, -123.75, 2.26]
+    preview.values.is_angles = [False] * 6
+    preview._results.clear()
+    down, nearest, up = preview.get_texts(0.5)
+    assert nearest == ["-2,5", "-2,5", "0", "0", "-124", "2,5"]
+    assert down == ["-2", "-2", "0", "0", "-123,5", "2"]